@@ -171,6 +171,7 @@ func makeFullNode(ctx *cli.Context) (*node.Node, ethapi.Backend) {
 		MongoURI:       ctx.String(utils.MongoURI.Name),
 		DatabaseName:   ctx.String(utils.Database.Name),
 		CollectionName: ctx.String(utils.Collection.Name),
+		TraceEncoding:  ctx.String(utils.TraceEncoding.Name),
 	}
 
 	backend, eth := utils.RegisterEthService(stack, &cfg.Eth)
@@ -203,6 +203,7 @@ var (
 		utils.MongoURI,
 		utils.Database,
 		utils.Collection,
+		utils.TraceEncoding,
 	}
 )
 
@@ -103,6 +103,13 @@ var (
 		Category: flags.MongoCategory,
 	}
 
+	TraceEncoding = &cli.StringFlag{
+		Name:     "mongo.encoding",
+		Usage:    "Encoding of the logged op traces (text, binary or both)",
+		Value:    mgologger.TextEncoding,
+		Category: flags.MongoCategory,
+	}
+
 	// General settings
 	DataDirFlag = &flags.DirectoryFlag{
 		Name:     "datadir",
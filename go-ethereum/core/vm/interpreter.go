@@ -239,7 +239,7 @@ func (in *EVMInterpreter) Run(contract *Contract, input []byte, readOnly bool) (
 		res, output, err = operation.execute(&pc, in, callContext)
 
 		if !in.evm.Prefetch {
-			mgologger.AddOpLog(pcCopy, in.evm.CallIndex, uint64(in.evm.Depth), op.String(), gasCopy, cost, output)
+			mgologger.AddOpLog(pcCopy, in.evm.CallIndex, uint64(in.evm.Depth), byte(op), op.String(), gasCopy, cost, output)
 		}
 
 		if err != nil {
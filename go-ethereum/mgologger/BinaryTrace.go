@@ -0,0 +1,101 @@
+package mgologger
+
+import (
+	"encoding/binary"
+)
+
+// BinaryOpTraceMagic prefixes every binary op trace, and doubles as its version.
+const BinaryOpTraceMagic = "OPT1"
+
+// binaryOpTrace accumulates an op trace column by column, so that it can be
+// written out as the binary layout read by pyanalyze's optrace.read_binary.
+// All integers are little-endian:
+//
+//	magic "OPT1" | uint32 n
+//	uint64 gas[n] | uint64 cost[n] | uint32 pc[n] | uint32 callindex[n]
+//	uint32 outputOffsets[n+1] | uint16 depth[n] | uint8 opcode[n] | output bytes
+//
+// The output of op i is output[outputOffsets[i]:outputOffsets[i+1]].
+type binaryOpTrace struct {
+	gas       []uint64
+	cost      []uint64
+	pc        []uint32
+	callIndex []uint32
+	offsets   []uint32
+	depth     []uint16
+	opcode    []byte
+	output    []byte
+}
+
+func newBinaryOpTrace(capacity int) *binaryOpTrace {
+	return &binaryOpTrace{
+		gas:       make([]uint64, 0, capacity),
+		cost:      make([]uint64, 0, capacity),
+		pc:        make([]uint32, 0, capacity),
+		callIndex: make([]uint32, 0, capacity),
+		offsets:   make([]uint32, 1, capacity+1),
+		depth:     make([]uint16, 0, capacity),
+		opcode:    make([]byte, 0, capacity),
+		output:    make([]byte, 0, capacity),
+	}
+}
+
+// Reset empties the trace, keeping the allocated columns for reuse.
+func (t *binaryOpTrace) Reset() {
+	t.gas = t.gas[:0]
+	t.cost = t.cost[:0]
+	t.pc = t.pc[:0]
+	t.callIndex = t.callIndex[:0]
+	t.offsets = t.offsets[:1]
+	t.depth = t.depth[:0]
+	t.opcode = t.opcode[:0]
+	t.output = t.output[:0]
+}
+
+// Len returns the number of ops in the trace.
+func (t *binaryOpTrace) Len() int {
+	return len(t.pc)
+}
+
+// Add appends a single executed op to the trace.
+func (t *binaryOpTrace) Add(pc uint64, callindex uint64, depth uint64, opcode byte, gas uint64, gasCost uint64, ret []byte) {
+	t.gas = append(t.gas, gas)
+	t.cost = append(t.cost, gasCost)
+	t.pc = append(t.pc, uint32(pc))
+	t.callIndex = append(t.callIndex, uint32(callindex))
+	t.depth = append(t.depth, uint16(depth))
+	t.opcode = append(t.opcode, opcode)
+	t.output = append(t.output, ret...)
+	t.offsets = append(t.offsets, uint32(len(t.output)))
+}
+
+// Bytes encodes the trace into a newly allocated buffer.
+func (t *binaryOpTrace) Bytes() []byte {
+	n := t.Len()
+	buf := make([]byte, 8+n*(2*8+3*4+2+1)+4+len(t.output))
+
+	copy(buf, BinaryOpTraceMagic)
+	binary.LittleEndian.PutUint32(buf[4:], uint32(n))
+
+	pos := 8
+	for _, column := range [][]uint64{t.gas, t.cost} {
+		for _, v := range column {
+			binary.LittleEndian.PutUint64(buf[pos:], v)
+			pos += 8
+		}
+	}
+	for _, column := range [][]uint32{t.pc, t.callIndex, t.offsets} {
+		for _, v := range column {
+			binary.LittleEndian.PutUint32(buf[pos:], v)
+			pos += 4
+		}
+	}
+	for _, v := range t.depth {
+		binary.LittleEndian.PutUint16(buf[pos:], v)
+		pos += 2
+	}
+	pos += copy(buf[pos:], t.opcode)
+	copy(buf[pos:], t.output)
+
+	return buf
+}
@@ -2,6 +2,7 @@ package mgologger
 
 import (
 	"bytes"
+	"encoding/binary"
 	"encoding/hex"
 	"fmt"
 	"log"
@@ -16,8 +17,17 @@ type MongoConfig struct {
 	MongoURI       string
 	DatabaseName   string
 	CollectionName string
+	TraceEncoding  string // one of TextEncoding, BinaryEncoding or BothEncodings
 }
 
+// Encodings the op trace can be written to MongoDB in. The text encoding is
+// stored in the optrace field, the binary encoding in the optracebin field.
+const (
+	TextEncoding   = "text"
+	BinaryEncoding = "binary"
+	BothEncodings  = "both"
+)
+
 type Collection struct {
 	Block         int
 	Tx            string
@@ -27,8 +37,11 @@ type Collection struct {
 	GasPrice      string
 	GasUsed       string
 	OpTrace       string
+	OpTraceBin    []byte `bson:"optracebin,omitempty"`
 	FuncTrace     string
 	TransferTrace string
+	TraceSize     int   // number of logged ops
+	SampleKey     int64 // pseudo-random key that samples are drawn by
 }
 
 var (
@@ -37,9 +50,14 @@ var (
 	collection string
 
 	opTrace       *bytes.Buffer
+	opTraceBin    *binaryOpTrace
 	funcTrace     *bytes.Buffer
 	transferTrace *bytes.Buffer
 
+	logText   bool
+	logBinary bool
+	opCount   int
+
 	TraceIndex int
 	CallStack  [1025]uint
 
@@ -49,15 +67,7 @@ var (
 )
 
 func InitLogger(cfg MongoConfig) {
-	opTrace = bytes.NewBuffer(make([]byte, 8_000_00))
-	funcTrace = bytes.NewBuffer(make([]byte, 2_000_000))
-	transferTrace = bytes.NewBuffer(make([]byte, 500_000))
-
-	for i := 0; i < 1024; i++ {
-		CallStack[i] = 0
-	}
-
-	TraceIndex = 0
+	initBuffers(cfg.TraceEncoding)
 
 	session, err := mgo.DialWithTimeout(cfg.MongoURI, 0)
 	if err != nil {
@@ -70,10 +80,35 @@ func InitLogger(cfg MongoConfig) {
 	collection = cfg.CollectionName
 }
 
+// initBuffers allocates the trace buffers and selects the op trace encoding.
+func initBuffers(encoding string) {
+	opTrace = bytes.NewBuffer(make([]byte, 8_000_00))
+	funcTrace = bytes.NewBuffer(make([]byte, 2_000_000))
+	transferTrace = bytes.NewBuffer(make([]byte, 500_000))
+	opTraceBin = newBinaryOpTrace(100_000)
+
+	switch encoding {
+	case BinaryEncoding:
+		logText, logBinary = false, true
+	case BothEncodings:
+		logText, logBinary = true, true
+	default:
+		logText, logBinary = true, false
+	}
+
+	for i := 0; i < 1024; i++ {
+		CallStack[i] = 0
+	}
+
+	TraceIndex = 0
+}
+
 func InitTrace() {
 	opTrace.Reset()
+	opTraceBin.Reset()
 	funcTrace.Reset()
 	transferTrace.Reset()
+	opCount = 0
 
 	for i := 0; i < 1024; i++ {
 		CallStack[i] = 0
@@ -82,9 +117,15 @@ func InitTrace() {
 	TraceIndex = 0
 }
 
-func AddOpLog(pc uint64, callindex uint64, depth uint64, op string, gas uint64, gasCost uint64, ret []byte) {
-	output := hex.EncodeToString(ret)
-	opTrace.WriteString(fmt.Sprintf("%d,%d,%d,%s,%d,%d,0x%s\n", pc, callindex, depth, op, gas, gasCost, output))
+func AddOpLog(pc uint64, callindex uint64, depth uint64, opcode byte, op string, gas uint64, gasCost uint64, ret []byte) {
+	opCount++
+	if logText {
+		output := hex.EncodeToString(ret)
+		opTrace.WriteString(fmt.Sprintf("%d,%d,%d,%s,%d,%d,0x%s\n", pc, callindex, depth, op, gas, gasCost, output))
+	}
+	if logBinary {
+		opTraceBin.Add(pc, callindex, depth, opcode, gas, gasCost, ret)
+	}
 }
 
 func AddFuncLog(index int, calltype string, depth int, from common.Address, to common.Address, value big.Int, gas uint64, input []byte, output []byte) {
@@ -120,10 +161,15 @@ func WriteEntry(block big.Int, tx common.Hash, from string, to string, value big
 	funcTraceStr := strings.TrimSuffix(string(bytes.Trim(funcTrace.Bytes(), "\x00")), "\n")
 	transferTraceStr := strings.TrimSuffix(string(bytes.Trim(transferTrace.Bytes(), "\x00")), "\n")
 
-	if opTraceStr == "" {
+	if opTraceStr == "" && opTraceBin.Len() == 0 {
 		return // early return if tx is eoa->eoa
 	}
 
+	var opTraceBytes []byte
+	if logBinary {
+		opTraceBytes = opTraceBin.Bytes()
+	}
+
 	trace := Collection{
 		Block:         int(block.Uint64()),
 		Tx:            tx.String(),
@@ -133,8 +179,11 @@ func WriteEntry(block big.Int, tx common.Hash, from string, to string, value big
 		GasPrice:      gasPrice.String(),
 		GasUsed:       fmt.Sprintf("%d", gasUsed),
 		OpTrace:       opTraceStr,
+		OpTraceBin:    opTraceBytes,
 		FuncTrace:     funcTraceStr,
 		TransferTrace: transferTraceStr,
+		TraceSize:     opCount,
+		SampleKey:     SampleKey(tx),
 	}
 
 	err := Db.C(collection).Insert(trace)
@@ -144,6 +193,13 @@ func WriteEntry(block big.Int, tx common.Hash, from string, to string, value big
 	}
 }
 
+// SampleKey derives the key that pyanalyze draws reproducible samples by from
+// a transaction hash: its first 8 bytes, shifted to fit a positive int64.
+// Hashes are uniformly distributed, so the keys are too.
+func SampleKey(tx common.Hash) int64 {
+	return int64(binary.BigEndian.Uint64(tx[:8]) >> 1)
+}
+
 func CloseMongo() {
 	defer Logger.Close()
 }
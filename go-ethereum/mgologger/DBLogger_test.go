@@ -0,0 +1,40 @@
+package mgologger
+
+import (
+	"bytes"
+	"testing"
+)
+
+// benchOps is a representative mix of logged ops: most ops log no output,
+// some log a word and a few (e.g. copies and calls) log larger buffers.
+var benchOps = []struct {
+	opcode byte
+	name   string
+	ret    []byte
+}{
+	{0x60, "PUSH1", []byte{0x80}},
+	{0x52, "MSTORE", nil},
+	{0x01, "ADD", nil},
+	{0x54, "SLOAD", bytes.Repeat([]byte{0xab}, 32)},
+	{0x57, "JUMPI", nil},
+	{0x5b, "JUMPDEST", nil},
+	{0x37, "CALLDATACOPY", bytes.Repeat([]byte{0xcd}, 68)},
+	{0xf1, "CALL", bytes.Repeat([]byte{0xef}, 32)},
+}
+
+func benchmarkAddOpLog(b *testing.B, encoding string) {
+	initBuffers(encoding)
+	b.ReportAllocs()
+	b.ResetTimer()
+
+	for i := 0; i < b.N; i++ {
+		if i%100_000 == 0 {
+			InitTrace()
+		}
+		op := benchOps[i%len(benchOps)]
+		AddOpLog(uint64(i%24_576), 3, 2, op.opcode, op.name, 1_000_000-uint64(i%1000), 3, op.ret)
+	}
+}
+
+func BenchmarkAddOpLogText(b *testing.B)   { benchmarkAddOpLog(b, TextEncoding) }
+func BenchmarkAddOpLogBinary(b *testing.B) { benchmarkAddOpLog(b, BinaryEncoding) }
@@ -5,15 +5,32 @@ from typing import List, Dict, Callable
 
 from decompiler.analyzer.variable import Variable
 from decompiler.analyzer.op import Op, OpView
+from decompiler.analyzer.predicate import Predicate
+from decompiler.analyzer.columnar import ColumnarOpView, load_columns
+from decompiler.analyzer.query import Query
+from decompiler.analyzer.reachability import ReachabilityIndex
+from decompiler.analyzer.taint import TaintEngine
+from decompiler.analyzer.trace_loader import TraceLoader
 
 
 class OpAnalyzer:
-    def __init__(self, source: tac_cfg.TACGraph) -> None:
+    def __init__(
+        self,
+        source: tac_cfg.TACGraph = None,
+        columnar: bool = False,
+        trace: Dict[str, int | str | Dict] = None,
+    ) -> None:
         """Representation of Vandal Datalog instructions
         as Python / PyDatalog
 
         Args:
             source (object): the CFG object to be analyzed
+            columnar (bool, optional): store ops and variables in NumPy
+            arrays per opcode instead of one object each, see
+            analyzer.columnar.
+            trace (Dict[str, int | str | Dict], optional): the transaction
+            logs to load the ops and variables from directly, without a
+            CFG, see analyzer.trace_loader. source is then None.
         """
 
         self.source = source
@@ -24,7 +41,15 @@ class OpAnalyzer:
         # associates variables with discrete values
         self.variables: Dict[str, Variable] = {}
 
-        self.__load__()
+        # answers ancestor / descendant queries between variables
+        self.reachability = ReachabilityIndex()
+
+        if trace is not None:
+            self.__load_trace__(trace)
+        elif columnar:
+            self.__load_columns__()
+        else:
+            self.__load__()
 
     def __load__(self):
         """Loads data from the source tac_cfg into ops and Variables"""
@@ -52,7 +77,7 @@ class OpAnalyzer:
 
                     if op.lhs.values.is_finite:
                         # iterate through backwards to preserve bigendian-ness
-                        value = int(str(op.lhs.values.const_value))
+                        value = op.lhs.values.const_value
                 else:
                     def_var = None
                     value = None
@@ -78,31 +103,65 @@ class OpAnalyzer:
 
         for op in self.ops.values():
             op.addresses = addresses
+            op.reachability = self.reachability
+
+    def __load_columns__(self):
+        """Loads data from the source tac_cfg into OpColumns and a
+        VariableTable, with a ColumnarOpView of each opcode"""
+        columns, self.variables, addresses = load_columns(self.source)
+
+        for name, opcode_columns in columns.items():
+            self.ops[name] = ColumnarOpView(opcode_columns)
+            self.ops[name].addresses = addresses
+            self.ops[name].reachability = self.reachability
+
+    def __load_trace__(self, trace: Dict[str, int | str | Dict]):
+        """Loads ops and Variables straight from the transaction logs with a
+        TraceLoader, giving the same ops and Variables as __load__"""
+        self.ops, self.variables, addresses = TraceLoader.from_trace(trace)
+
+        for op in self.ops.values():
+            op.addresses = addresses
+            op.reachability = self.reachability
 
     @classmethod
-    def load_from_mongo(cls, tx: Dict[str, int | str | Dict]) -> "OpAnalyzer":
+    def load_from_mongo(
+        cls, tx: Dict[str, int | str | Dict], columnar: bool = False
+    ) -> "OpAnalyzer":
         """Abstracts the process of CFG creation away from the user, so only a
         string dump of the transaction logs is needed
 
+        Unless columnar, the ops are loaded straight from the logs, and no
+        CFG is built at all.
+
         Args:
             tx (Dict[str, int  |  str  |  Dict]): the transaction logs
+            columnar (bool, optional): as in OpAnalyzer.__init__
 
         Returns:
             OpAnalyzer: the new class instance instantiated on the cfg
         """
+        if not columnar:
+            return cls(trace=tx)
+
         cfg = tac_cfg.TACGraph.from_trace(tx)
 
-        return cls(cfg)
+        return cls(cfg, columnar)
 
-    def get_ops(self, opcode: str, **kwargs: Dict[str, tuple[Callable, str]]) -> OpView:
+    def get_ops(
+        self, opcode: str, **kwargs: Dict[str, tuple[Callable, str] | Predicate]
+    ) -> OpView:
         """Get a OpView of opcodes matching kwargs. Kwargs should be a named value
         matched with a 2-tuple of a comparison function and the discrete value
         to compare to. The comparision function should accept two parameters
-        that allow comparision (such as an int).
+        that allow comparision (such as an int). A predicate.Predicate, such
+        as Gt(2) or Between(1, 4), may be given instead, and is applied
+        without probing the function for bounds.
 
         Examples:
             sload = api.get_ops('SLOAD', callindex=(lambda x, y: x>y, 2))
             jumpi = api.get_ops('JUMPI', callindex=(lambda x, y: x<=y, 3))
+            sstore = api.get_ops('SSTORE', depth=Between(1, 4))
 
         Args:
             opcode (str): the opcode to get the OpView of
@@ -115,14 +174,37 @@ class OpAnalyzer:
             print(f"Retrieved OpView of zero ops: {opcode}")
             return OpView()
 
-        ops = self.ops[opcode]
+        # a view of its own, so the filters and links of one heuristic are
+        # never seen by another
+        return self.ops[opcode].select(**kwargs)
 
-        if len(kwargs.keys()) == 0: 
-            return ops
-        
-        ops.filter(**kwargs)
+    def query(self, opcode: str, **kwargs: Dict[str, tuple[Callable, str]]) -> Query:
+        """Start a Query of the OpView get_ops(opcode, **kwargs) returns, which
+        records the OpView calls made on it and plans them as a whole once
+        its result is needed.
+
+        Examples:
+            sload = api.query('SLOAD', depth=(operator.gt, 2))
+            sload.link_ops(api.query('JUMPI'), call_index=operator.eq)
+            sload.export('./output.csv')
 
-        return ops
+        Returns:
+            Query: the query of the ops
+        """
+        return Query(self, opcode, **kwargs)
+
+    def taint(self, **sources: OpView) -> TaintEngine:
+        """Propagate taint from each named set of source ops to every variable
+        derived from them, in one pass over the transaction.
+
+        Examples:
+            taint = api.taint(timestamp=api.get_ops('TIMESTAMP'))
+            jumpi.filter_taint(taint, 'timestamp', use_vi=1)
+
+        Returns:
+            TaintEngine: the taint of every variable
+        """
+        return TaintEngine(self.variables.values(), **sources)
 
     @staticmethod
     def link_ops(orig : OpView, other : OpView, save_links: bool = False, **kwargs):
@@ -152,6 +234,14 @@ class OpAnalyzer:
     def reduce_ancestor(ops : OpView, self_def_var: bool = True, self_use_vi: int = None, link_def_var: bool = True, link_use_vi: int = None):
         ops.reduce_ancestor(self_def_var=self_def_var, self_use_vi=self_use_vi, link_def_var=link_def_var, link_use_vi=link_use_vi)
 
+    @staticmethod
+    def reduce_taint(ops : OpView, taint: TaintEngine, link_def_var: bool = True, link_use_vi: int = None, strict: bool = False):
+        ops.reduce_taint(taint, link_def_var=link_def_var, link_use_vi=link_use_vi, strict=strict)
+
+    @staticmethod
+    def filter_taint(ops : OpView, taint: TaintEngine, source: str | Op = None, def_var: bool = False, use_vi: int = None, strict: bool = False):
+        ops.filter_taint(taint, source, def_var=def_var, use_vi=use_vi, strict=strict)
+
     @staticmethod
     def filter_address(ops : OpView, address : str):
         ops.filter_address(address)
@@ -0,0 +1,344 @@
+from functools import cached_property
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+import decompiler.opcodes as opcodes
+import decompiler.tac_cfg as tac_cfg
+from decompiler.analyzer.op import Op, OpChain, OpView, find_bounds, split_filters
+from decompiler.analyzer.predicate import Predicate
+from decompiler.analyzer.variable import Variable
+
+NO_VARIABLE = -1
+"""The variable id of an op that defines or uses no variable."""
+
+COLUMNS = ("op_index", "call_index", "pc", "depth")
+"""The Op properties stored as columns, which OpView.filter can scan."""
+
+
+class VariableTable(Mapping[str, Variable]):
+    """The Variables of a transaction as arrays, numbered by id in the order
+    they were defined. The def-use graph is kept in compressed sparse row
+    form: the predecessors of variable i are preds[pred_offsets[i] :
+    pred_offsets[i + 1]], and likewise for successors.
+
+    A Variable object is only created for an id when it is first asked for,
+    and its preds and succs when they are first read, so walking part of
+    the graph only creates the variables it reaches. Looking a variable up
+    by symbol, as a Mapping, indexes every symbol on first use.
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        values: List[Optional[int]],
+        pred_offsets: np.ndarray,
+        preds: np.ndarray,
+    ) -> None:
+        self.symbols = symbols
+        self.var_values = values
+        self.pred_offsets = pred_offsets
+        self.preds = preds
+
+        # each variable is the successor of its predecessors, in id order
+        order = np.argsort(preds, kind="stable")
+        defs = np.repeat(np.arange(len(symbols), dtype=np.int32), np.diff(pred_offsets))
+        self.succs = defs[order]
+        self.succ_offsets = np.zeros(len(symbols) + 1, dtype=np.int32)
+        used = preds[preds != NO_VARIABLE]
+        np.cumsum(np.bincount(used, minlength=len(symbols)), out=self.succ_offsets[1:])
+        # ops using no variable sort first, and are not anyone's successor
+        self.succs = self.succs[len(preds) - len(used) :]
+
+        self.__variables: Dict[int, TableVariable] = {}
+        self.__ids: Dict[str, int] = None
+
+    def variable(self, i: int) -> Optional["TableVariable"]:
+        """Returns the Variable with id i, or None for NO_VARIABLE"""
+        if i == NO_VARIABLE:
+            return None
+        if i not in self.__variables:
+            self.__variables[i] = TableVariable(self, i)
+        return self.__variables[i]
+
+    def pred_ids(self, i: int) -> List[int]:
+        return self.preds[self.pred_offsets[i] : self.pred_offsets[i + 1]].tolist()
+
+    def succ_ids(self, i: int) -> List[int]:
+        return self.succs[self.succ_offsets[i] : self.succ_offsets[i + 1]].tolist()
+
+    def __getitem__(self, symbol: str) -> Variable:
+        if self.__ids is None:
+            self.__ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        return self.variable(self.__ids[symbol])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def values(self) -> Iterator[Variable]:
+        """Yields every Variable in the order they were defined"""
+        return (self.variable(i) for i in range(len(self.symbols)))
+
+
+class TableVariable(Variable):
+    """A Variable read from a VariableTable"""
+
+    def __init__(self, table: VariableTable, i: int) -> None:
+        self.table = table
+        self.id = i
+        self.symbol = table.symbols[i]
+        self.value = table.var_values[i]
+
+    @cached_property
+    def preds(self) -> List[Variable]:
+        return [self.table.variable(j) for j in self.table.pred_ids(self.id)]
+
+    @cached_property
+    def succs(self) -> List[Variable]:
+        return [self.table.variable(j) for j in self.table.succ_ids(self.id)]
+
+
+class OpColumns:
+    """The ops of one opcode, as one array per Op property. The variables
+    each op uses are a 2D array of ids, one row per op, padded with
+    NO_VARIABLE up to the most used by any op."""
+
+    def __init__(
+        self,
+        name: str,
+        columns: Dict[str, np.ndarray],
+        def_var: np.ndarray,
+        use_vars: np.ndarray,
+        arity: np.ndarray,
+        variables: VariableTable,
+    ) -> None:
+        self.name = name
+        self.columns = columns
+        self.def_var = def_var
+        self.use_vars = use_vars
+        self.arity = arity
+        self.variables = variables
+
+        self.__ops: Dict[int, Op] = {}
+
+    def __len__(self) -> int:
+        return len(self.def_var)
+
+    def op(self, row: int) -> Op:
+        """Returns the Op of the given row, the same object every time"""
+        if row not in self.__ops:
+            variables = self.variables
+            self.__ops[row] = Op(
+                int(self.columns["op_index"][row]),
+                int(self.columns["call_index"][row]),
+                int(self.columns["pc"][row]),
+                self.name,
+                int(self.columns["depth"][row]),
+                [
+                    variables.variable(i)
+                    for i in self.use_vars[row, : self.arity[row]].tolist()
+                ],
+                variables.variable(int(self.def_var[row])),
+            )
+        return self.__ops[row]
+
+
+class ColumnarOpView(OpView):
+    """An OpView of one opcode's ops held as an array of rows of its
+    OpColumns. filter scans the columns with boolean masks. The view is
+    only turned into a dict of Op objects, each created once, when its ops
+    are first read, and from then on behaves as any OpView.
+
+    link_ops, every reduce_*, and iteration all read the ops, as does
+    linking to the view, so only filter, select and copy keep to the rows.
+    The memory saved is that of the ops filtered out before the first of
+    these, and of every op of an opcode whose view is never read; a view
+    that is linked keeps an Op and its Variables for each row it had."""
+
+    def __init__(self, columns: OpColumns, rows: np.ndarray = None) -> None:
+        super().__init__()
+        self.columns = columns
+        self.rows = np.arange(len(columns)) if rows is None else rows
+
+        if len(self.rows) != 0:
+            self.depth_max = int(columns.columns["depth"][self.rows].max())
+            self.call_max = int(columns.columns["call_index"][self.rows].max())
+
+    def filter(self, **kwargs: Tuple[Callable, int] | Predicate):
+        if self.rows is None or not set(kwargs) <= set(COLUMNS):
+            return super().filter(**kwargs)
+
+        self.rows = self.__select_rows(kwargs)
+
+    def select(self, **kwargs: Tuple[Callable, int] | Predicate) -> OpView:
+        if self.rows is None or not set(kwargs) <= set(COLUMNS):
+            return super().select(**kwargs)
+
+        return self.__derive_rows(self.__select_rows(kwargs))
+
+    def copy(self) -> OpView:
+        if self.rows is None:
+            return super().copy()
+
+        # rows are replaced rather than changed, so can be shared
+        return self.__derive_rows(self.rows)
+
+    def __select_rows(
+        self, filters: Dict[str, Tuple[Callable, int] | Predicate]
+    ) -> np.ndarray:
+        mask = np.ones(len(self.rows), dtype=bool)
+        for key, (lower, upper) in find_bounds(filters).items():
+            values = self.columns.columns[key][self.rows]
+            mask &= (values >= lower) & (values <= upper)
+        for key, predicate in split_filters(filters)[1].items():
+            mask &= predicate.mask(self.columns.columns[key][self.rows])
+        return self.rows[mask]
+
+    def __derive_rows(self, rows: np.ndarray) -> "ColumnarOpView":
+        view = ColumnarOpView(self.columns, rows)
+        view.first_link = self.first_link
+        view.addresses = self.addresses
+        view.reachability = self.reachability
+        return view
+
+    def __materialize(self) -> None:
+        if self.rows is not None:
+            rows, self.rows = self.rows, None
+            for row in rows.tolist():
+                dict.__setitem__(self, self.columns.op(row), OpChain())
+
+    def __len__(self) -> int:
+        if self.rows is not None:
+            return len(self.rows)
+        return super().__len__()
+
+    def __iter__(self):
+        self.__materialize()
+        return super().__iter__()
+
+    def __getitem__(self, op: Op) -> OpChain:
+        self.__materialize()
+        return super().__getitem__(op)
+
+    def __setitem__(self, op: Op, links: OpChain) -> None:
+        self.__materialize()
+        super().__setitem__(op, links)
+
+    def __delitem__(self, op: Op) -> None:
+        self.__materialize()
+        super().__delitem__(op)
+
+    def __contains__(self, op: object) -> bool:
+        self.__materialize()
+        return super().__contains__(op)
+
+    def keys(self):
+        self.__materialize()
+        return super().keys()
+
+    def values(self):
+        self.__materialize()
+        return super().values()
+
+    def items(self):
+        self.__materialize()
+        return super().items()
+
+    def get(self, op: Op, default=None):
+        self.__materialize()
+        return super().get(op, default)
+
+    def pop(self, op: Op, *default):
+        self.__materialize()
+        return super().pop(op, *default)
+
+
+def load_columns(
+    source: tac_cfg.TACGraph,
+) -> Tuple[Dict[str, OpColumns], VariableTable, Dict[int, str]]:
+    """Load the ops of source into OpColumns per opcode, as OpAnalyzer.__load__
+    loads them into Op objects, along with their variables and the address
+    executing each call depth"""
+    addresses = {0: source.sc_addr.lower()}
+
+    symbols: List[str] = []
+    values: List[Optional[int]] = []
+    ids: Dict[str, int] = {}
+    pred_counts: List[int] = []
+    preds: List[int] = []
+
+    # per opcode: the column values, def var, use vars of each op
+    rows: Dict[str, Tuple[Dict[str, List[int]], List[int], List[List[int]]]] = {}
+
+    value = None
+    for block in source.blocks:
+        for op in block.tac_ops:
+            name = op.opcode.name
+            if name not in rows:
+                rows[name] = ({key: [] for key in COLUMNS}, [], [])
+            columns, def_vars, use_vars = rows[name]
+
+            # determine any variables used in calculating opcode
+            if op.opcode != opcodes.CONST:
+                used = [ids.get(arg.value.name, NO_VARIABLE) for arg in op.args]
+            else:
+                used = []
+
+            if op.opcode.is_call():
+                addresses[op.depth + 1] = hex(
+                    next(iter(op.args[1].value.value))
+                ).lower()
+
+            if isinstance(op, tac_cfg.TACAssignOp):
+                if op.lhs.values.is_finite:
+                    value = op.lhs.values.const_value
+
+                ids[op.lhs.name] = len(symbols)
+                def_vars.append(len(symbols))
+                symbols.append(op.lhs.name)
+                values.append(value)
+                pred_counts.append(len(used))
+                preds.extend(used)
+            else:
+                def_vars.append(NO_VARIABLE)
+                value = None
+
+            columns["op_index"].append(op.op_index)
+            columns["call_index"].append(op.call_index)
+            columns["pc"].append(op.pc)
+            columns["depth"].append(op.depth)
+            use_vars.append(used)
+
+    pred_offsets = np.zeros(len(symbols) + 1, dtype=np.int32)
+    np.cumsum(pred_counts, out=pred_offsets[1:])
+    variables = VariableTable(
+        symbols, values, pred_offsets, np.array(preds, dtype=np.int32)
+    )
+
+    ops = {}
+    for name, (columns, def_vars, use_vars) in rows.items():
+        arity = np.array([len(used) for used in use_vars], dtype=np.uint8)
+        padded = np.full(
+            (len(use_vars), int(arity.max(initial=0))), NO_VARIABLE, dtype=np.int32
+        )
+        for row, used in enumerate(use_vars):
+            padded[row, : len(used)] = used
+
+        ops[name] = OpColumns(
+            name,
+            {
+                "op_index": np.array(columns["op_index"], dtype=np.int64),
+                "call_index": np.array(columns["call_index"], dtype=np.int32),
+                "pc": np.array(columns["pc"], dtype=np.int32),
+                "depth": np.array(columns["depth"], dtype=np.int16),
+            },
+            np.array(def_vars, dtype=np.int32),
+            padded,
+            arity,
+            variables,
+        )
+
+    return ops, variables, addresses
@@ -0,0 +1,176 @@
+from array import array
+from bisect import bisect_left, bisect_right
+import operator
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from decompiler.analyzer.predicate import Compare, conjuncts
+
+EQUALITY = {operator.eq}
+"""Link predicates joined by hashing the linked ops on the property."""
+
+ORDERED = {operator.lt, operator.le, operator.gt, operator.ge}
+"""Link predicates joined by sorting the linked ops on the property and
+bisecting for the range of values that satisfy it."""
+
+
+class LinkJoin:
+    """Finds the ops of an OpView that satisfy the predicates of a link_ops
+    call against a given op, without calling the predicates for every pair.
+
+    Linked ops are grouped by the tuple of properties compared, in the order
+    each tuple first appears, as link_ops always has. Groups are hashed on
+    the properties compared with an EQUALITY predicate. Within each hash
+    bucket, the groups are sorted on the first property compared with an
+    ORDERED predicate, so the groups satisfying it form a range found by
+    bisection. Any other predicate, such as a lambda, is called once per
+    remaining group. The links of each distinct tuple of the linking op's
+    properties are computed once.
+
+    A predicate.Compare of the linked op's property is joined as its
+    operator is, after adding its offset to the linking op's property, and
+    each predicate of a predicate.And is joined on its own.
+    """
+
+    def __init__(
+        self,
+        ops: Iterable["Op"],
+        predicates: Dict[str, Callable],
+        equal_on: Iterable[Tuple[Callable, Callable]] = (),
+    ) -> None:
+        """Index ops on the properties compared by predicates
+
+        Args:
+            ops (Iterable[Op]): the ops that can be linked to.
+            predicates (Dict[str, Callable]): the link_ops kwargs, mapping an
+            Op property to a predicate between the linking and linked op's
+            values of it.
+            equal_on (Iterable[Tuple[Callable, Callable]], optional): pairs
+            of functions of the linking and of the linked op whose results
+            must be equal, hashed along with the EQUALITY properties.
+        """
+        self.keys = list(predicates.keys())
+        self.equal_on = list(equal_on)
+
+        # the position of the property each predicate compares, and the
+        # operator it is joined by, if any
+        parts = [
+            (i, join_operator(part), part)
+            for i, func in enumerate(predicates.values())
+            for part in conjuncts(func)
+        ]
+        self.equal = [(i, offset(part)) for i, oper, part in parts if oper in EQUALITY]
+        # the results of equal_on follow the properties in each tuple
+        self.equal.extend(
+            (i, 0) for i in range(len(self.keys), len(self.keys) + len(self.equal_on))
+        )
+        ordered = [
+            (i, oper, offset(part)) for i, oper, part in parts if oper in ORDERED
+        ]
+        self.range = ordered[0] if ordered else None
+        self.called = [
+            (i, part)
+            for i, oper, part in parts
+            if oper not in EQUALITY and (i, oper, offset(part)) != self.range
+        ]
+
+        # the indices in ops of each tuple of properties, in order of appearance
+        self.ops: List["Op"] = list(ops)
+        self.groups: Dict[Tuple, array] = {}
+        for i, op in enumerate(self.ops):
+            attrs = tuple(getattr(op, key) for key in self.keys)
+            attrs += tuple(linked_key(op) for _, linked_key in self.equal_on)
+            if attrs not in self.groups:
+                self.groups[attrs] = array("i")
+            self.groups[attrs].append(i)
+
+        # the group tuples of each bucket, sorted on the range property
+        self.buckets: Dict[Tuple, List[Tuple]] = {}
+        for attrs in self.groups:
+            bucket = tuple(attrs[i] for i, _ in self.equal)
+            self.buckets.setdefault(bucket, []).append(attrs)
+
+        # groups are linked in the order their properties first appear, so
+        # that equal_on only ever drops links from what link_ops would make
+        first: Dict[Tuple, int] = {}
+        self.order = {
+            attrs: first.setdefault(attrs[: len(self.keys)], len(first))
+            for attrs in self.groups
+        }
+        self.values: Dict[Tuple, List] = {}
+        # the buckets whose groups are still in order of appearance once sorted
+        self.in_order = set(self.buckets)
+        if self.range is not None:
+            i = self.range[0]
+            for bucket, groups in self.buckets.items():
+                groups.sort(key=lambda attrs: attrs[i])
+                self.values[bucket] = [attrs[i] for attrs in groups]
+                if any(
+                    self.order[a] > self.order[b] for a, b in zip(groups, groups[1:])
+                ):
+                    self.in_order.discard(bucket)
+
+        self.cache: Dict[Tuple, array] = {}
+
+    def attrs(self, op: "Op") -> Tuple:
+        """Returns the tuple of op's properties compared by the join, followed
+        by the results of the equal_on functions of the linking op"""
+        attrs = tuple(getattr(op, key) for key in self.keys)
+        return attrs + tuple(key(op) for key, _ in self.equal_on)
+
+    def links(self, op: "Op") -> array:
+        """Returns the indices in ops of every linked op satisfying all
+        predicates against op, in the order link_ops has always linked them.
+        The array is shared by all ops with the same properties, so must be
+        copied before changing."""
+        attrs = self.attrs(op)
+        if attrs not in self.cache:
+            self.cache[attrs] = self.__match(attrs)
+        return self.cache[attrs]
+
+    def __match(self, attrs: Tuple) -> array:
+        # the bucket of the linked ops equal to the linking op's properties
+        bucket = tuple(attrs[i] + off if off else attrs[i] for i, off in self.equal)
+        groups = self.buckets.get(bucket, [])
+
+        if self.range is not None and groups:
+            i, func, off = self.range
+            values, x = self.values[bucket], attrs[i] + off if off else attrs[i]
+            # func(x, y) holds for the linked values y in this slice
+            if func is operator.lt:
+                groups = groups[bisect_right(values, x) :]
+            elif func is operator.le:
+                groups = groups[bisect_left(values, x) :]
+            elif func is operator.gt:
+                groups = groups[: bisect_left(values, x)]
+            else:
+                groups = groups[: bisect_right(values, x)]
+
+        if self.called:
+            groups = [
+                group
+                for group in groups
+                if all(func(attrs[i], group[i]) for i, func in self.called)
+            ]
+
+        if bucket not in self.in_order:
+            groups = sorted(groups, key=self.order.__getitem__)
+
+        links = array("i")
+        for group in groups:
+            links.extend(self.groups[group])
+        return links
+
+
+def join_operator(func: Callable) -> Callable:
+    """Returns the operator func compares the linking op's property with the
+    linked op's by, once offset, or func itself if it is not a comparison"""
+    if isinstance(func, Compare) and func.linked:
+        return func.OPERATOR
+    return func
+
+
+def offset(func: Callable) -> int:
+    """Returns the offset func adds to the linking op's property"""
+    if isinstance(func, Compare):
+        return func.offset
+    return 0
@@ -1,6 +1,9 @@
-from typing import List, Dict, Callable, Tuple
-import copy
+from array import array
+from typing import Any, List, Dict, Callable, Iterable, Iterator, Sequence, Tuple
 from decompiler.analyzer.variable import Variable
+from decompiler.analyzer.reachability import ReachabilityIndex
+from decompiler.analyzer.join import LinkJoin
+from decompiler.analyzer.predicate import Predicate
 
 
 class Op:
@@ -79,17 +82,130 @@ class Op:
 
 # class OpTIMESTAMP
 
-class OpChain(List):
-    def __init__(self, *args, **kwargs):
-        self.cached_chain = None
-        super().__init__(*args, **kwargs)
+
+def find_bounds(
+    filters: Dict[str, Tuple[Callable, int]], max_bound: int = 1024, min_bound: int = 0
+) -> Dict[str, List[int]]:
+    """Returns the inclusive [lower, upper] bounds of each Op property that
+    OpView.filter keeps, given its (func, bound) kwargs, which are probed
+    with the bounds of the range. Predicate kwargs are skipped."""
+    bounds = {}
+
+    for key, (func, bound) in split_filters(filters)[0].items():
+        if key not in bounds:
+            bounds[key] = [min_bound, max_bound]
+
+        if not func(bounds[key][0], bound):
+            bounds[key][0] = bound
+        if not func(bounds[key][1], bound):
+            bounds[key][1] = bound
+    return bounds
+
+
+def split_filters(
+    filters: Dict[str, Tuple[Callable, int] | Predicate]
+) -> Tuple[Dict[str, Tuple[Callable, int]], Dict[str, Predicate]]:
+    """Returns the (func, bound) kwargs of OpView.filter, and its Predicates"""
+    probed = {k: v for k, v in filters.items() if not isinstance(v, Predicate)}
+    predicates = {k: v for k, v in filters.items() if isinstance(v, Predicate)}
+    return probed, predicates
+
+
+def filter_test(filters: Dict[str, Tuple[Callable, int] | Predicate]) -> Callable:
+    """Returns the function of an op that OpView.filter keeps it by"""
+    bounds = find_bounds(filters)
+    predicates = split_filters(filters)[1]
+
+    return lambda op: all(
+        getattr(op, key) >= lower and getattr(op, key) <= upper
+        for key, (lower, upper) in bounds.items()
+    ) and all(predicate(getattr(op, key)) for key, predicate in predicates.items())
+
+
+class LinkLayer:
+    """The links made by one link_ops or reduction of an OpView, as indices
+    into the list of ops linked to, stored back to back in one array. The
+    OpChain of each op is a range of the array, and ops linked to the same
+    ops share one range, so a link costs four bytes however many ops have it.
+    """
+
+    def __init__(self, ops: List[Op]) -> None:
+        """Start an empty layer of links to ops
+
+        Args:
+            ops (List[Op]): the ops that can be linked to, in link order.
+        """
+        self.ops = ops
+        self.targets = array("i")
+
+    def append(self, indices: Iterable[int]) -> Tuple[int, int]:
+        """Adds links to the ops at indices, returning their range"""
+        start = len(self.targets)
+        self.targets.extend(indices)
+        return start, len(self.targets)
+
+
+class OpChain(Sequence[Op]):
+    """The ops linked to an op: a range of a LinkLayer, and with save_links
+    the chain of the ops it was linked to before, as cached_chain, so the
+    earlier layers are kept only as far as they are still linked. A chain is
+    not changed once made, so OpViews made from one another share their
+    chains, and reductions give the ops whose links they drop a new one."""
+
+    __slots__ = ("layer", "start", "stop", "cached_chain")
+
+    def __init__(
+        self,
+        layer: LinkLayer = None,
+        start: int = 0,
+        stop: int = 0,
+        cached_chain: "OpChain" = None,
+    ):
+        self.layer = EMPTY_LAYER if layer is None else layer
+        self.start = start
+        self.stop = stop
+        self.cached_chain = cached_chain
 
     @classmethod
     def from_chain(cls, chain: "OpChain"):
-        new = cls()
-        new.cached_chain = chain.copy()
+        return cls(cached_chain=chain)
+
+    def indices(self) -> array:
+        """Returns the indices of the linked ops in the layer's ops"""
+        return self.layer.targets[self.start : self.stop]
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, i: int | slice) -> Op | List[Op]:
+        if isinstance(i, slice):
+            return [self.layer.ops[j] for j in self.indices()[i]]
+        return self.layer.ops[self.layer.targets[range(self.start, self.stop)[i]]]
+
+    def __iter__(self) -> Iterator[Op]:
+        ops = self.layer.ops
+        return (ops[i] for i in self.indices())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (OpChain, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def copy(self) -> List[Op]:
+        """Returns the linked ops as a list"""
+        return list(self)
+
+
+EMPTY_LAYER = LinkLayer([])
+"""The layer of chains made without links."""
+
 
-        return new
+class LinkList(List[Op]):
+    """A list of links whose remove returns whether any are left, as OpChain
+    did while it was one"""
 
     def remove(self, __value) -> bool:
         super().remove(__value)
@@ -103,6 +219,7 @@ class OpView(Dict[Op, OpChain]):
         self.first_link = True
 
         self.addresses: List[str] = []
+        self.reachability: ReachabilityIndex = None
 
         self.depth_max = 0
         self.call_max = 0
@@ -110,8 +227,20 @@ class OpView(Dict[Op, OpChain]):
     def __sub__(self, other):
         nv = OpView({key: self[key] for key in set(self.keys()) - set(other.keys())})
         nv.addresses = self.addresses
+        nv.reachability = self.reachability
         return nv
 
+    def derive(self, ops: Iterable[Tuple[Op, OpChain]]) -> "OpView":
+        """Returns a new OpView of the given ops and links, sharing this
+        view's addresses and reachability index"""
+        view = OpView(ops)
+        view.first_link = self.first_link
+        view.addresses = self.addresses
+        view.reachability = self.reachability
+        view.depth_max = self.depth_max
+        view.call_max = self.call_max
+        return view
+
     def add_op(self, op: Op) -> None:
         self[op] = OpChain()
         self.depth_max = max(self.depth_max, op.depth)
@@ -121,61 +250,59 @@ class OpView(Dict[Op, OpChain]):
         for op in self.keys():
             yield op
 
-    def link_ops(self, other: "OpView", save_links: bool = False, **kwargs: Callable):
-        cached_links = {}
-        
-        def find_bounds(filters, values, max_bound = 1024, min_bound = 0):
-            bounds = {}
-            
-            for (key, func), bound in zip(filters.items(), values):
-                if key not in bounds:
-                    bounds[key] = [min_bound, max_bound]
-
-                if not func(bounds[key][0], bound):
-                    bounds[key][0] = bound
-                if not func(bounds[key][1], bound):
-                    bounds[key][1] = bound
-            return bounds
-        
-        other_keys = other.get_keys(kwargs.keys())
-        
-        total = 0
-        cached = 0
+    def link_ops(
+        self,
+        other: "OpView",
+        save_links: bool = False,
+        equal_on: List[Tuple[Callable[[Op], Any], Callable[[Op], Any]]] = (),
+        **kwargs: Callable,
+    ):
+        """Link each op to every op of other that satisfies all kwargs
+        predicates, called as func(getattr(op, key), getattr(linked, key)).
+        Predicates in join.EQUALITY and join.ORDERED are joined by hashing and
+        bisection, and any other callable is called once per distinct pair of
+        property tuples. A predicate.Compare given no value, such as
+        Gt(offset=-2), is joined as its operator is, and each predicate of an
+        And on its own. Each (key, linked_key) pair of equal_on further
+        requires key(op) == linked_key(linked), also joined by hashing."""
+        self.link_join(LinkJoin(other, kwargs, equal_on), save_links)
+
+    def link_join(self, join: LinkJoin, save_links: bool = False) -> None:
+        """Link each op to the ops of join satisfying its predicates, as
+        link_ops does. A join can link any number of OpViews, computing the
+        links of each distinct tuple of properties once across all of them.
+
+        Every op gets the links of its tuple of properties, including ops
+        after the first sharing it. Ops left without links are dropped, and
+        on any link after the first, so is an op that had no links before,
+        rather than being linked afresh."""
+        layer = LinkLayer(join.ops)
+        # ops with the same properties share both their links and range
+        ranges: Dict[int, Tuple[int, int]] = {}
 
         for op1 in list(self.keys()):
             if not self.first_link and len(self[op1]) == 0:
                 del self[op1]
-            if save_links:
-                self[op1] = OpChain.from_chain(self[op1])
-            else:
-                self[op1] = OpChain()
-
-            cached_val = tuple(getattr(op1, key) for key in kwargs.keys())
-
-            if cached_val not in cached_links:
-                cached_links[cached_val] = op1
-            
-                for attrs in other_keys.keys():
-                    if all(
-                        [
-                            func(getattr(op1, key), attrs[idx])
-                            for idx, (key, func) in enumerate(kwargs.items())
-                        ]
-                    ):      
-                        total += 1
-                        self[op1].extend(other_keys[attrs])              
-            elif len(self[op1]) != 0:
-                for op in self[cached_links[cached_val]]:
-                    cached += 1
-                    self[op1].append(op)
-
-            if len(self[op1]) == 0:
+                continue
+
+            indices = join.links(op1)
+            if not indices:
                 del self[op1]
+                continue
+            if id(indices) not in ranges:
+                ranges[id(indices)] = layer.append(indices)
+
+            start, stop = ranges[id(indices)]
+            cached_chain = self[op1] if save_links else None
+            self[op1] = OpChain(layer, start, stop, cached_chain)
 
         self.first_link = False
 
     def copy(self) -> "OpView":
-        return copy.deepcopy(self)
+        """Returns a new OpView of the same ops and links. The two share their
+        Op objects and OpChains, but filtering, linking or reducing either
+        leaves the other as it was."""
+        return self.derive(self.items())
 
     def __str__(self) -> str:
         output = ""
@@ -186,26 +313,19 @@ class OpView(Dict[Op, OpChain]):
 
         return output
 
-    def filter(self, **kwargs: Tuple[Callable, int | str]):
-        def find_bounds(filters, max_bound = 1024, min_bound = 0):
-            bounds = {}
-            
-            for key, (func, bound) in filters.items():
-                if key not in bounds:
-                    bounds[key] = [min_bound, max_bound]
-
-                if not func(bounds[key][0], bound):
-                    bounds[key][0] = bound
-                if not func(bounds[key][1], bound):
-                    bounds[key][1] = bound
-            return bounds
-        bounds = find_bounds(kwargs)
+    def filter(self, **kwargs: Tuple[Callable, int | str] | Predicate):
+        keep = filter_test(kwargs)
 
         for op in list(self.keys()):
-            if not all(
-                [getattr(op, key) >= lower and getattr(op, key) <= upper for key, (lower, upper) in bounds.items()]
-            ):
+            if not keep(op):
                 del self[op]  # will get gced later if __iter__ called again
+
+    def select(self, **kwargs: Tuple[Callable, int | str] | Predicate) -> "OpView":
+        """Returns a new OpView of the ops filter(**kwargs) would keep, and
+        their links, leaving this view as it is, as copy does"""
+        keep = filter_test(kwargs)
+
+        return self.derive((op, links) for op, links in self.items() if keep(op))
     
     def get_keys(self, keys : List[str]) -> Dict[Dict[str,int],Op]:
         res = {}
@@ -219,18 +339,56 @@ class OpView(Dict[Op, OpChain]):
 
         return res
 
-    def reduce_links(self, **kwargs: Callable):
+    def reduce_where(self, keep: Callable[[Op, Op], bool]) -> None:
+        """Keep only the links for which keep(op, link) holds, removing the
+        ops left without any. The links kept are written to one new
+        LinkLayer. Each reduce_* that decides every link on its own is this
+        with one of the *_test predicates."""
+        layers: Dict[int, LinkLayer] = {}
+
         for op in list(self.keys()):
-            for link in self[op].copy():
-                if not all(
-                    [
-                        func(getattr(op, key), getattr(link, key))
-                        for key, func in kwargs.items()
-                    ]
-                ):
-                    if not self[op].remove(link):
-                        del self[op]
-                        break
+            links = self[op]
+            ops = links.layer.ops
+            kept = [i for i in links.indices() if keep(op, ops[i])]
+            if len(kept) == len(links):
+                continue
+            if not kept:
+                del self[op]
+                continue
+
+            if id(ops) not in layers:
+                layers[id(ops)] = LinkLayer(ops)
+            layer = layers[id(ops)]
+            self[op] = OpChain(layer, *layer.append(kept), links.cached_chain)
+
+    def __replace_links(self, chains: Dict[Op, List[Op]]) -> None:
+        """Set the links of each op to those left in chains, after a
+        reduction removing them one by one, and remove the ops not in it"""
+        layer = LinkLayer([])
+        positions: Dict[Op, int] = {}
+
+        for op in list(self.keys()):
+            if op not in chains:
+                del self[op]
+            elif len(chains[op]) != len(self[op]):
+                indices = []
+                for link in chains[op]:
+                    if link not in positions:
+                        positions[link] = len(layer.ops)
+                        layer.ops.append(link)
+                    indices.append(positions[link])
+                self[op] = OpChain(
+                    layer, *layer.append(indices), self[op].cached_chain
+                )
+
+    def links_test(self, **kwargs: Callable) -> Callable[[Op, Op], bool]:
+        """Returns the predicate reduce_links keeps links by"""
+        return lambda op, link: all(
+            [func(getattr(op, key), getattr(link, key)) for key, func in kwargs.items()]
+        )
+
+    def reduce_links(self, **kwargs: Callable):
+        self.reduce_where(self.links_test(**kwargs))
 
     def filter_value(
         self, value: int, oper: Callable, def_var: bool = True, use_vi: int = None
@@ -251,6 +409,48 @@ class OpView(Dict[Op, OpChain]):
                 if any(oper(usevar.value, value))
             }
 
+    def value_test(
+        self,
+        oper: Callable,
+        self_def_var: bool = True,
+        self_use_vi: int = None,
+        link_def_var: bool = True,
+        link_use_vi: int = None,
+    ) -> Callable[[Op, Op], bool] | None:
+        """Returns the predicate reduce_value keeps links by, or None if with
+        these arguments it stops at the first link matching some used
+        variable rather than deciding each link on its own"""
+        if self_def_var and link_def_var:
+            return lambda op, link: not oper(op.def_var.value, link.def_var.value)
+        elif not self_def_var and link_def_var:
+            if self_use_vi:
+                # as before reduce_value was a reduce_where, a link the used
+                # variable keeps is also dropped unless the op's def_var
+                # matches one of the link's used variables
+                return lambda op, link: not oper(
+                    op.use_vars[self_use_vi].value, link.def_var.value
+                ) and any(
+                    oper(op.def_var.value, usevar.value) for usevar in link.use_vars
+                )
+            elif self_use_vi is not None:
+                return lambda op, link: not oper(
+                    op.use_vars[self_use_vi].value, link.def_var.value
+                )
+            return lambda op, link: True
+        elif self_def_var and not link_def_var:
+            if link_use_vi is not None:
+                return lambda op, link: not oper(
+                    op.def_var.value, link.use_vars[link_use_vi].value
+                )
+            return lambda op, link: any(
+                oper(op.def_var.value, usevar.value) for usevar in link.use_vars
+            )
+        elif link_use_vi is not None and self_use_vi is not None:
+            return lambda op, link: not oper(
+                op.use_vars[self_use_vi].value, link.use_vars[link_use_vi].value
+            )
+        return None
+
     def reduce_value(
         self,
         oper: Callable,
@@ -259,86 +459,67 @@ class OpView(Dict[Op, OpChain]):
         link_def_var: bool = True,
         link_use_vi: int = None,
     ) -> None:
-        for op in list(self.keys()):
-            for link in self[op].copy():
-                if self_def_var and link_def_var:
-                    if oper(
-                        op.def_var.value,
-                        link.def_var.value,
-                    ):
-                        if not self[op].remove(link):
-                            del self[op]
-                            break
-                elif not self_def_var and link_def_var:
-                    if self_use_vi is not None and oper(
-                        op.use_vars[self_use_vi].value, link.def_var.value
+        test = self.value_test(
+            oper, self_def_var, self_use_vi, link_def_var, link_use_vi
+        )
+        if test is not None:
+            self.reduce_where(test)
+            return
+
+        # the links are removed from lists, then stored as chains again
+        chains = {op: LinkList(links) for op, links in self.items()}
+        self.__reduce_value(chains, oper, self_use_vi, link_use_vi)
+        self.__replace_links(chains)
+
+    @staticmethod
+    def __reduce_value(
+        chains: Dict[Op, LinkList], oper: Callable, self_use_vi: int, link_use_vi: int
+    ) -> None:
+        for op in list(chains.keys()):
+            for link in chains[op].copy():
+                if self_use_vi is None and link_use_vi is not None:
+                    if any(
+                        oper(usevar.value, link.use_vars[link_use_vi].value)
+                        for usevar in op.use_vars
                     ):
-                        if not self[op].remove(link):
-                            del self[op]
+                        break
+                    else:
+                        if not chains[op].remove(link):
+                            del chains[op]
                             break
-                    elif self_use_vi:
-                        if not any(
-                            oper(op.def_var.value, usevar.value)
-                            for usevar in link.use_vars
-                        ):
-                            if not self[op].remove(link):
-                                del self[op]
-                                break
-                elif self_def_var and not link_def_var:
-                    if link_use_vi is not None and oper(
-                        op.def_var.value, link.use_vars[link_use_vi].value
+                elif self_use_vi is not None and link_use_vi is None:
+                    if any(
+                        oper(op.use_vars[self_use_vi].value, usevar.value)
+                        for usevar in link.use_vars
                     ):
-                        if not self[op].remove(link):
-                            del self[op]
+                        break
+                    else:
+                        if not chains[op].remove(link):
+                            del chains[op]
                             break
-                    elif link_use_vi is None:
-                        if not any(
-                            oper(op.def_var.value, usevar.value)
-                            for usevar in link.use_vars
-                        ):
-                            if not self[op].remove(link):
-                                del self[op]
-                                break
                 else:
-                    if link_use_vi is not None and self_use_vi is not None:
-                        if oper(
-                            op.use_vars[self_use_vi].value,
-                            link.use_vars[link_use_vi].value,
-                        ):
-                            if not self[op].remove(link):
-                                del self[op]
-                                break
-                    elif self_use_vi is None and link_use_vi is not None:
+                    for op_usevars in op.use_vars:
                         if any(
-                            oper(usevar.value, link.use_vars[link_use_vi].value)
-                            for usevar in op.use_vars
-                        ):
-                            break
-                        else:
-                            if not self[op].remove(link):
-                                del self[op]
-                                break
-                    elif self_use_vi is not None and link_use_vi is None:
-                        if any(
-                            oper(op.use_vars[self_use_vi].value, usevar.value)
+                            oper(op_usevars.value, usevar.value)
                             for usevar in link.use_vars
                         ):
                             break
                         else:
-                            if not self[op].remove(link):
-                                del self[op]
-                                break
-                    else:
-                        for op_usevars in op.use_vars:
-                            if any(
-                                oper(op_usevars.value, usevar.value)
-                                for usevar in link.use_vars
-                            ):
+                            if not chains[op].remove(link):
+                                del chains[op]
                                 break
-                            else:
-                                if not self[op].remove(link):
-                                    del self[op]
-                                    break
+
+    def descendant_test(
+        self,
+        self_def_var: bool = True,
+        self_use_vi: int = None,
+        link_def_var: bool = True,
+        link_use_vi: int = None,
+    ) -> Callable[[Op, Op], bool]:
+        """Returns the predicate reduce_descendant keeps links by"""
+        return self.__reachability_test(
+            self.__reachability().is_descendant, self_def_var, link_def_var, link_use_vi
+        )
 
     def reduce_descendant(
         self,
@@ -347,34 +528,21 @@ class OpView(Dict[Op, OpChain]):
         link_def_var: bool = True,
         link_use_vi: int = None,
     ):
-        for op in list(self.keys()):
-            if self_def_var:
-                linked_vars = op.def_var.get_descendants()
-            elif self_def_var and self_use_vi is not None:
-                linked_vars = op.use_vars[self_use_vi].get_descendants()
-            else:
-                linked_vars = [
-                    var for usevar in op.use_vars for var in usevar.get_descendants()
-                ]
-
-            for link in self[op].copy():
-                if link_def_var and link.def_var not in linked_vars:
-                    if not self[op].remove(link):
-                        del self[op]
-                        break
-                elif (
-                    not link_def_var
-                    and link_use_vi is not None
-                    and link.use_vars[link_use_vi] not in linked_vars
-                ):
-                    if not self[op].remove(link):
-                        del self[op]
-                        break
-                elif not link_def_var and link_use_vi is None:
-                    if not any([usevar in linked_vars for usevar in link.use_vars]):
-                        if not self[op].remove(link):
-                            del self[op]
-                            break
+        self.reduce_where(
+            self.descendant_test(self_def_var, self_use_vi, link_def_var, link_use_vi)
+        )
+
+    def ancestor_test(
+        self,
+        self_def_var: bool = True,
+        self_use_vi: int = None,
+        link_def_var: bool = True,
+        link_use_vi: int = None,
+    ) -> Callable[[Op, Op], bool]:
+        """Returns the predicate reduce_ancestor keeps links by"""
+        return self.__reachability_test(
+            self.__reachability().is_ancestor, self_def_var, link_def_var, link_use_vi
+        )
 
     def reduce_ancestor(
         self,
@@ -383,80 +551,129 @@ class OpView(Dict[Op, OpChain]):
         link_def_var: bool = True,
         link_use_vi: int = None,
     ) -> None:
-        for op in list(self.keys()):
+        self.reduce_where(
+            self.ancestor_test(self_def_var, self_use_vi, link_def_var, link_use_vi)
+        )
+
+    @staticmethod
+    def __reachability_test(
+        reaches: Callable, self_def_var: bool, link_def_var: bool, link_use_vi: int
+    ) -> Callable[[Op, Op], bool]:
+        def test(op: Op, link: Op) -> bool:
             if self_def_var:
-                linked_vars = op.def_var.get_ancestors()
-            elif self_def_var and self_use_vi is not None:
-                linked_vars = op.use_vars[self_use_vi].get_ancestors()
+                sources = [op.def_var]
             else:
-                linked_vars = [
-                    var for usevar in op.use_vars for var in usevar.get_ancestors()
-                ]
-
-            for link in self[op].copy():
-                if link_def_var and link.def_var not in linked_vars:
-                    if not self[op].remove(link):
-                        del self[op]
-                        break
-                elif (
-                    not link_def_var
-                    and link_use_vi is not None
-                    and link.use_vars[link_use_vi] not in linked_vars
-                ):
-                    if not self[op].remove(link):
-                        del self[op]
-                        break
-                elif not link_def_var and link_use_vi is None:
-                    if not any([usevar in linked_vars for usevar in link.use_vars]):
-                        if not self[op].remove(link):
-                            del self[op]
-                            break
+                sources = op.use_vars
+
+            if link_def_var:
+                return reaches(link.def_var, sources)
+            elif link_use_vi is not None:
+                return reaches(link.use_vars[link_use_vi], sources)
+            return any(reaches(usevar, sources) for usevar in link.use_vars)
+
+        return test
+
+    def dominator_test(
+        self, link_def_var: bool = True, link_use_vi: int = None
+    ) -> Callable[[Op, Op], bool]:
+        """Returns the predicate reduce_dominator keeps links by"""
+        index = self.__reachability()
+
+        def test(op: Op, link: Op) -> bool:
+            if link_def_var:
+                linked_vars = [link.def_var]
+            elif link_use_vi is not None:
+                linked_vars = [link.use_vars[link_use_vi]]
+            else:
+                linked_vars = link.use_vars
+
+            return all(index.dominates(op.def_var, var) for var in linked_vars)
+
+        return test
 
     def reduce_dominator(
         self, link_def_var: bool = True, link_use_vi: int = None
     ) -> None:
+        """Keep only the links computed solely from the op's def_var, that is
+        whose variables the op's def_var dominates in the def-use graph"""
+        self.reduce_where(self.dominator_test(link_def_var, link_use_vi))
+
+    def __reachability(self) -> ReachabilityIndex:
+        # views not made by an OpAnalyzer get an index of their own
+        if self.reachability is None:
+            self.reachability = ReachabilityIndex()
+        return self.reachability
+
+    def taint_test(
+        self,
+        taint: "TaintEngine",
+        link_def_var: bool = True,
+        link_use_vi: int = None,
+        strict: bool = False,
+    ) -> Callable[[Op, Op], bool]:
+        """Returns the predicate reduce_taint keeps links by"""
+
+        def test(op: Op, link: Op) -> bool:
+            if link_def_var:
+                linked_vars = [link.def_var]
+            elif link_use_vi is not None:
+                linked_vars = [link.use_vars[link_use_vi]]
+            else:
+                linked_vars = link.use_vars
+
+            bits = taint.mask(op)
+            return any(taint.taint_of(var, strict) & bits for var in linked_vars)
+
+        return test
+
+    def reduce_taint(
+        self,
+        taint: "TaintEngine",
+        link_def_var: bool = True,
+        link_use_vi: int = None,
+        strict: bool = False,
+    ) -> None:
+        """Keep only the links whose variables are tainted by the op, which
+        must be a source of taint. With strict=True, this keeps the same
+        links as reduce_descendant with self_def_var=True, for every op of
+        every source set in the one pass of the TaintEngine."""
+        self.reduce_where(self.taint_test(taint, link_def_var, link_use_vi, strict))
+
+    def filter_taint(
+        self,
+        taint: "TaintEngine",
+        source: str | Op = None,
+        def_var: bool = False,
+        use_vi: int = None,
+        strict: bool = False,
+    ) -> None:
+        """Keep only the ops whose defined variable, use_vi-th used variable,
+        or any used variable is tainted by source, or by any source if None"""
+        mask = taint.mask(source)
+
         for op in list(self.keys()):
-            op_vars = set(op.def_var.get_descendants())
-
-            for link in self[op].copy():
-                if link_def_var:
-                    linked_vars = set(link.def_var.get_ancestors(op))
-                    if linked_vars.intersection(op_vars) != linked_vars:
-                        if not self[op].remove(link):
-                            del self[op]
-                            break
-                elif link_use_vi is not None:
-                    linked_vars = set(link.use_vars[link_use_vi].get_ancestors(op))
-                    if linked_vars.intersection(op_vars) != linked_vars:
-                        if not self[op].remove(link):
-                            del self[op]
-                            break
-                else:
-                    linked_vars = set(
-                        ancestor
-                        for usevar in link.use_vars
-                        for ancestor in usevar.get_ancestors(op)
-                    )
-                    if linked_vars.intersection(op_vars) != linked_vars:
-                        if not self[op].remove(link):
-                            del self[op]
-                            break
+            if def_var:
+                op_vars = [op.def_var]
+            elif use_vi is not None:
+                op_vars = [op.use_vars[use_vi]]
+            else:
+                op_vars = op.use_vars
+
+            if not any(taint.taint_of(var, strict) & mask for var in op_vars):
+                del self[op]
 
     def filter_address(self, address: str) -> None:
         self = {
             op: self[op] for op in self.keys() if self.addresses[op.depth] == address
         }
 
-    def reduce_address(self) -> None:
-        for op in list(self.keys()):
-            op_addr = self.addresses[op.depth]
+    def address_test(self) -> Callable[[Op, Op], bool]:
+        """Returns the predicate reduce_address keeps links by"""
+        addresses = self.addresses
+        return lambda op, link: addresses[op.depth] == addresses[link.depth]
 
-            for link in self[op].copy():
-                linked_addr = self.addresses[link.depth]
-                if linked_addr != op_addr:
-                    if not self[op].remove(link):
-                        del self[op]
-                        break
+    def reduce_address(self) -> None:
+        self.reduce_where(self.address_test())
 
     def export(self, filepath=None, cached_links=False) -> None:
         if filepath is None:
@@ -470,24 +687,21 @@ class OpView(Dict[Op, OpChain]):
             return
 
         with open(filepath, "w") as f:
-            for op, links in self.items():
-                if len(links) == 0:
-                    if op.op in {"CALL", "STATICCALL", "CALLCODE", "DELEGATECALL"}:
-                        f.write(
-                            f"{op.op_index}, {op.depth}, {op.call_index}, {self.addresses[op.depth+1]}\n"
-                        )
-                    else:
-                        f.write(
-                            f"{op.op_index}, {op.depth}, {op.call_index}, {self.addresses[op.depth]}\n"
-                        )
-                elif cached_links:
-                    for clink in sorted(links.cached_chain, key=lambda c: c.op_index):
-                        for link in links:
-                            f.write(
-                                f"{op.op_index}, {clink.op_index}, {op.depth}, {op.call_index}, {link.op_index}, {link.depth}, {link.call_index}, {self.addresses[op.depth]}, {self.addresses[link.depth]}\n"
-                            )
+            f.writelines(self.__rows(cached_links))
+
+    def __rows(self, cached_links: bool) -> Iterator[str]:
+        """Yields the lines of export, one per pair of linked ops, reading
+        each chain's range of its layer as it goes"""
+        for op, links in self.items():
+            if len(links) == 0:
+                if op.op in {"CALL", "STATICCALL", "CALLCODE", "DELEGATECALL"}:
+                    yield f"{op.op_index}, {op.depth}, {op.call_index}, {self.addresses[op.depth+1]}\n"
                 else:
+                    yield f"{op.op_index}, {op.depth}, {op.call_index}, {self.addresses[op.depth]}\n"
+            elif cached_links:
+                for clink in sorted(links.cached_chain, key=lambda c: c.op_index):
                     for link in links:
-                        f.write(
-                            f"{op.op_index}, {op.depth}, {op.call_index}, {link.op_index}, {link.depth}, {link.call_index}, {self.addresses[op.depth]}, {self.addresses[link.depth]}\n"
-                        )
+                        yield f"{op.op_index}, {clink.op_index}, {op.depth}, {op.call_index}, {link.op_index}, {link.depth}, {link.call_index}, {self.addresses[op.depth]}, {self.addresses[link.depth]}\n"
+            else:
+                for link in links:
+                    yield f"{op.op_index}, {op.depth}, {op.call_index}, {link.op_index}, {link.depth}, {link.call_index}, {self.addresses[op.depth]}, {self.addresses[link.depth]}\n"
@@ -0,0 +1,165 @@
+import operator
+from typing import Any, Callable, Tuple
+
+
+class Predicate:
+    """A condition on an Op property that the analyzer can inspect, unlike
+    a lambda, so filters and joins can be planned from it.
+
+    A predicate given a value is a filter, and is called with the property
+    of one op. One given no value compares the property of a linking op
+    with that of the op linked to, as the link_ops kwargs do, and is called
+    with both. Predicates combine with & and |, or And and Or.
+
+    Examples:
+        api.get_ops('SLOAD', depth=Gt(2), call_index=Between(1, 4))
+        sload.link_ops(sstore, depth=Gt(offset=-2), op_index=Lt())
+    """
+
+    def __call__(self, x: Any, y: Any = None) -> bool:
+        raise NotImplementedError()
+
+    def mask(self, values):
+        """Returns the boolean array of which of a NumPy array of property
+        values the filter keeps"""
+        raise NotImplementedError()
+
+    def __and__(self, other: "Predicate") -> "Predicate":
+        return And(self, other)
+
+    def __or__(self, other: "Predicate") -> "Predicate":
+        return Or(self, other)
+
+    def __key(self) -> Tuple:
+        return (type(self),) + tuple(sorted(vars(self).items()))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Predicate):
+            return self.__key() == other.__key()
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.__key())
+
+
+class Compare(Predicate):
+    """Holds when the property plus offset compares by OPERATOR with value,
+    or with the linked op's property if no value is given"""
+
+    OPERATOR: Callable[[Any, Any], bool] = None
+    SYMBOL = ""
+
+    def __init__(self, value: Any = None, offset: int = 0) -> None:
+        """
+        Args:
+            value (Any, optional): the value to compare the property with,
+            if a filter.
+            offset (int, optional): added to the property of the op before
+            comparing, so Gt(offset=-2) holds when x - 2 > y.
+        """
+        self.value = value
+        self.offset = offset
+
+    @property
+    def linked(self) -> bool:
+        """Whether the predicate compares with the linked op's property"""
+        return self.value is None
+
+    def __call__(self, x: Any, y: Any = None) -> bool:
+        if self.offset:
+            x = x + self.offset
+        if self.linked:
+            return self.OPERATOR(x, y)
+        return self.OPERATOR(x, self.value)
+
+    def mask(self, values):
+        if self.linked:
+            raise ValueError(f"{self} compares with a linked op, so cannot filter")
+        return self.OPERATOR(values + self.offset, self.value)
+
+    def __repr__(self) -> str:
+        x = f"x + {self.offset}" if self.offset else "x"
+        y = "y" if self.linked else repr(self.value)
+        return f"{x} {self.SYMBOL} {y}"
+
+
+class Eq(Compare):
+    OPERATOR = operator.eq
+    SYMBOL = "=="
+
+
+class Lt(Compare):
+    OPERATOR = operator.lt
+    SYMBOL = "<"
+
+
+class Le(Compare):
+    OPERATOR = operator.le
+    SYMBOL = "<="
+
+
+class Gt(Compare):
+    OPERATOR = operator.gt
+    SYMBOL = ">"
+
+
+class Ge(Compare):
+    OPERATOR = operator.ge
+    SYMBOL = ">="
+
+
+class And(Predicate):
+    """Holds when all of its predicates hold"""
+
+    def __init__(self, *predicates: Predicate) -> None:
+        self.predicates = predicates
+
+    def __call__(self, x: Any, y: Any = None) -> bool:
+        return all(predicate(x, y) for predicate in self.predicates)
+
+    def mask(self, values):
+        masks = [predicate.mask(values) for predicate in self.predicates]
+        result = masks[0]
+        for mask in masks[1:]:
+            result = result & mask
+        return result
+
+    def __repr__(self) -> str:
+        return "(" + " and ".join(map(repr, self.predicates)) + ")"
+
+
+class Or(Predicate):
+    """Holds when any of its predicates holds"""
+
+    def __init__(self, *predicates: Predicate) -> None:
+        self.predicates = predicates
+
+    def __call__(self, x: Any, y: Any = None) -> bool:
+        return any(predicate(x, y) for predicate in self.predicates)
+
+    def mask(self, values):
+        masks = [predicate.mask(values) for predicate in self.predicates]
+        result = masks[0]
+        for mask in masks[1:]:
+            result = result | mask
+        return result
+
+    def __repr__(self) -> str:
+        return "(" + " or ".join(map(repr, self.predicates)) + ")"
+
+
+class Between(And):
+    """Holds when the property plus offset is within the inclusive range
+    [lower, upper]"""
+
+    def __init__(self, lower: Any, upper: Any, offset: int = 0) -> None:
+        super().__init__(Ge(lower, offset), Le(upper, offset))
+
+
+def conjuncts(predicate: Callable) -> Tuple[Callable, ...]:
+    """Returns the predicates that must all hold for predicate to hold"""
+    if isinstance(predicate, And):
+        return tuple(
+            part for member in predicate.predicates for part in conjuncts(member)
+        )
+    return (predicate,)
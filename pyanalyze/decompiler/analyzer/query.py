@@ -0,0 +1,462 @@
+from collections import namedtuple
+from inspect import signature
+from itertools import islice
+import operator
+from typing import Any, Callable, List, Optional, Tuple
+
+from decompiler.analyzer.join import LinkJoin
+from decompiler.analyzer.op import Op, OpView
+from decompiler.analyzer.predicate import Predicate
+
+Step = namedtuple("Step", ["method", "args", "kwargs"])
+"""One OpView call recorded by a Query."""
+
+FILTERS = {"filter", "filter_value", "filter_taint", "filter_address"}
+"""The calls keeping or dropping each op on its own, whatever it links to,
+which a Query runs before any link_ops."""
+
+TESTS = {
+    "reduce_links": "links_test",
+    "reduce_value": "value_test",
+    "reduce_descendant": "descendant_test",
+    "reduce_ancestor": "ancestor_test",
+    "reduce_dominator": "dominator_test",
+    "reduce_taint": "taint_test",
+    "reduce_address": "address_test",
+}
+"""The OpView method returning the predicate each reduction keeps links by,
+if it decides every link on its own."""
+
+COMPARISONS = {
+    operator.eq,
+    operator.ne,
+    operator.lt,
+    operator.le,
+    operator.gt,
+    operator.ge,
+}
+"""The operator functions reduce_value and reduce_links may compare values
+by that are known to be pure."""
+
+TEST_COSTS = {"key": 1, "predicate": 2, "index": 4}
+"""The cost of calling the predicate of a reduction on a link, by kind: a
+comparison of one value of each op, Predicates or comparisons of their
+properties, and a lookup in the reachability index of the variables."""
+
+SAMPLE_LINKS = 64
+"""The number of links the drops of each predicate are counted on to order
+a reduction."""
+
+Stage = Callable[[OpView], None]
+"""One step of a compiled Query, run on a view of a single op by first."""
+
+
+class Query:
+    """The OpView calls of a heuristic on the ops of one opcode, recorded as
+    they are made and run together once the result is first needed, by run
+    or export. Each call has the meaning it has on an OpView, but the chain
+    is planned as a whole:
+
+    - filter, filter_value, filter_taint and filter_address run first, so
+    link_ops only joins the ops they keep.
+    - reduce_address, and reduce_value with operator.ne on one variable of
+    each op, directly following a link_ops are hashed into its join, rather
+    than making every link and then dropping most of them.
+    - Each run of reductions deciding every link on its own is done in one
+    pass. Predicates comparing values or properties, or reading the
+    reachability index, are called in order of their fixed cost per link
+    dropped on a sample of links; those calling any other callable keep
+    their place.
+    - Once no ops are left, the remaining calls are skipped, and so are the
+    queries they link to.
+
+    first and exists instead run every call on one op at a time, stopping at
+    the first op left with links, for heuristics where any match will do.
+
+    Examples:
+        sload = api.query('SLOAD', depth=(operator.gt, 2))
+        sload.link_ops(api.query('SSTORE'), op_index=operator.lt)
+        sload.reduce_address()
+        sload.export('./reentrancy.csv')
+    """
+
+    def __init__(self, analyzer: "OpAnalyzer", opcode: str, **kwargs) -> None:
+        """Start a query of the ops analyzer.get_ops(opcode, **kwargs) returns
+
+        Args:
+            analyzer (OpAnalyzer): the analyzer whose ops to query
+            opcode (str): the opcode of the ops
+        """
+        self.analyzer = analyzer
+        self.opcode = opcode
+        self.kwargs = kwargs
+
+        self.steps: List[Step] = []
+        self.result: OpView = None
+
+    def __record(self, method: str, *args, **kwargs) -> "Query":
+        if self.result is not None:
+            raise ValueError(f"Query of {self.opcode} ops has already run")
+        self.steps.append(Step(method, args, kwargs))
+        return self
+
+    def filter(self, **kwargs: Tuple[Callable, int] | Predicate) -> "Query":
+        return self.__record("filter", **kwargs)
+
+    def filter_value(self, *args, **kwargs) -> "Query":
+        return self.__record("filter_value", *args, **kwargs)
+
+    def filter_taint(self, *args, **kwargs) -> "Query":
+        return self.__record("filter_taint", *args, **kwargs)
+
+    def filter_address(self, address: str) -> "Query":
+        return self.__record("filter_address", address)
+
+    def link_ops(
+        self, other: "Query | OpView", save_links: bool = False, **kwargs: Callable
+    ) -> "Query":
+        """Records OpView.link_ops, to the result of other if it is a Query,
+        as of this call: calls recorded on other later do not change it"""
+        if isinstance(other, Query):
+            other = other.__snapshot()
+        return self.__record("link_ops", other, save_links=save_links, **kwargs)
+
+    def __snapshot(self) -> "Query":
+        """Returns a Query of the calls recorded so far, which is not changed
+        by calls recorded on this one after"""
+        snapshot = Query(self.analyzer, self.opcode, **self.kwargs)
+        snapshot.steps = list(self.steps)
+        snapshot.result = self.result
+        return snapshot
+
+    def reduce_links(self, **kwargs: Callable) -> "Query":
+        return self.__record("reduce_links", **kwargs)
+
+    def reduce_value(self, *args, **kwargs) -> "Query":
+        return self.__record("reduce_value", *args, **kwargs)
+
+    def reduce_descendant(self, *args, **kwargs) -> "Query":
+        return self.__record("reduce_descendant", *args, **kwargs)
+
+    def reduce_ancestor(self, *args, **kwargs) -> "Query":
+        return self.__record("reduce_ancestor", *args, **kwargs)
+
+    def reduce_dominator(self, *args, **kwargs) -> "Query":
+        return self.__record("reduce_dominator", *args, **kwargs)
+
+    def reduce_taint(self, *args, **kwargs) -> "Query":
+        return self.__record("reduce_taint", *args, **kwargs)
+
+    def reduce_address(self) -> "Query":
+        return self.__record("reduce_address")
+
+    def plan(self) -> List[Step]:
+        """Returns the recorded calls in the order they run: the filters,
+        then the link_ops and reductions, each in the order they were made"""
+        filters = [step for step in self.steps if step.method in FILTERS]
+        return filters + [step for step in self.steps if step.method not in FILTERS]
+
+    def run(self) -> OpView:
+        """Runs the query the first time it is called
+
+        Returns:
+            OpView: the ops left and their links, as from the OpView calls
+        """
+        if self.result is None:
+            self.result = self.__execute()
+        return self.result
+
+    def export(self, filepath=None, cached_links=False) -> None:
+        self.run().export(filepath, cached_links)
+
+    def first(self) -> OpView:
+        """Runs the calls on each op in turn, stopping at the first op they
+        leave with links. The joins of link_ops are built once and shared by
+        every op, and the reductions following each are ordered by cost per
+        link dropped once enough links have reached them. Errors that run
+        would raise for ops after the one found are not raised.
+
+        Returns:
+            OpView: the first op run would return and its links, or no ops
+            if run would return none
+        """
+        if self.result is not None:
+            return self.result.derive(islice(self.result.items(), 1))
+        view, stages, joins = self.__compile()
+        if any(len(join.ops) == 0 for join in joins):
+            # every op is left without links by this link_ops
+            return view.derive(())
+
+        for op, links in view.items():
+            witness = view.derive([(op, links)])
+            for stage in stages:
+                stage(witness)
+                if len(witness) == 0:
+                    break
+            else:
+                return witness
+        return view.derive(())
+
+    def exists(self) -> bool:
+        """Returns whether run would leave any ops, running the calls one op
+        at a time as first does"""
+        return len(self.first()) != 0
+
+    def __execute(self) -> OpView:
+        view = self.analyzer.get_ops(self.opcode, **self.kwargs)
+        steps = self.plan()
+
+        i = 0
+        while i < len(steps) and len(view) != 0:
+            step = steps[i]
+            if step.method == "link_ops":
+                tests, i = self.__reductions(view, steps, i + 1)
+                join, save_links, tests = self.__link(view, step, tests)
+                view.link_join(join, save_links)
+            else:
+                tests, i = self.__reductions(view, steps, i)
+                if not tests:
+                    getattr(view, step.method)(*step.args, **step.kwargs)
+                    i += 1
+                    continue
+
+            if tests and len(view) != 0:
+                view.reduce_where(order_tests(view, tests))
+
+        return view
+
+    def __compile(self) -> Tuple[OpView, List[Stage], List[LinkJoin]]:
+        """Returns the ops left by the filters, the stages first runs on each
+        of them, and the joins of the link_ops among those stages"""
+        view = self.analyzer.get_ops(self.opcode, **self.kwargs)
+        steps = self.plan()
+        stages: List[Stage] = []
+        joins: List[LinkJoin] = []
+
+        i = 0
+        while i < len(steps):
+            step = steps[i]
+            if step.method in FILTERS:
+                getattr(view, step.method)(*step.args, **step.kwargs)
+                i += 1
+                continue
+
+            if step.method == "link_ops":
+                tests, i = self.__reductions(view, steps, i + 1)
+                join, save_links, tests = self.__link(view, step, tests)
+                stages.append(
+                    lambda witness, join=join, save_links=save_links: witness.link_join(
+                        join, save_links
+                    )
+                )
+                joins.append(join)
+            else:
+                tests, i = self.__reductions(view, steps, i)
+                if not tests:
+                    stages.append(
+                        lambda witness, step=step: getattr(witness, step.method)(
+                            *step.args, **step.kwargs
+                        )
+                    )
+                    i += 1
+                    continue
+
+            if tests:
+                stages.append(reduction_stage(tests))
+
+        return view, stages, joins
+
+    @staticmethod
+    def __reductions(
+        view: OpView, steps: List[Step], i: int
+    ) -> Tuple[List[Tuple[Step, Callable]], int]:
+        """Returns the predicates of the reductions from steps[i] on that
+        decide each link on their own, and the index of the step after"""
+        tests = []
+        while i < len(steps) and steps[i].method in TESTS:
+            step = steps[i]
+            test = getattr(view, TESTS[step.method])(*step.args, **step.kwargs)
+            if test is None:
+                break
+            tests.append((step, test))
+            i += 1
+        return tests, i
+
+    def __link(
+        self, view: OpView, step: Step, tests: List[Tuple[Step, Callable]]
+    ) -> Tuple[LinkJoin, bool, List[Tuple[Step, Callable]]]:
+        """Returns the join of a link_ops step, hashing as many of the
+        reductions that follow it into the join as it can, whether it saves
+        links, and the reductions left"""
+        (other,) = step.args
+        kwargs = dict(step.kwargs)
+        save_links = kwargs.pop("save_links", False)
+        if isinstance(other, Query):
+            other = other.run()
+
+        equal_on = list(kwargs.pop("equal_on", ()))
+        while tests:
+            keys = equal_keys(view, other, tests[0][0])
+            if keys is None:
+                break
+            equal_on.append(keys)
+            tests = tests[1:]
+
+        return LinkJoin(other, kwargs, equal_on), save_links, tests
+
+
+def equal_keys(
+    view: OpView, other: OpView, step: Step
+) -> Optional[Tuple[Callable[[Op], Any], Callable[[Op], Any]]]:
+    """Returns the functions of an op of view and of its link from other
+    whose results are equal exactly for the links step keeps, if step
+    compares one value of each for equality and it can be read from every
+    op, so that link_ops can hash on it instead. The values are addresses,
+    or variable values, which are ints or None, so always hashable."""
+    if step.method == "reduce_address":
+        addresses = view.addresses
+        key = linked_key = lambda op: addresses[op.depth]
+        readable = linked_readable = lambda op: op.depth in addresses
+    elif step.method == "reduce_value":
+        args = signature(OpView.reduce_value).bind(view, *step.args, **step.kwargs)
+        args.apply_defaults()
+        args = args.arguments
+        if args["oper"] is not operator.ne:
+            return None
+        if not args["self_def_var"] and args["link_def_var"] and args["self_use_vi"]:
+            # the link's used variables are compared as well
+            return None
+
+        keys = value_key(args["self_def_var"], args["self_use_vi"])
+        linked_keys = value_key(args["link_def_var"], args["link_use_vi"])
+        if keys is None or linked_keys is None:
+            return None
+        key, readable = keys
+        linked_key, linked_readable = linked_keys
+    else:
+        return None
+
+    if not (all(map(readable, view)) and all(map(linked_readable, other))):
+        return None
+    return key, linked_key
+
+
+def value_key(
+    def_var: bool, use_vi: int
+) -> Optional[Tuple[Callable[[Op], Any], Callable[[Op], bool]]]:
+    """Returns the function reading the value reduce_value compares of an
+    op, given its def_var and use_vi arguments for that op, and the function
+    of whether an op has the variable it reads"""
+    if def_var:
+        return lambda op: op.def_var.value, lambda op: op.def_var is not None
+    elif use_vi is not None:
+        return (
+            lambda op: op.use_vars[use_vi].value,
+            lambda op: -len(op.use_vars) <= use_vi < len(op.use_vars)
+            and op.use_vars[use_vi] is not None,
+        )
+    return None
+
+
+def test_kind(step: Step) -> Optional[str]:
+    """Returns the kind of TEST_COSTS the predicate of a reduction is, or
+    None if it calls a callable given to the reduction, which may not be
+    pure and so is only ever called in the order the reductions were made"""
+    if step.method == "reduce_address":
+        return "key"
+    elif step.method == "reduce_value":
+        args = signature(OpView.reduce_value).bind(None, *step.args, **step.kwargs)
+        return "key" if args.arguments["oper"] in COMPARISONS else None
+    elif step.method == "reduce_links":
+        if all(
+            isinstance(func, Predicate) or func in COMPARISONS
+            for func in step.kwargs.values()
+        ):
+            return "predicate"
+        return None
+    elif step.method in ("reduce_descendant", "reduce_ancestor", "reduce_dominator"):
+        return "index"
+    return None
+
+
+def order_tests(view: OpView, tests: List[Tuple[Step, Callable]]) -> Callable:
+    """Returns a predicate keeping the links that all tests keep, calling
+    each run of pure tests in the order rank_tests gives on a sample of
+    view's links"""
+    if not any(
+        test_kind(step) and test_kind(next_step)
+        for (step, _), (next_step, _) in zip(tests, tests[1:])
+    ):
+        return in_order([test for _, test in tests])
+
+    links = sum(len(chain) for chain in view.values())
+    stride = max(1, links // SAMPLE_LINKS)
+    sample = list(
+        islice(
+            ((op, link) for op, chain in view.items() for link in chain),
+            0,
+            None,
+            stride,
+        )
+    )
+    return rank_tests(sample, tests)
+
+
+def rank_tests(
+    sample: List[Tuple[Op, Op]], tests: List[Tuple[Step, Callable]]
+) -> Callable[[Op, Op], bool]:
+    """Returns a predicate keeping the links that all tests keep, as
+    order_tests does. Each run of pure tests is ordered by the cost of its
+    kind times the links it is called on per link it drops, on the links of
+    the sample kept by the pure tests made before it. Tests calling an opaque
+    callable are neither called on the sample nor moved, and no test is
+    moved past one."""
+    order: List[Callable[[Op, Op], bool]] = []
+    run: List[Tuple[float, int, Callable[[Op, Op], bool]]] = []
+    for i, (step, test) in enumerate(tests):
+        kind = test_kind(step)
+        if kind is None:
+            order.extend(test for _, _, test in sorted(run))
+            order.append(test)
+            run = []
+            continue
+
+        seen = len(sample)
+        sample = [(op, link) for op, link in sample if test(op, link)]
+        dropped = seen - len(sample)
+        rank = TEST_COSTS[kind] * seen / dropped if dropped else float("inf")
+        run.append((rank, i, test))
+    order.extend(test for _, _, test in sorted(run))
+
+    return in_order(order)
+
+
+def in_order(tests: List[Callable[[Op, Op], bool]]) -> Callable[[Op, Op], bool]:
+    """Returns a predicate calling tests in the given order"""
+    if len(tests) == 1:
+        return tests[0]
+    return lambda op, link: all(test(op, link) for test in tests)
+
+
+def reduction_stage(tests: List[Tuple[Step, Callable]]) -> Stage:
+    """Returns the stage reducing each view first runs it on to the links
+    that all tests keep. The tests are called in the order the reductions
+    were made in until SAMPLE_LINKS links have reached the stage, then in
+    the order rank_tests gives on those links."""
+    sample: List[Tuple[Op, Op]] = []
+    ordered: List[Callable[[Op, Op], bool]] = []
+    written = in_order([test for _, test in tests])
+
+    def reduce(witness: OpView) -> None:
+        if not ordered:
+            sample.extend(
+                islice(
+                    ((op, link) for op, chain in witness.items() for link in chain),
+                    SAMPLE_LINKS - len(sample),
+                )
+            )
+            if len(sample) >= SAMPLE_LINKS or len(tests) == 1:
+                ordered.append(rank_tests(sample, tests))
+        witness.reduce_where(ordered[0] if ordered else written)
+
+    return reduce
@@ -0,0 +1,332 @@
+from bisect import bisect_right
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from decompiler.analyzer.variable import Variable
+
+
+MAX_INTERVALS = 64
+"""The most intervals of positions a variable's ancestors are labelled
+with. The ancestors of a variable needing more are found by searching back
+from it to the labelled variables before it."""
+
+
+class ReachabilityIndex:
+    """Answers whether one Variable of a transaction is an ancestor or
+    descendant of another in its def-use graph, without walking the graph
+    again for every query.
+
+    The def-use graph is acyclic, so the variables of each connected part
+    of it are put in the post-order of a depth first search back along
+    their preds, which is topological, and the ancestors of every variable
+    are found in one pass in that order, as the sorted intervals of their
+    positions: the union of its predecessors' intervals and positions. The
+    search puts the ancestors a variable does not share with the variables
+    before it right before it, so a chain of variables, such as a loop
+    counter, and a tree are labelled with one interval each. This is done
+    once per connected part, the first time one of its variables is asked
+    about, and every later query is a binary search. A variable whose
+    ancestors would take more than MAX_INTERVALS intervals is left
+    unlabelled, and queries on it search back to the labelled variables
+    before it. Creating an index that is never queried costs nothing.
+
+    Dominance is answered from the dominator tree of the graph, built in
+    one pass over each connected part of it the first time one of its
+    variables is asked about, and numbered so that every query is two
+    comparisons.
+    """
+
+    def __init__(self) -> None:
+        # the label of each variable: its connected part, its position in
+        # that part's order, and the bounds of the intervals of its
+        # ancestors' positions, each start followed by its end, or None if
+        # there are more than MAX_INTERVALS
+        self.__labels: Dict[str, Tuple[int, int, Optional[Tuple[int, ...]]]] = {}
+        self.__components: List[List[Variable]] = []
+
+        # the pre- and post-order numbers of each variable in its dominator
+        # tree, numbered a connected component of the graph at a time
+        self.__intervals: Dict[str, Tuple[int, int]] = {}
+        self.__count = 0
+
+    def descendants(self, var: Optional[Variable]) -> FrozenSet[str]:
+        """Returns the symbols of all descendants of var, excluding var"""
+        if var is None:
+            return frozenset()
+        component, position, _ = self.__label(var)
+        return frozenset(
+            node.symbol
+            for node in self.__components[component][position + 1 :]
+            if self.__reaches(position, node)
+        )
+
+    def ancestors(self, var: Optional[Variable]) -> FrozenSet[str]:
+        """Returns the symbols of all ancestors of var, excluding var"""
+        if var is None:
+            return frozenset()
+        component, _, bounds = self.__label(var)
+        order = self.__components[component]
+        if bounds is not None:
+            return frozenset(
+                order[position].symbol
+                for start, end in zip(bounds[::2], bounds[1::2])
+                for position in range(start, end)
+            )
+
+        symbols = set()
+        stack = [var]
+        while stack:
+            for pred in stack.pop().preds:
+                if pred is not None and pred.symbol not in symbols:
+                    symbols.add(pred.symbol)
+                    if self.__labels[pred.symbol][2] is None:
+                        stack.append(pred)
+                    else:
+                        symbols |= self.ancestors(pred)
+        return frozenset(symbols)
+
+    def is_descendant(
+        self, var: Optional[Variable], sources: Iterable[Optional[Variable]]
+    ) -> bool:
+        """Return true if var is a descendant of any Variable in sources
+
+        Args:
+            var (Variable): the Variable that may be a descendant.
+            sources (Iterable[Variable]): the Variables that may be its
+            ancestors.
+
+        Returns:
+            bool: whether var is a descendant of any of sources
+        """
+        if var is None:
+            return False
+        component = self.__label(var)[0]
+        for source in sources:
+            if source is None:
+                continue
+            source_component, position, _ = self.__label(source)
+            if source_component == component and self.__reaches(position, var):
+                return True
+        return False
+
+    def is_ancestor(
+        self, var: Optional[Variable], sources: Iterable[Optional[Variable]]
+    ) -> bool:
+        """Return true if var is an ancestor of any Variable in sources
+
+        Args:
+            var (Variable): the Variable that may be an ancestor.
+            sources (Iterable[Variable]): the Variables that may be its
+            descendants.
+
+        Returns:
+            bool: whether var is an ancestor of any of sources
+        """
+        if var is None:
+            return False
+        component, position, _ = self.__label(var)
+        for source in sources:
+            if source is None:
+                continue
+            if self.__label(source)[0] == component and self.__reaches(
+                position, source
+            ):
+                return True
+        return False
+
+    def __reaches(self, position: int, var: Variable) -> bool:
+        """Returns true if the variable at position is an ancestor of var, in
+        the same connected part"""
+        _, var_position, bounds = self.__labels[var.symbol]
+        if position >= var_position:
+            return False
+        if bounds is not None:
+            return bisect_right(bounds, position) % 2 == 1
+
+        # ancestors precede their descendants, so the search stops at
+        # variables before position, and at labelled ones
+        seen = {var.symbol}
+        stack = [var]
+        while stack:
+            for pred in stack.pop().preds:
+                if pred is None or pred.symbol in seen:
+                    continue
+                seen.add(pred.symbol)
+                _, pred_position, pred_bounds = self.__labels[pred.symbol]
+                if pred_position == position:
+                    return True
+                elif pred_position < position:
+                    continue
+                elif pred_bounds is None:
+                    stack.append(pred)
+                elif bisect_right(pred_bounds, position) % 2 == 1:
+                    return True
+        return False
+
+    def __label(self, var: Variable) -> Tuple[int, int, Optional[Tuple[int, ...]]]:
+        if var.symbol not in self.__labels:
+            self.__label_component(var)
+        return self.__labels[var.symbol]
+
+    def __label_component(self, var: Variable) -> None:
+        """Label every variable connected to var with its position in their
+        order and the intervals of its ancestors' positions, in one pass in
+        that order"""
+        component = len(self.__components)
+        order = self.__postorder_component(var)
+        self.__components.append(order)
+
+        labels = self.__labels
+        for i, node in enumerate(order):
+            intervals = []
+            for pred in node.preds:
+                if pred is None:
+                    continue
+                _, j, bounds = labels[pred.symbol]
+                if bounds is None:
+                    intervals = None
+                    break
+                intervals.append((j, j + 1))
+                intervals.extend(zip(bounds[::2], bounds[1::2]))
+
+            bounds = None
+            if intervals is not None:
+                merged: List[List[int]] = []
+                for start, end in sorted(intervals):
+                    if merged and start <= merged[-1][1]:
+                        merged[-1][1] = max(merged[-1][1], end)
+                    else:
+                        merged.append([start, end])
+                if len(merged) <= MAX_INTERVALS:
+                    bounds = tuple(bound for interval in merged for bound in interval)
+            labels[node.symbol] = (component, i, bounds)
+
+    def dominates(self, var: Optional[Variable], target: Optional[Variable]) -> bool:
+        """Return true if every path through the def-use graph into target
+        passes through var, so target is computed only from var and values
+        derived from it. A variable dominates itself.
+
+        Args:
+            var (Variable): the possible dominator.
+            target (Variable): the Variable that may be dominated.
+
+        Returns:
+            bool: whether var dominates target
+        """
+        if var is None or target is None:
+            return False
+        if var.symbol == target.symbol:
+            return True
+
+        var_pre, var_post = self.__interval(var)
+        target_pre, target_post = self.__interval(target)
+        return var_pre < target_pre and target_post < var_post
+
+    def __interval(self, var: Variable) -> Tuple[int, int]:
+        if var.symbol not in self.__intervals:
+            self.__number_component(var)
+        return self.__intervals[var.symbol]
+
+    def __number_component(self, var: Variable) -> None:
+        """Number every variable connected to var by the pre- and post-order
+        of a depth first search of their dominator tree, whose root stands
+        for the inputs of the transaction: it precedes every variable with
+        no predecessors, or one whose value was never defined. A variable
+        dominates another exactly when its interval encloses the other's."""
+        order = self.__topological_component(var)
+
+        # the immediate dominator of each variable is the nearest common
+        # dominator of its predecessors, found by walking up from each
+        # towards the earlier variables in topological order
+        position = {node.symbol: i for i, node in enumerate(order)}
+        position[None] = -1
+        idom: Dict[str, Optional[str]] = {}
+        for node in order:
+            dominator = None
+            for i, pred in enumerate(node.preds):
+                if pred is None:
+                    dominator = None
+                    break
+                if i == 0:
+                    dominator = pred.symbol
+                    continue
+                other = pred.symbol
+                while dominator != other:
+                    while position[dominator] > position[other]:
+                        dominator = idom[dominator]
+                    while position[other] > position[dominator]:
+                        other = idom[other]
+            idom[node.symbol] = dominator
+
+        children: Dict[Optional[str], List[str]] = {}
+        for node in order:
+            children.setdefault(idom[node.symbol], []).append(node.symbol)
+
+        # search down from each variable the root dominates directly
+        stack = [(symbol, False) for symbol in reversed(children.get(None, []))]
+        while stack:
+            symbol, done = stack.pop()
+            if done:
+                self.__intervals[symbol] = (self.__intervals[symbol], self.__count)
+                self.__count += 1
+                continue
+            self.__intervals[symbol] = self.__count
+            self.__count += 1
+            stack.append((symbol, True))
+            stack.extend((child, False) for child in reversed(children.get(symbol, [])))
+
+    @staticmethod
+    def __topological_component(var: Variable) -> List[Variable]:
+        """Returns every variable connected to var, in topological order"""
+        component = {var.symbol: var}
+        stack = [var]
+        while stack:
+            node = stack.pop()
+            for other in node.preds + node.succs:
+                if other is not None and other.symbol not in component:
+                    component[other.symbol] = other
+                    stack.append(other)
+
+        # with each predecessor counted as often as it is used
+        waiting = {
+            symbol: sum(pred is not None for pred in node.preds)
+            for symbol, node in component.items()
+        }
+        order = [node for symbol, node in component.items() if waiting[symbol] == 0]
+        for node in order:
+            for succ in node.succs:
+                waiting[succ.symbol] -= 1
+                if waiting[succ.symbol] == 0:
+                    order.append(succ)
+        return order
+
+    @staticmethod
+    def __postorder_component(var: Variable) -> List[Variable]:
+        """Returns every variable connected to var, in the post-order of a
+        depth first search back along the preds of each, from each variable
+        without succs in turn, and then from any variable not yet reached"""
+        component = [var]
+        found = {var.symbol}
+        for node in component:
+            for other in node.preds + node.succs:
+                if other is not None and other.symbol not in found:
+                    found.add(other.symbol)
+                    component.append(other)
+
+        order = []
+        seen = set()
+        for root in [node for node in component if not node.succs] + component:
+            if root.symbol in seen:
+                continue
+            seen.add(root.symbol)
+            stack = [(root, iter(root.preds))]
+            while stack:
+                node, preds = stack[-1]
+                for pred in preds:
+                    if pred is not None and pred.symbol not in seen:
+                        seen.add(pred.symbol)
+                        stack.append((pred, iter(pred.preds)))
+                        break
+                else:
+                    stack.pop()
+                    order.append(node)
+        return order
@@ -0,0 +1,127 @@
+from typing import Dict, Iterable, List, Optional
+
+from decompiler.analyzer.op import Op, OpView
+from decompiler.analyzer.variable import Variable
+
+
+class TaintEngine:
+    """Propagates taint from chosen source ops forward through the def-use
+    graph of a transaction, answering whether the value defined by any
+    source flows into any variable.
+
+    Each source op is given a bit, and each named set of sources the mask of
+    its ops' bits. The taint of a variable is the bitset of the sources it
+    is derived from, including the source defining it, if any. Variables are
+    defined in op_index order, which is a topological order of the graph, so
+    every variable's taint is final once reached, and a single pass pushing
+    it on to its successors taints the whole transaction. Looking up the
+    taint of any op's operands is then constant time.
+    """
+
+    def __init__(self, variables: Iterable[Variable], **sources: OpView) -> None:
+        """Taint every variable derived from the given sources
+
+        Args:
+            variables (Iterable[Variable]): every Variable of the transaction,
+            in the order they were defined.
+            **sources (OpView): the named sets of source ops, for instance
+            timestamp=api.get_ops("TIMESTAMP"). Every source op must define
+            a variable.
+        """
+        # the source op of each bit, in bit order
+        self.ops: List[Op] = []
+
+        # the bits of each named set of sources
+        self.masks: Dict[str, int] = {}
+
+        # the bits of each source op, for ops in more than one set
+        self.op_bits: Dict[Op, int] = {}
+
+        # the bits of the sources defining each variable
+        self.seeds: Dict[str, int] = {}
+
+        for name, view in sources.items():
+            mask = 0
+            for op in sorted(view, key=lambda op: op.op_index):
+                if op.def_var is None:
+                    raise ValueError(f"Taint source {op} does not define a variable")
+
+                bit = 1 << len(self.ops)
+                self.ops.append(op)
+                mask |= bit
+                self.op_bits[op] = self.op_bits.get(op, 0) | bit
+                self.seeds[op.def_var.symbol] = (
+                    self.seeds.get(op.def_var.symbol, 0) | bit
+                )
+            self.masks[name] = mask
+
+        # the taint of each tainted variable, by symbol
+        self.taint: Dict[str, int] = dict(self.seeds)
+
+        taint = self.taint
+        for var in variables:
+            bits = taint.get(var.symbol)
+            if bits:
+                for succ in var.succs:
+                    taint[succ.symbol] = taint.get(succ.symbol, 0) | bits
+
+    def taint_of(self, var: Optional[Variable], strict: bool = False) -> int:
+        """Returns the bitset of the sources var is derived from
+
+        Args:
+            var (Variable): the Variable to look up.
+            strict (bool, optional): if True, a source only taints the
+            variables derived from the one it defines, like
+            Variable.get_descendants, and not that variable itself.
+
+        Returns:
+            int: the bits of the sources var is derived from
+        """
+        if var is None:
+            return 0
+
+        bits = self.taint.get(var.symbol, 0)
+        if strict:
+            # the graph is acyclic, so a variable never inherits its own seed
+            bits &= ~self.seeds.get(var.symbol, 0)
+        return bits
+
+    def is_tainted(
+        self,
+        var: Optional[Variable],
+        source: Optional[str | Op] = None,
+        strict: bool = False,
+    ) -> bool:
+        """Return true if var is derived from the given source
+
+        Args:
+            var (Variable): the Variable to look up.
+            source (str | Op, optional): the name of a set of sources, or a
+            single source op. If None, any source taints var.
+            strict (bool, optional): as in taint_of.
+
+        Returns:
+            bool: whether var is derived from source
+        """
+        return bool(self.taint_of(var, strict) & self.mask(source))
+
+    def mask(self, source: Optional[str | Op] = None) -> int:
+        """Returns the bits of the named set of sources, or of the single
+        source op, or of all sources if None"""
+        if source is None:
+            return (1 << len(self.ops)) - 1
+        if isinstance(source, Op):
+            if source not in self.op_bits:
+                raise ValueError(f"{source} is not a taint source")
+            return self.op_bits[source]
+        if source not in self.masks:
+            raise ValueError(f"No taint sources named {source}")
+        return self.masks[source]
+
+    def sources_of(
+        self, var: Optional[Variable], source: Optional[str] = None
+    ) -> List[Op]:
+        """Returns the source ops var is derived from, in op_index order
+        within each named set"""
+        bits = self.taint_of(var) & self.mask(source)
+        return [op for i, op in enumerate(self.ops) if bits >> i & 1]
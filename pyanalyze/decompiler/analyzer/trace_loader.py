@@ -0,0 +1,244 @@
+import functools
+from typing import Callable, Dict, List, Optional, Tuple
+
+import decompiler.evm_cfg as evm_cfg
+import decompiler.memtypes as mem
+import decompiler.opcodes as opcodes
+import decompiler.tac_cfg as tac_cfg
+from decompiler.analyzer.op import Op, OpView
+from decompiler.analyzer.variable import Variable
+
+UNKNOWN = (None, None)
+"""The stack entry of a value from below the bottom of a frame's stack."""
+
+
+class ValueStack(mem.TraceStack):
+    """A TraceStack of (Variable, value) entries, the variable holding the
+    value, or None for a value that is not known"""
+
+    __slots__ = ()
+
+    @classmethod
+    def metavar(cls, n: int) -> Tuple[Optional[Variable], Optional[int]]:
+        return UNKNOWN
+
+
+class TraceLoader:
+    """Loads the ops and variables of an OpAnalyzer straight from a parsed op
+    trace, in one pass, giving the same Ops and Variables as
+    OpAnalyzer.__load__ does from the TACGraph of the trace.
+
+    No EVMOps, TAC blocks, TAC operations or mem.Variables are made. The
+    stack of each frame only holds the Variable and value of each word, as
+    far as needed to link defs to uses and fold arithmetic, and memory and
+    storage are not folded at all, as no Op or Variable reads them.
+    """
+
+    def __init__(self, to_addr: str) -> None:
+        """
+        Args:
+            to_addr (str): the address the transaction was sent to
+        """
+        self.ops: Dict[str, OpView] = {}
+        self.variables: Dict[str, Variable] = {}
+
+        # the address executing each call depth
+        self.addresses: Dict[int, str] = {0: to_addr.lower()}
+
+        # the stack of the frame being loaded, and those of the frames
+        # returned to after a call, as in tac_cfg.Destackifier
+        self.stack: ValueStack = None
+        self.stacks: List[ValueStack] = []
+
+        # the depth and call index of the block being loaded
+        self.depth: int = None
+        self.call_index: int = None
+
+        # the number of variables defined, numbering them as TACGraph does
+        self.defined = 0
+
+        # the value of the last variable defined, if the last op defined one
+        self.value: Optional[int] = None
+
+        # the loader of each op, indexed by opcode byte
+        self.handlers = self.__build_handlers()
+
+    @classmethod
+    def from_trace(
+        cls, trace: Dict
+    ) -> Tuple[Dict[str, OpView], Dict[str, Variable], Dict[int, str]]:
+        """Load the ops of a transaction's logs into OpViews per opcode,
+        along with their variables and the address executing each call depth,
+        as read by tac_cfg.trace_chunks"""
+        loader = cls(trace["to"])
+        for span in evm_cfg.iter_spans(tac_cfg.trace_chunks(trace)):
+            loader.load_span(span)
+        return loader.ops, loader.variables, loader.addresses
+
+    def load_span(self, span: evm_cfg.BlockSpan) -> None:
+        """Load the ops of one block, switching to the stack of its frame as
+        tac_cfg.Destackifier.convert_block does"""
+        columns, start, _ = span.segments[0]
+        first = columns.opcode[start]
+        if columns.pc[start] != 0 and opcodes.PROPERTIES[first] & (
+            opcodes.Property.KIND_FOUR | opcodes.Property.KIND_FIVE
+        ):
+            self.stack = self.stacks.pop()
+            if span.depth != self.stack.depth:
+                self.stack = self.stacks.pop()
+        else:
+            self.stack = ValueStack(depth=span.depth)
+
+        self.depth = span.depth
+        self.call_index = span.call_index
+
+        handlers = self.handlers
+        for columns, start, stop in span.segments:
+            pcs = columns.pc
+            codes = columns.opcode
+            outputs = columns.outputs
+            base = outputs.base
+            for i in range(start, stop):
+                handlers[codes[i]](outputs, i, base + i, pcs[i])
+
+        columns, _, stop = span.segments[-1]
+        last = columns.opcode[stop - 1]
+        if not opcodes.PROPERTIES[last] & opcodes.Property.POSSIBLY_HALTS:
+            self.stacks.append(self.stack)
+
+    def __build_handlers(self) -> List[Callable]:
+        """
+        Return the loader of each op, indexed by opcode byte as
+        opcodes.PROPERTIES is: a permutation of the stack for POP, DUP and
+        SWAP, and otherwise __load_op with the name of the op's TAC operation
+        and the function evaluating the variable it defines, as the builders
+        of tac_cfg.Destackifier and the folders of tac_cfg.FOLDERS give them.
+        Each is called as handler(outputs, i, op_index, pc).
+        """
+        handlers = []
+
+        for code, flags in enumerate(opcodes.PROPERTIES):
+            opcode = opcodes.BYTECODES.get(code)
+
+            if flags & opcodes.Property.SWAP:
+                handlers.append(functools.partial(self.__swap, opcode.pop))
+                continue
+            elif flags & opcodes.Property.DUP:
+                handlers.append(functools.partial(self.__dup, opcode.pop))
+                continue
+            elif code == opcodes.POP.code:
+                handlers.append(self.__pop)
+                continue
+
+            name = opcode.name if opcode is not None else None
+            pops = opcode.pop if opcode is not None else 0
+            evaluate = None
+            if flags & opcodes.Property.PUSH:
+                name, evaluate = opcodes.CONST.name, _output
+            elif code == opcodes.PUSH0.code:
+                name, evaluate = opcodes.CONST.name, _zero
+            elif flags & opcodes.Property.MISSING:
+                # the op's value is its only argument, which is no variable
+                handlers.append(functools.partial(self.__load_missing, name))
+                continue
+            elif flags & opcodes.Property.LOG:
+                name = opcodes.LOG.name
+            elif flags & opcodes.Property.ARITHMETIC:
+                evaluate = _fold(getattr(mem.Variable, opcode.name))
+            elif flags & opcodes.Property.KIND_FOUR:
+                evaluate = _call
+            elif opcode is not None and opcode.push == 1:
+                # SLOAD, MLOAD, kind one and two, and CREATE
+                evaluate = _output
+
+            handlers.append(functools.partial(self.__load_op, name, pops, evaluate))
+
+        return handlers
+
+    def __swap(self, n: int, outputs, i: int, op_index: int, pc: int) -> None:
+        self.stack.swap(n)
+
+    def __dup(self, n: int, outputs, i: int, op_index: int, pc: int) -> None:
+        self.stack.dup(n)
+
+    def __pop(self, outputs, i: int, op_index: int, pc: int) -> None:
+        self.stack.pop()
+
+    def __load_missing(self, name: str, outputs, i: int, op_index: int, pc: int):
+        self.__add_op(Op(op_index, self.call_index, pc, name, self.depth, [None]))
+        self.value = None
+
+    def __load_op(
+        self,
+        name: str,
+        pops: int,
+        evaluate: Optional[Callable],
+        outputs,
+        i: int,
+        op_index: int,
+        pc: int,
+    ) -> None:
+        """Load an op popping pops words, which defines a variable if it has
+        a function evaluating its value"""
+        args = self.stack.pop_many(pops)
+        use_vars = [var for var, _ in args]
+        op = Op(op_index, self.call_index, pc, name, self.depth, use_vars)
+
+        if evaluate is None:
+            self.value = None
+        else:
+            value = evaluate(self, outputs, i, args)
+
+            # as in OpAnalyzer.__load__, a variable of unknown value is given
+            # that of the variable defined by the op before, if any
+            if value is not None:
+                self.value = value
+
+            symbol = "V{}".format(self.defined)
+            self.defined += 1
+            op.def_var = Variable(symbol, self.value, use_vars)
+            self.variables[symbol] = op.def_var
+            for var in use_vars:
+                if var is not None:
+                    var.succs.append(op.def_var)
+
+            self.stack.push((op.def_var, value))
+
+        self.__add_op(op)
+
+    def __add_op(self, op: Op) -> None:
+        if op.op not in self.ops:
+            self.ops[op.op] = OpView()
+        self.ops[op.op].add_op(op)
+
+
+def _output(loader: TraceLoader, outputs, i: int, args: List) -> int:
+    """The value of an op is its output, logged by geth"""
+    return outputs.value(i)
+
+
+def _zero(loader: TraceLoader, outputs, i: int, args: List) -> int:
+    # PUSH0 pushes a zero that is not in the bytecode
+    return 0
+
+
+def _call(loader: TraceLoader, outputs, i: int, args: List) -> int:
+    """The value of a call is its success flag. The address it calls now
+    executes the depth below it"""
+    loader.addresses[loader.depth + 1] = hex(args[1][1]).lower()
+    return outputs.value(i)
+
+
+def _fold(func: Callable[..., int]) -> Callable:
+    """
+    Return the function evaluating an arithmetic op computed by func, one of
+    the operations of mem.Variable, as mem.ConcreteVariable.fold_value does.
+    """
+
+    def evaluate(loader: TraceLoader, outputs, i: int, args: List) -> Optional[int]:
+        values = [value for _, value in args]
+        if None in values:
+            return None
+        return func(*values) % mem.ConcreteVariable.CARDINALITY
+
+    return evaluate
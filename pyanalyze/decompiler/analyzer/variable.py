@@ -23,6 +23,10 @@ class Variable:
 
         raise NotImplementedError()
 
+    def __hash__(self) -> int:
+        # consistent with __eq__, which also matches a Variable to its symbol
+        return hash(self.symbol)
+
     def is_parent(self, parent_vars: List["Variable"] | "Variable") -> bool:
         """Return true if any Variable instance in parent_vars is a parent
         of the Variable instance. Uses BFS for searching
@@ -82,27 +86,49 @@ class Variable:
 
     def get_descendants(self) -> List["Variable"]:
         """Returns all children and any descendants
-        of self's children as a list
+        of self's children as a list, each Variable once
 
         Returns:
             List['Variable]: all Variable descendants of self
         """
 
         descendants = []
-
-        for var in self.succs:
+        visited = set()
+        stack = list(reversed(self.succs))
+        while stack:
+            var = stack.pop()
+            if var in visited:
+                continue
+            visited.add(var)
             descendants.append(var)
-            descendants.extend(var.get_descendants())
+            stack.extend(reversed(var.succs))
 
         return descendants
 
-    def get_ancestors(self, stop: "Variable" = None):
-        if stop is None:
-            return self.preds + [i for var in self.preds for i in var.get_ancestors()]
+    def get_ancestors(self, stop: "Variable" = None) -> List["Variable"]:
+        """Returns all parents and any ancestors of self's parents as a list,
+        each Variable once. If stop is given, the ancestors of stop are not
+        searched, though stop itself is included.
+
+        Args:
+            stop (Variable, optional): the Variable to stop searching at.
 
-        if self == stop:
+        Returns:
+            List['Variable']: all Variable ancestors of self
+        """
+        if stop is not None and self == stop:
             return []
 
-        return self.preds + [
-            i for var in self.preds for i in var.get_ancestors(stop=stop)
-        ]
+        ancestors = []
+        visited = set()
+        stack = list(reversed(self.preds))
+        while stack:
+            var = stack.pop()
+            if var in visited:
+                continue
+            visited.add(var)
+            ancestors.append(var)
+            if stop is None or var != stop:
+                stack.extend(reversed(var.preds))
+
+        return ancestors
@@ -1,10 +1,26 @@
 """evm_cfg.py: Classes for processing disasm output and building a CFG"""
 
+import collections
+import itertools
 import typing as t
 
 import decompiler.cfg as cfg
 import decompiler.opcodes as opcodes
 
+_FRAME_RETURN = opcodes.Property.KIND_FOUR | opcodes.Property.KIND_FIVE
+"""
+Property flags of the call and create opcodes. geth logs these after the
+frame they opened has finished, so they mark a return to the calling frame.
+"""
+
+_FRAME_RETURN_CODES = frozenset(
+    code for code in range(256) if opcodes.PROPERTIES[code] & _FRAME_RETURN
+)
+"""Byte values of the call and create opcodes."""
+
+_UNDECODED = object()
+"""Placeholder for an EVMOp value that has not yet been decoded."""
+
 
 class EVMBasicBlock(cfg.BasicBlock):
     """
@@ -83,6 +99,19 @@ class EVMOp:
     Represents a single EVM operation.
     """
 
+    # Traces hold one EVMOp per executed op, so avoid a __dict__ per op.
+    __slots__ = (
+        "pc",
+        "opcode",
+        "block",
+        "depth",
+        "call_index",
+        "op_index",
+        "__source",
+        "__value",
+        "__extra",
+    )
+
     def __init__(
         self,
         pc: int,
@@ -92,6 +121,7 @@ class EVMOp:
         callindex: int = None,
         opindex: int = None,
         extra: int = None,
+        source=None,
     ):
         """
         Create a new EVMOp object from the given params which should correspond to
@@ -101,6 +131,9 @@ class EVMOp:
           pc: program counter of this operation
           opcode: VM operation code
           value: constant int value or default None in case of non-PUSH operations
+          source: an optrace.OpOutputs holding this op's raw output. If
+                  given, value and extra are ignored, and are instead decoded
+                  from row opindex - source.base of source when first read.
 
         Each line of disasm output is structured as follows:
 
@@ -127,8 +160,9 @@ class EVMOp:
         self.opcode = opcode
         """VM operation code"""
 
-        self.value = value
-        """Constant int value or None"""
+        self.__source = source
+
+        self.__value = _UNDECODED if source is not None else value
 
         self.block = None
         """EVMBasicBlock object to which this line belongs"""
@@ -136,8 +170,7 @@ class EVMOp:
         self.depth = depth
         """The current calldepth of the block"""
 
-        self.extra = extra
-        """Any extra value for calls in case of Call/CallCode/DelegateCall/StaticCall"""
+        self.__extra = _UNDECODED if source is not None else extra
 
         self.call_index = callindex
         """The n-th index of the call, calculated by geth"""
@@ -145,6 +178,28 @@ class EVMOp:
         self.op_index = opindex
         """The n-th opcode executed in that transaction"""
 
+    @property
+    def value(self) -> t.Optional[int]:
+        """Constant int value or None"""
+        if self.__value is _UNDECODED:
+            self.__value = self.__source.value(self.op_index - self.__source.base)
+        return self.__value
+
+    @value.setter
+    def value(self, value: t.Optional[int]) -> None:
+        self.__value = value
+
+    @property
+    def extra(self) -> t.Optional[int]:
+        """Any extra value for calls in case of Call/CallCode/DelegateCall/StaticCall"""
+        if self.__extra is _UNDECODED:
+            self.__extra = self.__source.extra(self.op_index - self.__source.base)
+        return self.__extra
+
+    @extra.setter
+    def extra(self, extra: t.Optional[int]) -> None:
+        self.__extra = extra
+
     def __str__(self):
         if self.value is None:
             return "{2}: {0} {1}".format(hex(self.pc), self.opcode, self.depth)
@@ -199,7 +254,7 @@ def blocks_from_ops(ops: t.Iterable[EVMOp]) -> t.Iterable[EVMBasicBlock]:
             current = new
 
         # Add CREATE and CREATE2
-        elif op.opcode.is_kind_four() or op.opcode.is_kind_five():
+        elif opcodes.PROPERTIES[op.opcode.code] & _FRAME_RETURN:
             # Make sure conditions such as 238;ADD 239;CALL will not be split
             if (
                 ops[i - 1].call_index == op.call_index
@@ -221,3 +276,160 @@ def blocks_from_ops(ops: t.Iterable[EVMOp]) -> t.Iterable[EVMBasicBlock]:
         op.depth = depth
 
     return blocks
+
+
+def blocks_from_columns(columns) -> t.List[EVMBasicBlock]:
+    """
+    Process a columnar op trace and create a sequence of EVMBasicBlocks.
+
+    Args:
+      columns: an optrace.OpTraceColumns holding the parsed trace.
+
+    Returns:
+      List of BasicBlocks from the input trace, in trace order.
+    """
+    return list(iter_blocks([columns]))
+
+
+def iter_blocks(chunks: t.Iterable) -> t.Iterator[EVMBasicBlock]:
+    """
+    Lazily process a columnar op trace, given as consecutive chunks, and
+    yield each EVMBasicBlock as soon as it has been closed.
+
+    This produces the same blocks, call indices and depths as
+    blocks_from_ops, but block boundaries are found by scanning the pc and
+    opcode arrays directly, as iter_spans does. Every block lies within a
+    single call frame, so its ops all share one call index and depth, and
+    are constructed in bulk.
+    Each op keeps a reference to its raw output, which is only decoded into
+    an int when the op's value or extra is first read.
+    Only the chunks of the block currently open are held, and its ops are
+    only constructed once it closes, so memory use is bounded by the largest
+    block rather than the whole trace.
+
+    Args:
+      chunks: an iterable of optrace.OpTraceColumns, such as the one returned
+              by optrace.iter_optrace.
+
+    Returns:
+      Iterator over the BasicBlocks of the input trace, in trace order.
+    """
+    for span in iter_spans(chunks):
+        ops = []
+        for columns, start, stop in span.segments:
+            base = columns.outputs.base
+            ops.extend(
+                map(
+                    EVMOp,
+                    columns.pc[start:stop],
+                    map(opcodes.BYTECODES.__getitem__, columns.opcode[start:stop]),
+                    itertools.repeat(None),
+                    itertools.repeat(span.depth),
+                    itertools.repeat(span.call_index),
+                    range(base + start, base + stop),
+                    itertools.repeat(None),
+                    itertools.repeat(columns.outputs),
+                )
+            )
+        yield _close_block(span.entry, span.stop, ops)
+
+
+BlockSpan = collections.namedtuple(
+    "BlockSpan", ["entry", "stop", "depth", "call_index", "segments"]
+)
+"""
+The ops of one block of a columnar op trace, from trace position entry up to
+stop, all at the same depth and call index. They are given by their rows in
+the chunks holding them rather than as EVMOps: segments is a list of
+(columns, start, stop) rows of consecutive optrace.OpTraceColumns, whose
+outputs.base is the trace position of their first row.
+"""
+
+
+def iter_spans(chunks: t.Iterable) -> t.Iterator[BlockSpan]:
+    """
+    Lazily process a columnar op trace, given as consecutive chunks, and
+    yield the span of each of the blocks iter_blocks yields, as soon as it
+    has been closed.
+
+    Args:
+      chunks: an iterable of optrace.OpTraceColumns, such as the one returned
+              by optrace.iter_optrace.
+
+    Returns:
+      Iterator over the BlockSpans of the input trace, in trace order.
+    """
+
+    # details for the block currently being processed
+    entry = 0
+    current = []
+    call_index = 0
+    depth = 0
+
+    # the op preceding the current chunk, as (pc, opcode byte)
+    prev = None
+    base = 0
+
+    properties = opcodes.PROPERTIES
+
+    for columns in chunks:
+        pcs = columns.pc
+        codes = columns.opcode
+        columns.outputs.base = base
+
+        # Only ops at pc 0 or call and create ops can begin a new block.
+        candidates = [i for i, pc in enumerate(pcs) if pc == 0]
+        candidates.extend(
+            i for i, code in enumerate(codes) if code in _FRAME_RETURN_CODES
+        )
+        candidates.sort()
+
+        start = 0
+        for i in candidates:
+            if pcs[i] == 0:
+                if base + i == 0:
+                    depth = 1
+                    continue
+                current.append((columns, start, i))
+                yield BlockSpan(entry, base + i, depth, call_index, current)
+                call_index += 1
+                depth += 1
+
+            # A call or create that did not open a frame of its own (e.g. a
+            # call to a precompile) directly follows the previous op in the
+            # same frame.
+            else:
+                if i > 0:
+                    prev = (pcs[i - 1], codes[i - 1])
+                if prev is not None:
+                    prev_op = opcodes.BYTECODES[prev[1]]
+                    if (
+                        pcs[i] - prev[0] == prev_op.op_pc_gap()
+                        and not properties[prev[1]] & opcodes.Property.POSSIBLY_HALTS
+                    ):
+                        continue
+                current.append((columns, start, i))
+                yield BlockSpan(entry, base + i, depth, call_index, current)
+                depth -= 1
+
+            entry = base + i
+            current = []
+            start = i
+
+        current.append((columns, start, len(pcs)))
+        if len(pcs) > 0:
+            prev = (pcs[-1], codes[-1])
+        base += len(pcs)
+
+    # As in blocks_from_ops, the trailing block is only kept if its last op
+    # did not itself start a new block.
+    if prev is not None and prev[0] != 0 and prev[1] not in _FRAME_RETURN_CODES:
+        yield BlockSpan(entry, base, depth, call_index, current)
+
+
+def _close_block(entry: int, stop: int, ops: t.List[EVMOp]) -> EVMBasicBlock:
+    """Create the EVMBasicBlock holding the given ops, from entry up to stop."""
+    block = EVMBasicBlock(entry, stop - 1, ops)
+    for op in ops:
+        op.block = block
+    return block
@@ -244,7 +244,25 @@ class Variable(ssle, Location):
                 arity of the specified operation.
           name: the name of the result Variable.
         """
-        result = ssle.cartesian_map(getattr(cls, opname), args)
+        return cls.fold(getattr(cls, opname), args, name)
+
+    @classmethod
+    def fold(
+        cls,
+        func: t.Callable[..., int],
+        args: t.Iterable["Variable"],
+        name=VAR_RESULT_NAME,
+    ) -> "Variable":
+        """
+        Apply func, one of the EVM arithmetic operations below, to the given
+        Variables' values in all permutations, as arith_op does.
+
+        Args:
+          func: the operation to apply.
+          args: a sequence of Variables whose length matches its arity.
+          name: the name of the result Variable.
+        """
+        result = ssle.cartesian_map(func, args)
         return cls(values=result, name=name)
 
     @classmethod
@@ -298,8 +316,8 @@ class Variable(ssle, Location):
 
     @classmethod
     def EXP(cls, b: int, e: int) -> int:
-        """Exponentiation: return b to the power of e."""
-        return b**e
+        """Exponentiation: return b to the power of e, modulo CARDINALITY."""
+        return pow(b, e, cls.CARDINALITY)
 
     @classmethod
     def SIGNEXTEND(cls, b: int, v: int) -> int:
@@ -370,18 +388,196 @@ class Variable(ssle, Location):
 
     @classmethod
     def SHL(cls, b: int, v: int) -> int:
-        """Bitwise shift left."""
-        return v << b
+        """Bitwise shift left, giving 0 for shifts of a whole word or more."""
+        if b >= cls.SIZE * 8:
+            return 0
+        return (v << b) % cls.CARDINALITY
 
     @classmethod
     def SHR(cls, b: int, v: int) -> int:
-        """Bitwise shift right."""
+        """Bitwise shift right, giving 0 for shifts of a whole word or more."""
+        if b >= cls.SIZE * 8:
+            return 0
         return v >> b
 
     @classmethod
     def SAR(cls, b: int, v: int) -> int:
-        """Arithmetic shift right."""
-        return cls.twos_comp(v) >> b
+        """
+        Arithmetic shift right. Shifts of a whole word or more give 0, or -1 if
+        v is negative.
+        """
+        return cls.twos_comp(v) >> min(b, cls.SIZE * 8 - 1)
+
+
+class ConcreteVariable(Variable):
+    """
+    A Variable holding at most one value, as every value recorded in a trace
+    is, stored as a plain int rather than a one-element set. An unknown value,
+    such as the result of folding an operation on a stack variable, is Top.
+    Folding an operation on ConcreteVariables calls the arithmetic directly,
+    without building sets or taking their cartesian product.
+
+    It otherwise behaves as a Variable of zero or one values; a value set of
+    more than one value, which a trace never gives, is widened to Top.
+    """
+
+    def __init__(
+        self,
+        value: int = None,
+        name: str = VAR_DEFAULT_NAME,
+        def_sites: ssle = ssle.bottom(),
+    ):
+        """
+        Args:
+          value: the value of this variable, or None if it is unknown (Top).
+          name: the name that uniquely identifies this variable.
+          def_sites: a set of locations (TACLocRefs) where this variable
+                     was possibly defined.
+        """
+        self.concrete = None if value is None else value % self.CARDINALITY
+        """The value of this variable, or None if it is Top."""
+        self.name = name
+        self.def_sites = def_sites
+
+    def __deepcopy__(self, memodict={}):
+        return type(self)(
+            self.concrete, self.name, copy.deepcopy(self.def_sites, memodict)
+        )
+
+    @property
+    def value(self) -> set:
+        """The value set of this variable, as a SubsetLatticeElement holds it."""
+        if self.concrete is None:
+            return self._top_val()
+        return {self.concrete}
+
+    @value.setter
+    def value(self, vals: set):
+        if isinstance(vals, set) and len(vals) == 1 and vals != self._top_val():
+            self.concrete = next(iter(vals)) % self.CARDINALITY
+        else:
+            self.concrete = None
+
+    @property
+    def values(self) -> "ConcreteVariable":
+        """The value set this Variable contains."""
+        return self
+
+    @values.setter
+    def values(self, vals: t.Iterable):
+        """
+        Set this Variable's value, taking that of another ConcreteVariable
+        directly, and otherwise the single value of vals if it has one.
+
+        Args:
+          vals: an iterable of values that this Variable will hold
+        """
+        if isinstance(vals, ConcreteVariable):
+            self.concrete = vals.concrete
+        elif isinstance(vals, ssle) and not vals.is_finite:
+            self.concrete = None
+        else:
+            self.value = set(vals)
+
+    @property
+    def is_top(self) -> bool:
+        return self.concrete is None
+
+    @property
+    def is_bottom(self) -> bool:
+        return False
+
+    @property
+    def is_const(self) -> bool:
+        return self.concrete is not None
+
+    @property
+    def is_finite(self) -> bool:
+        return self.concrete is not None
+
+    @property
+    def const_value(self):
+        """If this variable is constant, return its value."""
+        return self.concrete
+
+    def widen_to_top(self):
+        self.concrete = None
+
+    def __len__(self):
+        return 0 if self.concrete is None else 1
+
+    def __iter__(self):
+        if self.concrete is None:
+            raise TypeError("Top lattice element cannot be iterated.")
+        return iter((self.concrete,))
+
+    def __str__(self):
+        if self.concrete is None:
+            return self.identifier
+        return hex(self.concrete)
+
+    @classmethod
+    def top(
+        cls, name=VAR_DEFAULT_NAME, def_sites: ssle = ssle.bottom()
+    ) -> "ConcreteVariable":
+        """
+        Return a ConcreteVariable with Top value, and optionally set its name.
+
+        Args:
+          name: the name of the new variable.
+          def_sites: a set of locations where this variable was possibly defined.
+        """
+        return cls(None, name, def_sites)
+
+    @classmethod
+    def arith_op(
+        cls, opname: str, args: t.Iterable[Variable], name=VAR_RESULT_NAME
+    ) -> "ConcreteVariable":
+        """
+        Apply the named arithmetic operation to the given Variables' values,
+        and return a ConcreteVariable containing the result, or Top if any
+        argument is not constant.
+
+        Args:
+          opname: the EVM operation to apply.
+          args: a sequence of Variables whose length matches the
+                arity of the specified operation.
+          name: the name of the result Variable.
+        """
+        return cls.fold(getattr(cls, opname), args, name)
+
+    @classmethod
+    def fold(
+        cls,
+        func: t.Callable[..., int],
+        args: t.Iterable[Variable],
+        name=VAR_RESULT_NAME,
+    ) -> "ConcreteVariable":
+        """
+        Apply func to the given Variables' values, as arith_op does.
+        """
+        return cls(cls.fold_value(func, args), name)
+
+    @classmethod
+    def arith_value(cls, opname: str, args: t.Iterable[Variable]) -> t.Optional[int]:
+        """
+        Return the result of the named arithmetic operation on the given
+        Variables' values, in range, or None if any argument is not constant.
+        """
+        return cls.fold_value(getattr(cls, opname), args)
+
+    @classmethod
+    def fold_value(
+        cls, func: t.Callable[..., int], args: t.Iterable[Variable]
+    ) -> t.Optional[int]:
+        """
+        Return the result of func on the given Variables' values, in range,
+        or None if any argument is not constant.
+        """
+        values = [arg.const_value for arg in args]
+        if None in values:
+            return None
+        return func(*values) % cls.CARDINALITY
 
 
 class MetaVariable(Variable):
@@ -599,3 +795,277 @@ class VariableStack(LatticeElement):
         yields an empty stack.
         """
         return super().join_all(elements, initial=VariableStack())
+
+
+class TraceStack:
+    """
+    A fixed-capacity stack of TAC variables for destackifying traces, with
+    the interface of VariableStack but none of its lattice operations, which
+    the linear blocks of a trace never need.
+
+    Its slots are allocated once, up to the EVM's limit of 1024 words, so
+    pushes and pops only move the index of the top, and DUP and SWAP read and
+    write slots directly. The MetaVariables standing for values from past the
+    bottom of the stack are only created once popped, and shared between
+    stacks, as they are never changed.
+    """
+
+    __slots__ = ("slots", "size", "empty_pops", "max_size", "depth")
+
+    DEFAULT_MAX = VariableStack.DEFAULT_MAX
+    """The number of slots; pushes to a full stack are discarded."""
+
+    METAVARS: t.List[MetaVariable] = []
+    """The MetaVariables S0, S1, ... created so far, indexed by payload."""
+
+    def __init__(
+        self,
+        state: t.Iterable[Variable] = None,
+        max_size: int = DEFAULT_MAX,
+        depth: int = None,
+    ):
+        """
+        Args:
+          state: the variables to push, from the bottom of the stack up.
+          max_size: the number of slots of the stack.
+          depth: the call depth of the frame the stack belongs to.
+        """
+        self.slots: t.List[Variable] = [None] * max_size
+        self.size = 0
+        """The number of variables on the stack; the top is slots[size - 1]."""
+        self.empty_pops = 0
+        """The number of times the stack was popped while empty."""
+        self.max_size = max_size
+        self.depth = depth
+
+        if state is not None:
+            self.push_many(state)
+
+    @property
+    def value(self) -> t.List[Variable]:
+        """The variables on the stack, from the bottom up."""
+        return self.slots[: self.size]
+
+    def __iter__(self):
+        """Iteration occurs from head of stack downwards."""
+        return reversed(self.slots[: self.size])
+
+    def __str__(self):
+        return "[{}]".format(", ".join(str(v) for v in self.value))
+
+    def __len__(self):
+        return self.size
+
+    def __eq__(self, other):
+        return len(self) == len(other) and all(
+            v1 == v2 for v1, v2 in zip(self, other)
+        )
+
+    def copy(self) -> "TraceStack":
+        """
+        Produce a copy of this stack, without deep copying
+        the variables it contains.
+        """
+        new_stack = type(self)(max_size=self.max_size, depth=self.depth)
+        new_stack.slots[: self.size] = self.slots[: self.size]
+        new_stack.size = self.size
+        new_stack.empty_pops = self.empty_pops
+        return new_stack
+
+    @classmethod
+    def metavar(cls, n: int) -> MetaVariable:
+        """Return the MetaVariable standing for the n'th value below the stack."""
+        while len(cls.METAVARS) <= n:
+            payload = len(cls.METAVARS)
+            cls.METAVARS.append(MetaVariable(name="S{}".format(payload), payload=payload))
+        return cls.METAVARS[n]
+
+    def peek(self, n: int = 0) -> Variable:
+        """Return the n'th element from the top without popping anything."""
+        if n >= self.size:
+            return self.metavar(n - self.size + self.empty_pops)
+        return self.slots[self.size - n - 1]
+
+    def push(self, var: Variable) -> None:
+        """Push a variable to the stack."""
+        if self.size < self.max_size:
+            self.slots[self.size] = var
+            self.size += 1
+
+    def pop(self) -> Variable:
+        """
+        Pop a variable off our symbolic stack if one exists, otherwise
+        generate a variable from past the bottom.
+        """
+        if self.size:
+            self.size -= 1
+            return self.slots[self.size]
+
+        self.empty_pops += 1
+        return self.metavar(self.empty_pops - 1)
+
+    def push_many(self, vs: t.Iterable[Variable]) -> None:
+        """
+        Push a sequence of elements onto the stack.
+        Low index elements are pushed first.
+        """
+        for v in vs:
+            self.push(v)
+
+    def pop_many(self, n: int) -> t.List[Variable]:
+        """
+        Pop and return n items from the stack.
+        First-popped elements inhabit low indices.
+        """
+        size = self.size
+        if n <= size:
+            self.size = size - n
+            return self.slots[size - n : size][::-1]
+        return [self.pop() for _ in range(n)]
+
+    def dup(self, n: int) -> None:
+        """Place a copy of stack[n-1] on the top of the stack."""
+        if n <= self.size:
+            self.push(self.slots[self.size - n])
+            return
+
+        # The values from past the bottom are put on the stack first
+        items = self.pop_many(n)
+        self.push_many(reversed([items[-1]] + items))
+
+    def swap(self, n: int) -> None:
+        """Swap stack[0] with stack[n]."""
+        slots, size = self.slots, self.size
+        if n <= size:
+            slots[size - 1], slots[size - n] = slots[size - n], slots[size - 1]
+            return
+
+        items = self.pop_many(n)
+        self.push_many(reversed([items[-1]] + items[1:-1] + [items[0]]))
+
+
+class PagedMemory:
+    """
+    The memory of one call frame, folded from the stores of a trace, as
+    pages of PAGE_SIZE bytes allocated on demand and keyed by page number.
+
+    Unwritten memory reads as zeros, as in the EVM, without any page being
+    allocated for it, so a store at a large offset costs no more than one
+    at a small one. Pages are written and read through memoryviews.
+    """
+
+    __slots__ = ("pages", "size")
+
+    PAGE_SIZE = 4096
+    """The number of bytes of each page."""
+
+    ZERO_PAGE = bytes(PAGE_SIZE)
+    """A page of zeros, compared against before allocating a page."""
+
+    def __init__(self):
+        self.pages: t.Dict[int, bytearray] = {}
+        """The pages written so far, by page number."""
+        self.size = 0
+        """The number of bytes up to the end of the last byte written."""
+
+    def __len__(self):
+        return self.size
+
+    def __str__(self):
+        return "<{} of {} bytes in {} pages>".format(
+            type(self).__name__, self.size, len(self.pages)
+        )
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Return the length bytes of memory from offset."""
+        page_size = self.PAGE_SIZE
+        data = bytearray(length)
+        view = memoryview(data)
+
+        pos = 0
+        while pos < length:
+            number, start = divmod(offset + pos, page_size)
+            n = min(length - pos, page_size - start)
+            page = self.pages.get(number)
+            if page is not None:
+                view[pos : pos + n] = memoryview(page)[start : start + n]
+            pos += n
+
+        return bytes(data)
+
+    def write(self, offset: int, data: bytes) -> None:
+        """Write data into memory from offset."""
+        page_size = self.PAGE_SIZE
+        view = memoryview(data).cast("B")
+        length = len(view)
+
+        pos = 0
+        while pos < length:
+            number, start = divmod(offset + pos, page_size)
+            n = min(length - pos, page_size - start)
+            chunk = view[pos : pos + n]
+            page = self.pages.get(number)
+            if page is None:
+                # zeros are what an unwritten page reads as anyway
+                if chunk == self.ZERO_PAGE[:n]:
+                    pos += n
+                    continue
+                page = self.pages[number] = bytearray(page_size)
+            memoryview(page)[start : start + n] = chunk
+            pos += n
+
+        if length:
+            self.size = max(self.size, offset + length)
+
+    def write_int(self, offset: int, value: int, length: int) -> None:
+        """
+        Write value into the length bytes of memory from offset, big-endian.
+        Its leading zeros only clear pages already allocated, so a large copy
+        of a small value allocates no more than the value needs.
+
+        Throws:
+          OverflowError: if value does not fit in length bytes.
+        """
+        number, start = divmod(offset, self.PAGE_SIZE)
+        if start + length <= self.PAGE_SIZE and length:
+            # most stores are of a word within a single page
+            page = self.pages.get(number)
+            if page is None:
+                if not value:
+                    self.size = max(self.size, offset + length)
+                    return
+                page = self.pages[number] = bytearray(self.PAGE_SIZE)
+            page[start : start + length] = value.to_bytes(length, byteorder="big")
+            self.size = max(self.size, offset + length)
+            return
+
+        width = (value.bit_length() + 7) // 8
+        if width > length:
+            raise OverflowError("int too big to convert")
+
+        zeros = length - width
+        self.__clear(offset, zeros)
+        self.write(offset + zeros, value.to_bytes(width, byteorder="big"))
+        if length:
+            self.size = max(self.size, offset + length)
+
+    def __clear(self, offset: int, length: int) -> None:
+        """Zero the length bytes of memory from offset."""
+        page_size = self.PAGE_SIZE
+        end = offset + length
+
+        # only the pages in range that were allocated need clearing
+        if length // page_size + 1 < len(self.pages):
+            numbers = range(offset // page_size, (end - 1) // page_size + 1)
+        else:
+            numbers = list(self.pages)
+
+        for number in numbers:
+            page = self.pages.get(number)
+            if page is None:
+                continue
+            start = max(offset, number * page_size)
+            stop = min(end, (number + 1) * page_size)
+            if start < stop:
+                base = number * page_size
+                page[start - base : stop - base] = self.ZERO_PAGE[: stop - start]
@@ -1,34 +1,417 @@
-from typing import Iterable
-from pymongo import MongoClient, CursorType
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo import ASCENDING, IndexModel, MongoClient, CursorType, UpdateOne
 
 """
-    Class to interface with mongodb to extract tx info based on 
+    Class to interface with mongodb to extract tx info based on
     block number
 """
 
+ANALYSIS_FIELDS = ("tx", "to", "optrace", "optracebin")
+"""The fields of a logged transaction read when analyzing its trace."""
+
+INDEXED_FIELDS = ("block", "tx", "to")
+"""The fields that transactions are looked up by, and so must be indexed."""
+
+BATCH_SIZE = 100
+"""
+The default number of documents requested from the server per round-trip
+when streaming transactions. Documents average tens of KB, so this keeps
+each batch within a few MB.
+"""
+
+SAMPLE_INDEXES = (
+    [("samplekey", ASCENDING)],
+    [("to", ASCENDING), ("samplekey", ASCENDING)],
+    [("block", ASCENDING), ("samplekey", ASCENDING)],
+    [("tracesize", ASCENDING), ("samplekey", ASCENDING)],
+)
+"""
+The indexes samples are drawn through: one over the sample key, one for
+drawing samples of the transactions sent to a single address, and one for
+each range a Stratum can bound. A narrow block or trace-size range is
+scanned through its own index and the few transactions in it sorted by
+sample key, rather than walking the sample key index past every
+transaction outside it; MongoDB's planner picks whichever is faster.
+"""
+
+LOOKUP_CHUNK_SIZE = 1000
+"""The default number of tx hashes looked up per query by get_txs."""
+
+BYTES_FIELDS = frozenset(("optrace", "functrace", "transfertrace"))
+"""Large string fields that RawTraceDocument returns as undecoded bytes."""
+
+# Byte sizes of the values of fixed-size BSON element types
+_FIXED_SIZES = {
+    0x01: 8,  # double
+    0x06: 0,  # undefined
+    0x07: 12,  # ObjectId
+    0x08: 1,  # bool
+    0x09: 8,  # UTC datetime
+    0x0A: 0,  # null
+    0x10: 4,  # int32
+    0x11: 8,  # timestamp
+    0x12: 8,  # int64
+    0x13: 16,  # decimal128
+    0x7F: 0,  # max key
+    0xFF: 0,  # min key
+}
+
+
+class RawTraceDocument(RawBSONDocument):
+    """
+    A RawBSONDocument whose large string fields, listed in BYTES_FIELDS, are
+    returned as their UTF-8 encoded bytes instead of being decoded into str.
+    Fields are only read out of the raw BSON when they are accessed, and op
+    traces returned as bytes can be parsed directly by optrace.parse_optrace.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, item: str) -> Any:
+        if item in BYTES_FIELDS:
+            value = _raw_string(self.raw, item.encode())
+            if value is not None:
+                return value
+        return super().__getitem__(item)
+
+
+def _raw_string(data: bytes, key: bytes) -> Optional[bytes]:
+    """
+    Return the bytes of the top-level string field named key of the BSON
+    document data, or None if it has no such string field.
+    """
+    view = memoryview(data)
+    pos = 4
+    while pos < len(view) - 1:
+        kind = view[pos]
+        name_start = pos + 1
+        pos = name_start
+        while view[pos] != 0:
+            pos += 1
+        name = view[name_start:pos]
+        pos += 1
+
+        if kind in _FIXED_SIZES:
+            size = _FIXED_SIZES[kind]
+        elif kind in (0x02, 0x0D, 0x0E):  # string, JavaScript code, symbol
+            size = 4 + int.from_bytes(view[pos : pos + 4], "little")
+            if kind == 0x02 and name == key:
+                return bytes(view[pos + 4 : pos + size - 1])
+        elif kind in (0x03, 0x04):  # document, array
+            size = int.from_bytes(view[pos : pos + 4], "little")
+        elif kind == 0x05:  # binary
+            size = 5 + int.from_bytes(view[pos : pos + 4], "little")
+        else:
+            return None
+        pos += size
+
+    return None
+
+
+class Stratum:
+    """
+    A subset of the logged transactions that samples are drawn from. Each
+    bound left as None does not restrict the subset.
+    """
+
+    def __init__(
+        self,
+        blocks: Tuple[int, int] = None,
+        trace_size: Tuple[int, int] = None,
+        to: str = None,
+    ):
+        """
+        Args:
+          blocks: the blocks from start up to but not including stop.
+          trace_size: the range of op counts from start up to but not
+                      including stop.
+          to: the address the transactions were sent to.
+        """
+        self.blocks = blocks
+        self.trace_size = trace_size
+        self.to = to
+
+    def query(self) -> Dict[str, Any]:
+        """Returns the MongoDB query matching the transactions in this stratum."""
+        query = {}
+        if self.blocks is not None:
+            query["block"] = {"$gte": self.blocks[0], "$lt": self.blocks[1]}
+        if self.trace_size is not None:
+            query["tracesize"] = {
+                "$gte": self.trace_size[0],
+                "$lt": self.trace_size[1],
+            }
+        if self.to is not None:
+            query["to"] = self.to
+        return query
+
+    def matches(self, tx: Dict[str, Any]) -> bool:
+        """Returns whether the transaction tx lies in this stratum."""
+        for field, bounds in (("block", self.blocks), ("tracesize", self.trace_size)):
+            if (
+                bounds is not None
+                and not bounds[0] <= tx.get(field, bounds[1]) < bounds[1]
+            ):
+                return False
+        return self.to is None or tx.get("to") == self.to
+
+
+def sample_key(tx: str) -> int:
+    """
+    Returns the sample key of the transaction with hash tx, as stored by
+    mgologger: the first 8 bytes of the hash, shifted to a positive int64.
+    """
+    return int(tx[2:18], 16) >> 1
+
+
+def seed_key(seed: int) -> int:
+    """Returns the sample key that samples drawn with seed start from."""
+    digest = hashlib.sha256(str(seed).encode()).digest()
+    return int.from_bytes(digest[:8], "big") >> 1
+
 
 class MongoFetcher:
     def __init__(self, mongoURI: str, db: str, collection: str) -> None:
         self.client = MongoClient(mongoURI)
         self.database = getattr(self.client, db)
         self.collection = getattr(self.database, collection)
+        self.raw_collection = self.collection.with_options(
+            codec_options=CodecOptions(document_class=RawTraceDocument)
+        )
 
         self.block: int = 1
-        
-    def get_block(self, n: int = None) -> None:
+
+    def get_block(
+        self, n: int = None, fields: Iterable[str] = None, raw: bool = False
+    ) -> None:
+        """
+        Returns a cursor over the transactions of block n, or of the block
+        after the last one fetched if n is None.
+
+        fields restricts each returned document to the given fields, so that
+        the rest are never transferred, and raw returns each as a
+        RawTraceDocument that is only decoded as its fields are read.
+        """
         if n == None:
             n = self.block
 
-        txs = self.collection.find({"block": str(n)})
+        # mgologger stores the block number as an int
+        txs = self.__collection(raw).find({"block": int(n)}, _projection(fields))
 
         self.block = n + 1
 
         return txs
 
-    def get_tx(self, tx: str = "") -> Iterable[CursorType]:
+    def iter_blocks(
+        self,
+        start: int,
+        stop: int,
+        batch_size: int = BATCH_SIZE,
+        fields: Iterable[str] = None,
+        raw: bool = False,
+    ) -> Iterator[Tuple[int, List[Any]]]:
+        """
+        Streams the transactions of every block from start up to but not
+        including stop, yielding a (block, transactions) pair for each block
+        holding any logged transactions, in block order.
+
+        The whole range is read through one cursor over the block index,
+        which fetches batch_size documents per round-trip. fields and raw
+        are as for get_block, except that the block field is always
+        returned.
+        """
+        projection = _projection(fields)
+        if projection is not None:
+            projection["block"] = 1
+
+        txs = (
+            self.__collection(raw)
+            .find({"block": {"$gte": int(start), "$lt": int(stop)}}, projection)
+            .sort("block", ASCENDING)
+            .batch_size(batch_size)
+        )
+
+        for block, group in groupby(txs, key=itemgetter("block")):
+            yield block, list(group)
+
+    def ensure_indexes(self) -> List[str]:
+        """
+        Creates any missing single-field indexes on INDEXED_FIELDS, then
+        checks that each of them is indexed, returning the index names.
+
+        Throws:
+          LookupError: if a field is still not indexed afterwards.
+        """
+        self.collection.create_indexes(
+            [IndexModel([(field, ASCENDING)]) for field in INDEXED_FIELDS]
+        )
+
+        indexed = {
+            next(iter(info["key"]))[0]: name
+            for name, info in self.collection.index_information().items()
+        }
+        missing = [field for field in INDEXED_FIELDS if field not in indexed]
+        if missing:
+            raise LookupError("No index on {}.".format(", ".join(missing)))
+
+        return [indexed[field] for field in INDEXED_FIELDS]
+
+    def get_tx(
+        self, tx: str = "", fields: Iterable[str] = None, raw: bool = False
+    ) -> Iterable[CursorType]:
+        """
+        Returns the transaction with hash tx, or a random one if tx is empty.
+        fields and raw are as for get_block.
+        """
         if tx == "":
-            return list(self.collection.aggregate([{"$sample": {"size": 1}}]))[0]
-        return self.collection.find_one({"tx": tx})
-    
-    def get_random_txs(self, n : int = 1):
-        return list(self.collection.aggregate([{"$sample": {"size": n}}]))
+            return self.get_random_txs(1, fields, raw)[0]
+        return self.__collection(raw).find_one({"tx": tx}, _projection(fields))
+
+    def get_txs(
+        self,
+        hashes: Iterable[str],
+        chunk_size: int = LOOKUP_CHUNK_SIZE,
+        ordered: bool = True,
+        fields: Iterable[str] = None,
+        raw: bool = False,
+    ) -> Iterator[Tuple[str, Optional[Any]]]:
+        """
+        Streams the transactions with the given hashes, yielding a
+        (hash, transaction) pair for each, where the transaction is None if
+        no transaction with that hash was logged.
+
+        Hashes are looked up chunk_size at a time with one $in query on the
+        tx index, and the next chunk is fetched while the current one is
+        being consumed. If ordered, pairs are yielded in the order of hashes,
+        repeating any repeated hash. Otherwise, each chunk's transactions
+        are yielded as they arrive from the server, followed by its missing
+        hashes, and repeated hashes are only yielded once per chunk.
+        fields and raw are as for get_block, except that the tx field is
+        always returned.
+        """
+        projection = _projection(fields)
+        if projection is not None:
+            projection["tx"] = 1
+        collection = self.__collection(raw)
+
+        def fetch(chunk: List[str]) -> Dict[str, Any]:
+            found = {}
+            query = {"tx": {"$in": list(dict.fromkeys(chunk))}}
+            for tx in collection.find(query, projection).batch_size(len(chunk)):
+                found.setdefault(tx["tx"], tx)
+            return found
+
+        hashes = iter(hashes)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            chunk = list(islice(hashes, chunk_size))
+            pending = executor.submit(fetch, chunk) if chunk else None
+
+            while pending is not None:
+                current, found = chunk, pending.result()
+                chunk = list(islice(hashes, chunk_size))
+                pending = executor.submit(fetch, chunk) if chunk else None
+
+                if ordered:
+                    for tx_hash in current:
+                        yield tx_hash, found.get(tx_hash)
+                else:
+                    yield from found.items()
+                    for tx_hash in dict.fromkeys(current):
+                        if tx_hash not in found:
+                            yield tx_hash, None
+
+    def get_random_txs(
+        self, n: int = 1, fields: Iterable[str] = None, raw: bool = False
+    ):
+        """Returns n random transactions. fields and raw are as for get_block."""
+        pipeline = [{"$sample": {"size": n}}]
+        if fields is not None:
+            pipeline.append({"$project": _projection(fields)})
+        return list(self.__collection(raw).aggregate(pipeline))
+
+    def sample_txs(
+        self,
+        n: int,
+        seed: int = 0,
+        strata: Iterable[Stratum] = None,
+        fields: Iterable[str] = None,
+        raw: bool = False,
+    ) -> List[Any]:
+        """
+        Returns a reproducible sample of n transactions from each of the
+        given strata, or n from all transactions if strata is None.
+
+        Every transaction has a sample key derived from its hash, which
+        orders transactions pseudo-randomly. The seed picks a point in that
+        order, and each stratum's sample is the n transactions that follow
+        it, wrapping around, read in sample key order off the index of
+        SAMPLE_INDEXES that best fits the stratum. The same seed therefore
+        always returns the same transactions, as long as none are added.
+        fields and raw are as for get_block.
+        """
+        collection = self.__collection(raw)
+        projection = _projection(fields)
+        start = seed_key(seed)
+
+        txs = []
+        for stratum in [Stratum()] if strata is None else strata:
+            query = stratum.query()
+            sample = []
+            for keys in ({"$gte": start}, {"$lt": start}):
+                if len(sample) < n:
+                    sample.extend(
+                        collection.find({**query, "samplekey": keys}, projection)
+                        .sort("samplekey", ASCENDING)
+                        .limit(n - len(sample))
+                    )
+            txs.extend(sample)
+
+        return txs
+
+    def ensure_sample_keys(self, batch_size: int = 1000) -> int:
+        """
+        Adds the samplekey and tracesize fields to any transactions logged
+        without them, and creates the SAMPLE_INDEXES that sample_txs draws
+        through. Returns the number of transactions given a sample key.
+        """
+        # Op counts are computed on the server, so traces are not transferred
+        self.collection.update_many(
+            {"tracesize": {"$exists": False}, "optrace": {"$type": "string"}},
+            [{"$set": {"tracesize": {"$size": {"$split": ["$optrace", "\n"]}}}}],
+        )
+
+        count = 0
+        updates = []
+        for tx in self.collection.find(
+            {"samplekey": {"$exists": False}}, {"tx": 1}
+        ).batch_size(batch_size):
+            key = sample_key(tx["tx"])
+            updates.append(UpdateOne({"_id": tx["_id"]}, {"$set": {"samplekey": key}}))
+            if len(updates) == batch_size:
+                count += self.collection.bulk_write(updates).modified_count
+                updates = []
+        if updates:
+            count += self.collection.bulk_write(updates).modified_count
+
+        self.collection.create_indexes([IndexModel(keys) for keys in SAMPLE_INDEXES])
+
+        return count
+
+    def __collection(self, raw: bool):
+        return self.raw_collection if raw else self.collection
+
+
+def _projection(fields: Optional[Iterable[str]]) -> Optional[Dict[str, int]]:
+    """Build the projection returning only the given fields, or all if None."""
+    if fields is None:
+        return None
+    projection = {field: 1 for field in fields}
+    if "_id" not in projection:
+        projection["_id"] = 0
+    return projection
@@ -1,5 +1,47 @@
 """opcodes.py: Definitions of all EVM opcodes, and related utility functions."""
 
+import typing as t
+
+
+class Property:
+    """
+    Bit flags describing the properties of an opcode, as stored in PROPERTIES.
+    Each OpCode predicate tests exactly one of these flags.
+    """
+
+    KIND_ONE = 1 << 0
+    """No stack arguments, but dynamic info from geth, such as CALLVALUE."""
+    KIND_TWO = 1 << 1
+    """Stack arguments and dynamic info from geth, such as CALLDATALOAD."""
+    KIND_THREE_LOAD = 1 << 2
+    """Storage loads: SLOAD."""
+    KIND_THREE_STORE_ONE = 1 << 3
+    """Memory and storage stores: MSTORE, MSTORE8 and SSTORE."""
+    KIND_THREE_STORE_TWO = 1 << 4
+    """Copies of dynamic data into memory, such as CALLDATACOPY."""
+    KIND_FOUR = 1 << 5
+    """The four call opcodes."""
+    KIND_FIVE = 1 << 6
+    """The two create opcodes."""
+    PUSH = 1 << 7
+    SWAP = 1 << 8
+    DUP = 1 << 9
+    LOG = 1 << 10
+    MISSING = 1 << 11
+    """Byte values with no opcode defined."""
+    INVALID = 1 << 12
+    """INVALID and every missing opcode."""
+    ARITHMETIC = 1 << 13
+    """Results that can be calculated from the inputs alone."""
+    MEMORY = 1 << 14
+    STORAGE = 1 << 15
+    CALL = 1 << 16
+    """Calls to an external contract."""
+    ALTERS_FLOW = 1 << 17
+    EXCEPTION = 1 << 18
+    HALTS = 1 << 19
+    POSSIBLY_HALTS = 1 << 20
+
 
 class OpCode:
     """An EVM opcode."""
@@ -38,68 +80,33 @@ class OpCode:
     # Special cases for kind one, such as CALLVALUE
     # Those opcodes do not need anything from stack, but will give related dynamic info
     def is_kind_one(self) -> bool:
-        special = {
-            ADDRESS.name,
-            ORIGIN.name,
-            CALLER.name,
-            CALLVALUE.name,
-            CALLDATASIZE.name,
-            CODESIZE.name,
-            GASPRICE.name,
-            RETURNDATASIZE.name,
-            COINBASE.name,
-            TIMESTAMP.name,
-            NUMBER.name,
-            DIFFICULTY.name,
-            GASLIMIT.name,
-            PC.name,
-            MSIZE.name,
-            GAS.name,
-        }
-        return self.name in special
+        return PROPERTIES[self.code] & Property.KIND_ONE != 0
 
     # Special cases for kind two, such as CALLDATALOAD
     # Need one or more stack arguments and related dynamic info
     def is_kind_two(self) -> bool:
-        special = {
-            SHA3.name,
-            BALANCE.name,
-            CALLDATALOAD.name,
-            EXTCODESIZE.name,
-            BLOCKHASH.name,
-        }
-        return self.name in special
+        return PROPERTIES[self.code] & Property.KIND_TWO != 0
 
     # Special cases for part of kind three load, SLOAD
     def is_kind_three_load(self) -> bool:
-        special = {SLOAD.name}
-        return self.name in special
+        return PROPERTIES[self.code] & Property.KIND_THREE_LOAD != 0
 
     # Special cases for part of kind three store, like MSTORE
     def is_kind_three_store_one(self) -> bool:
-        special = {MSTORE.name, MSTORE8.name, SSTORE.name}
-        return self.name in special
+        return PROPERTIES[self.code] & Property.KIND_THREE_STORE_ONE != 0
 
     # Special cases for some other store operations, they are special
     # since they do need some arguments from the stack and then get the related data
     # to store them into the memory
     def is_kind_three_store_two(self) -> bool:
-        special = {
-            CALLDATACOPY.name,
-            CODECOPY.name,
-            EXTCODECOPY.name,
-            RETURNDATACOPY.name,
-        }
-        return self.name in special
+        return PROPERTIES[self.code] & Property.KIND_THREE_STORE_TWO != 0
 
     # Special cases for four call opcodes
     def is_kind_four(self) -> bool:
-        special = {CALL.name, CALLCODE.name, DELEGATECALL.name, STATICCALL.name}
-        return self.name in special
+        return PROPERTIES[self.code] & Property.KIND_FOUR != 0
 
     def is_kind_five(self) -> bool:
-        special = {CREATE.name, CREATE2.name}
-        return self.name in special
+        return PROPERTIES[self.code] & Property.KIND_FIVE != 0
 
     def op_pc_gap(self) -> int:
         if self.is_push():
@@ -109,79 +116,57 @@ class OpCode:
 
     def is_push(self) -> bool:
         """Predicate: opcode is a push operation."""
-        return PUSH1.code <= self.code <= PUSH32.code
+        return PROPERTIES[self.code] & Property.PUSH != 0
 
     def is_swap(self) -> bool:
         """Predicate: opcode is a swap operation."""
-        return SWAP1.code <= self.code <= SWAP16.code
+        return PROPERTIES[self.code] & Property.SWAP != 0
 
     def is_dup(self) -> bool:
         """Predicate: opcode is a dup operation."""
-        return DUP1.code <= self.code <= DUP16.code
+        return PROPERTIES[self.code] & Property.DUP != 0
 
     def is_log(self) -> bool:
         """Predicate: opcode is a log operation."""
-        return LOG0.code <= self.code <= LOG4.code
+        return PROPERTIES[self.code] & Property.LOG != 0
 
     def is_missing(self) -> bool:
-        return self.code not in BYTECODES
+        return PROPERTIES[self.code] & Property.MISSING != 0
 
     def is_invalid(self) -> bool:
-        return (self.code == INVALID.code) or self.is_missing()
+        return PROPERTIES[self.code] & Property.INVALID != 0
 
     def is_arithmetic(self) -> bool:
         """Predicate: opcode's result can be calculated from its inputs alone."""
-        return (ADD.code <= self.code <= SIGNEXTEND.code) or (
-            LT.code <= self.code <= BYTE.code
-        )
+        return PROPERTIES[self.code] & Property.ARITHMETIC != 0
 
     def is_memory(self) -> bool:
         """Predicate: opcode operates on memory"""
-        return MLOAD.code <= self.code <= MSTORE8.code
+        return PROPERTIES[self.code] & Property.MEMORY != 0
 
     def is_storage(self) -> bool:
         """Predicate: opcode operates on storage ('the tape')"""
-        return SLOAD.code <= self.code <= SSTORE.code
+        return PROPERTIES[self.code] & Property.STORAGE != 0
 
     def is_call(self) -> bool:
         """Predicate: opcode calls an external contract"""
-        return self in (
-            CALL,
-            CALLCODE,
-            DELEGATECALL,
-            STATICCALL,
-        )
+        return PROPERTIES[self.code] & Property.CALL != 0
 
     def alters_flow(self) -> bool:
         """Predicate: opcode alters EVM control flow."""
-        return (
-            self.code
-            in (
-                JUMP.code,
-                JUMPI.code,
-            )
-        ) or self.possibly_halts()
+        return PROPERTIES[self.code] & Property.ALTERS_FLOW != 0
 
     def is_exception(self) -> bool:
         """Predicate: opcode causes the EVM to throw an exception."""
-        return (
-            self.code in (THROW.code, THROWI.code, REVERT.code)
-        ) or self.is_invalid()
+        return PROPERTIES[self.code] & Property.EXCEPTION != 0
 
     def halts(self) -> bool:
         """Predicate: opcode causes the EVM to halt."""
-        halt_codes = (
-            STOP.code,
-            RETURN.code,
-            SELFDESTRUCT.code,
-            THROW.code,
-            REVERT.code,
-        )
-        return (self.code in halt_codes) or self.is_invalid()
+        return PROPERTIES[self.code] & Property.HALTS != 0
 
     def possibly_halts(self) -> bool:
         """Predicate: opcode MAY cause the EVM to halt. (halts + THROWI)"""
-        return self.halts() or self.code == THROWI.code
+        return PROPERTIES[self.code] & Property.POSSIBLY_HALTS != 0
 
     def push_len(self) -> int:
         """Return the number of bytes the given PUSH instruction pushes."""
@@ -219,6 +204,9 @@ OR = OpCode("OR", 0x17, 2, 1)
 XOR = OpCode("XOR", 0x18, 2, 1)
 NOT = OpCode("NOT", 0x19, 1, 1)
 BYTE = OpCode("BYTE", 0x1A, 2, 1)
+SHL = OpCode("SHL", 0x1B, 2, 1)
+SHR = OpCode("SHR", 0x1C, 2, 1)
+SAR = OpCode("SAR", 0x1D, 2, 1)
 
 SHA3 = OpCode("KECCAK256", 0x20, 2, 1)
 
@@ -258,6 +246,7 @@ PC = OpCode("PC", 0x58, 0, 1)
 MSIZE = OpCode("MSIZE", 0x59, 0, 1)
 GAS = OpCode("GAS", 0x5A, 0, 1)
 JUMPDEST = OpCode("JUMPDEST", 0x5B, 0, 0)
+PUSH0 = OpCode("PUSH0", 0x5F, 0, 1)
 
 PUSH1 = OpCode("PUSH1", 0x60, 0, 1)
 PUSH2 = OpCode("PUSH2", 0x61, 0, 1)
@@ -367,6 +356,107 @@ OPCODES["TXGASPRICE"] = OPCODES["GASPRICE"]
 BYTECODES = {code.code: code for code in OPCODES.values()}
 """Dictionary mapping of byte values to EVM OpCode objects"""
 
+PSEUDO_CODES = -min(BYTECODES)
+"""
+The number of negative codes of the TAC operations, numbered down from -1,
+which are stored at the end of PROPERTIES so that they can be indexed by
+their code.
+"""
+
+
+def _build_properties() -> t.List[int]:
+    """Build the PROPERTIES table from the opcodes defined above."""
+    table = [0] * (256 + PSEUDO_CODES)
+
+    def mark(flag: int, ops: t.List[OpCode]) -> None:
+        for op in ops:
+            table[op.code] |= flag
+
+    mark(
+        Property.KIND_ONE,
+        [
+            ADDRESS,
+            ORIGIN,
+            CALLER,
+            CALLVALUE,
+            CALLDATASIZE,
+            CODESIZE,
+            GASPRICE,
+            RETURNDATASIZE,
+            COINBASE,
+            TIMESTAMP,
+            NUMBER,
+            DIFFICULTY,
+            GASLIMIT,
+            PC,
+            MSIZE,
+            GAS,
+        ],
+    )
+    mark(Property.KIND_TWO, [SHA3, BALANCE, CALLDATALOAD, EXTCODESIZE, BLOCKHASH])
+    mark(Property.KIND_THREE_LOAD, [SLOAD])
+    mark(Property.KIND_THREE_STORE_ONE, [MSTORE, MSTORE8, SSTORE])
+    mark(
+        Property.KIND_THREE_STORE_TWO,
+        [CALLDATACOPY, CODECOPY, EXTCODECOPY, RETURNDATACOPY],
+    )
+    mark(Property.KIND_FOUR, [CALL, CALLCODE, DELEGATECALL, STATICCALL])
+    mark(Property.KIND_FIVE, [CREATE, CREATE2])
+    mark(Property.CALL, [CALL, CALLCODE, DELEGATECALL, STATICCALL])
+
+    for op in BYTECODES.values():
+        if PUSH1.code <= op.code <= PUSH32.code:
+            table[op.code] |= Property.PUSH
+        if SWAP1.code <= op.code <= SWAP16.code:
+            table[op.code] |= Property.SWAP
+        if DUP1.code <= op.code <= DUP16.code:
+            table[op.code] |= Property.DUP
+        if LOG0.code <= op.code <= LOG4.code:
+            table[op.code] |= Property.LOG
+        if (ADD.code <= op.code <= SIGNEXTEND.code) or (
+            LT.code <= op.code <= SAR.code
+        ):
+            table[op.code] |= Property.ARITHMETIC
+        if MLOAD.code <= op.code <= MSTORE8.code:
+            table[op.code] |= Property.MEMORY
+        if SLOAD.code <= op.code <= SSTORE.code:
+            table[op.code] |= Property.STORAGE
+
+    for code in range(-PSEUDO_CODES, 256):
+        if code not in BYTECODES:
+            table[code] |= Property.MISSING | Property.INVALID
+    mark(Property.INVALID, [INVALID])
+
+    # Exceptions, halts and flow changes are derived from the flags above.
+    mark(Property.EXCEPTION, [THROW, THROWI, REVERT])
+    mark(Property.HALTS, [STOP, RETURN, SELFDESTRUCT, THROW, REVERT])
+    mark(Property.POSSIBLY_HALTS, [THROWI])
+    mark(Property.ALTERS_FLOW, [JUMP, JUMPI])
+    for code in range(-PSEUDO_CODES, 256):
+        if table[code] & Property.INVALID:
+            table[code] |= Property.EXCEPTION | Property.HALTS
+        if table[code] & Property.HALTS:
+            table[code] |= Property.POSSIBLY_HALTS
+        if table[code] & Property.POSSIBLY_HALTS:
+            table[code] |= Property.ALTERS_FLOW
+
+    return table
+
+
+PROPERTIES = _build_properties()
+"""
+Property flags of every opcode, indexed by instruction byte, so that an
+opcode is classified with a single index and bit test, e.g.
+PROPERTIES[op.code] & Property.PUSH. TAC operations have negative codes and
+so are found at the end of the table.
+"""
+
+NAMES = {**OPCODES, **{name.lower(): op for name, op in OPCODES.items()}}
+"""
+Dictionary mapping opcode names, in upper or lower case, to EVM OpCode
+objects, so that trace names can be resolved without converting case.
+"""
+
 
 def opcode_by_name(name: str) -> OpCode:
     """
@@ -374,6 +464,9 @@ def opcode_by_name(name: str) -> OpCode:
     Throws:
       LookupError: if there is no opcode defined with the given name.
     """
+    if name in NAMES:
+        return NAMES[name]
+
     name = name.upper()
     if name not in OPCODES:
         raise LookupError("No opcode named '{}'.".format(name))
@@ -0,0 +1,402 @@
+"""optrace.py: Columnar parsing of the op traces logged by mgologger."""
+
+from array import array
+import binascii
+import itertools
+import operator
+import sys
+import typing as t
+
+import decompiler.opcodes as opcodes
+
+FIELDS = 7
+"""
+The number of comma-separated fields on each op trace line:
+pc, callindex, depth, opcode, gas, cost, output
+"""
+
+_CODE_BY_NAME = {
+    key: op.code
+    for name, op in opcodes.NAMES.items()
+    if 0 <= op.code <= 0xFF
+    for key in (name, name.encode())
+}
+"""
+Byte value of every EVM opcode, keyed by the name geth logs it under, both
+as a str and as bytes.
+"""
+
+_SYNTAX = {
+    str: ("\n", ",", ":", "0x", " \t\r"),
+    bytes: (b"\n", b",", b":", b"0x", b" \t\r"),
+}
+"""
+The line separator, field separator, extra separator, hex prefix and
+whitespace characters of op traces held as str and as bytes.
+"""
+
+CHUNK_SIZE = 1 << 16
+"""Approximate number of characters of op trace parsed at once when streaming."""
+
+BINARY_MAGIC = b"OPT1"
+"""
+The first bytes of every binary op trace, as written by mgologger to the
+optracebin field. The rest of the trace is laid out column by column, with
+all integers little-endian:
+
+  uint32 n
+  uint64 gas[n], uint64 cost[n], uint32 pc[n], uint32 callindex[n]
+  uint32 out_offsets[n + 1], uint16 depth[n], uint8 opcode[n], output bytes
+"""
+
+_BINARY_COLUMNS = [
+    ("gas", "Q", 0),
+    ("cost", "Q", 0),
+    ("pc", "I", 0),
+    ("call_index", "I", 0),
+    ("out_offsets", "I", 1),
+    ("depth", "H", 0),
+    ("opcode", "B", 0),
+]
+"""The name, item format and excess length of each binary op trace column."""
+
+
+class OpTraceColumns:
+    """
+    A parsed op trace held as parallel typed arrays, with one entry per
+    executed op, rather than as one Python object per op.
+
+    Integer fields are held in arrays indexed by position in the trace. The
+    output of every op is stored as raw bytes in a single shared buffer, with
+    op i owning out_buffer[out_offsets[i]:out_offsets[i + 1]]; values are
+    only turned into Python ints when they are asked for.
+
+    Nothing in the decompiler reads gas or cost, so these may be given as
+    the raw decimal fields, which are then only converted on first access.
+    """
+
+    def __init__(
+        self,
+        pc: t.Sequence[int],
+        call_index: t.Sequence[int],
+        depth: t.Sequence[int],
+        opcode: t.Sequence[int],
+        gas: t.Sequence[t.Union[int, str]],
+        cost: t.Sequence[t.Union[int, str]],
+        out_offsets: t.Sequence[int],
+        out_buffer: bytes,
+        extras: t.Dict[int, bytes] = None,
+    ):
+        """
+        Args:
+          pc: program counter of each op.
+          call_index: call index of each op, as logged by geth.
+          depth: call depth of each op, as logged by geth.
+          opcode: instruction byte of each op.
+          gas: gas remaining before each op executed.
+          cost: gas cost of each op.
+          out_offsets: len(pc) + 1 offsets delimiting each op's output
+                       within out_buffer.
+          out_buffer: the concatenated big-endian output bytes of every op.
+          extras: the extra value logged after a ":" in the output field,
+                  keyed by op position. Only present for ops that logged one.
+        """
+        self.pc = pc
+        self.call_index = call_index
+        self.depth = depth
+        self.opcode = opcode
+        self.__gas = gas
+        self.__cost = cost
+        self.out_offsets = out_offsets
+        self.out_buffer = out_buffer
+        self.extras = {} if extras is None else extras
+        self.outputs = OpOutputs(out_offsets, out_buffer, self.extras)
+
+    def __len__(self):
+        return len(self.pc)
+
+    @property
+    def gas(self) -> t.Sequence[int]:
+        if isinstance(self.__gas, list):
+            self.__gas = array("q", list(map(int, self.__gas)))
+        return self.__gas
+
+    @property
+    def cost(self) -> t.Sequence[int]:
+        if isinstance(self.__cost, list):
+            self.__cost = array("q", list(map(int, self.__cost)))
+        return self.__cost
+
+    def output(self, i: int) -> bytes:
+        """Return the raw output bytes of the i'th op."""
+        return self.outputs.output(i)
+
+    def value(self, i: int) -> int:
+        """Return the output of the i'th op, decoded as a big-endian int."""
+        return self.outputs.value(i)
+
+    def extra(self, i: int) -> t.Optional[int]:
+        """Return the extra value logged by the i'th op, or None."""
+        return self.outputs.extra(i)
+
+
+class OpOutputs:
+    """
+    The raw outputs of every op in an OpTraceColumns, kept apart from the
+    other columns so that ops can hold on to their undecoded output without
+    keeping the rest of the trace alive.
+    """
+
+    def __init__(
+        self,
+        out_offsets: t.Sequence[int],
+        out_buffer: bytes,
+        extras: t.Dict[int, bytes],
+    ):
+        self.out_offsets = out_offsets
+        self.out_buffer = out_buffer
+        self.extras = extras
+
+        self.base = 0
+        """
+        The position in the whole trace of the first op held here, for ops
+        that refer back to their output by trace position.
+        """
+
+    def output(self, i: int) -> bytes:
+        """Return the raw output bytes of the i'th op."""
+        return self.out_buffer[self.out_offsets[i] : self.out_offsets[i + 1]]
+
+    def value(self, i: int) -> int:
+        """Return the output of the i'th op, decoded as a big-endian int."""
+        return int.from_bytes(
+            self.out_buffer[self.out_offsets[i] : self.out_offsets[i + 1]], "big"
+        )
+
+    def extra(self, i: int) -> t.Optional[int]:
+        """Return the extra value logged by the i'th op, or None."""
+        extra = self.extras.get(i)
+        return None if extra is None else int.from_bytes(extra, "big")
+
+
+def parse_optrace(text: t.Union[str, bytes]) -> OpTraceColumns:
+    """
+    Parse a newline-separated op trace into an OpTraceColumns.
+
+    The whole trace is split into fields in a single pass, and each column is
+    then converted in bulk, rather than splitting and converting line by line.
+    Traces with blank lines or stray whitespace are accepted, but take a
+    slower line-wise path to normalise them first.
+
+    The trace may also be given as ASCII bytes, such as the optrace field of
+    a mgofetcher.RawTraceDocument, and is then parsed without ever being
+    decoded into a str.
+
+    Throws:
+      LookupError: if the trace names an opcode that does not exist.
+    """
+    if not isinstance(text, str):
+        text = bytes(text)
+    newline, comma, colon, _, whitespace = _SYNTAX[type(text)]
+
+    if text[:1].isspace() or text[-1:].isspace():
+        text = text.strip()
+    if len(text) == 0:
+        return _from_fields([], False)
+
+    fields = None
+    if not any(c in text for c in whitespace):
+        fields = text.replace(newline, comma).split(comma)
+        if len(fields) != FIELDS * (text.count(newline) + 1):
+            fields = None
+
+    if fields is None:
+        fields = [
+            field
+            for line in text.split(newline)
+            if len(line.strip()) > 0
+            for field in line.strip().split(comma)
+        ]
+
+    return _from_fields(fields, colon in text)
+
+
+def iter_optrace(
+    trace: t.Union[str, bytes, t.Iterable[str], t.Iterable[bytes]],
+    chunk_size: int = CHUNK_SIZE,
+) -> t.Iterator[OpTraceColumns]:
+    """
+    Parse an op trace incrementally, yielding one OpTraceColumns for each
+    chunk of roughly chunk_size characters. Chunks always end on a line
+    boundary, and empty chunks are skipped.
+
+    Args:
+      trace: a newline-separated op trace, as a str or as ASCII bytes, or an
+             iterable of its lines, such as an open file.
+      chunk_size: the number of characters to parse at once.
+    """
+    if isinstance(trace, (str, bytes)):
+        newline = _SYNTAX[type(trace)][0]
+        start = 0
+        while start < len(trace):
+            stop = trace.find(newline, start + chunk_size)
+            stop = len(trace) if stop < 0 else stop + 1
+            columns = parse_optrace(trace[start:stop])
+            start = stop
+            if len(columns) > 0:
+                yield columns
+        return
+
+    chunk = []
+    size = 0
+    line_end = None
+    for line in trace:
+        if line_end is None:
+            line_end = b"\r\n" if isinstance(line, bytes) else "\r\n"
+        chunk.append(line.rstrip(line_end))
+        size += len(line)
+        if size >= chunk_size:
+            columns = parse_optrace(line_end[1:].join(chunk))
+            chunk = []
+            size = 0
+            if len(columns) > 0:
+                yield columns
+
+    if len(chunk) > 0:
+        columns = parse_optrace(line_end[1:].join(chunk))
+        if len(columns) > 0:
+            yield columns
+
+
+def read_binary(data: t.Union[bytes, memoryview]) -> OpTraceColumns:
+    """
+    Read a binary op trace, as described by BINARY_MAGIC.
+
+    On little-endian machines every column is a memoryview directly into
+    data, so no part of the trace is copied or decoded up front.
+
+    Throws:
+      ValueError: if data is not a binary op trace.
+    """
+    view = memoryview(data).cast("B")
+    if view[: len(BINARY_MAGIC)] != BINARY_MAGIC or len(view) < 8:
+        raise ValueError("Not a binary op trace")
+
+    n = int.from_bytes(view[4:8], "little")
+    pos = 8
+    columns = {}
+    for name, fmt, excess in _BINARY_COLUMNS:
+        size = array(fmt).itemsize * (n + excess)
+        if pos + size > len(view):
+            raise ValueError("Truncated binary op trace")
+        columns[name] = _column(view[pos : pos + size], fmt)
+        pos += size
+
+    columns["out_buffer"] = view[pos:]
+    if len(columns["out_buffer"]) != columns["out_offsets"][n]:
+        raise ValueError("Truncated binary op trace")
+
+    return OpTraceColumns(**columns)
+
+
+def write_binary(columns: OpTraceColumns) -> bytes:
+    """
+    Encode an OpTraceColumns as a binary op trace, as described by
+    BINARY_MAGIC. Extra values logged after a ":" are not encoded.
+    """
+    parts = [BINARY_MAGIC, len(columns).to_bytes(4, "little")]
+    for name, fmt, _ in _BINARY_COLUMNS:
+        column = array(fmt, getattr(columns, name))
+        if sys.byteorder != "little":
+            column.byteswap()
+        parts.append(column.tobytes())
+    parts.append(bytes(columns.out_buffer))
+
+    return b"".join(parts)
+
+
+def _column(view: memoryview, fmt: str) -> t.Sequence[int]:
+    """View little-endian bytes as a column of fmt items."""
+    if sys.byteorder == "little":
+        return view.cast(fmt)
+
+    column = array(fmt, view.tobytes())
+    column.byteswap()
+    return column
+
+
+def _from_fields(
+    fields: t.List[t.Union[str, bytes]], has_extras: bool
+) -> OpTraceColumns:
+    """
+    Convert a flat list of op trace fields, all either str or bytes, into
+    typed columns.
+    has_extras must be True if any output field holds a ":"-separated extra.
+    """
+    _, _, colon, prefix, _ = _SYNTAX[type(fields[0]) if fields else str]
+
+    names = fields[3::FIELDS]
+    try:
+        opcode = array("B", map(_CODE_BY_NAME.__getitem__, names))
+    except KeyError:
+        opcode = array(
+            "B",
+            (
+                opcodes.opcode_by_name(
+                    name if isinstance(name, str) else name.decode("ascii")
+                ).code
+                for name in names
+            ),
+        )
+
+    outputs = fields[6::FIELDS]
+    extras = {}
+    if has_extras:
+        for i in [i for i, out in enumerate(outputs) if colon in out]:
+            outputs[i], extra = outputs[i].split(colon, 1)
+            if extra != prefix:
+                extras[i] = _hex_bytes([extra], prefix)[0]
+    out_buffer, out_offsets = _hex_bytes(outputs, prefix)
+
+    return OpTraceColumns(
+        pc=array("q", list(map(int, fields[0::FIELDS]))),
+        call_index=array("q", list(map(int, fields[1::FIELDS]))),
+        depth=array("q", list(map(int, fields[2::FIELDS]))),
+        opcode=opcode,
+        gas=fields[4::FIELDS],
+        cost=fields[5::FIELDS],
+        out_offsets=out_offsets,
+        out_buffer=out_buffer,
+        extras=extras,
+    )
+
+
+def _hex_bytes(
+    outputs: t.List[t.AnyStr], prefix: t.AnyStr = "0x"
+) -> t.Tuple[bytes, t.Sequence[int]]:
+    """
+    Decode a list of 0x-prefixed hex strings, given as str or as bytes along
+    with the matching prefix, into one concatenated buffer, returning the
+    buffer and the len(outputs) + 1 offsets delimiting each decoded string
+    within it. Odd-length strings take a leading zero digit.
+    """
+    # Hex digits never contain an "x", so splitting the joined strings on
+    # "0x" recovers each string's digits without a per-string pass.
+    empty = prefix[:0]
+    digits = empty.join(outputs).split(prefix)
+    del digits[0]
+    if len(digits) != len(outputs):
+        prefixes = (prefix, prefix.upper())
+        digits = [out[2:] if out[:2] in prefixes else out for out in outputs]
+    offsets = array("q", itertools.accumulate(map(len, digits), initial=0))
+
+    # Every offset is even unless some string has an odd number of digits.
+    if any(map((1).__and__, offsets)):
+        zero = prefix[:1]
+        digits = [zero + d if len(d) & 1 else d for d in digits]
+        offsets = array("q", itertools.accumulate(map(len, digits), initial=0))
+
+    unhex = bytes.fromhex if isinstance(prefix, str) else binascii.unhexlify
+    return unhex(empty.join(digits)), array(
+        "q", map(operator.rshift, offsets, itertools.repeat(1))
+    )
@@ -32,6 +32,7 @@ objects."""
 
 from collections import defaultdict
 import copy
+import functools
 import logging
 import typing as t
 
@@ -39,6 +40,7 @@ import decompiler.cfg as cfg
 import decompiler.evm_cfg as evm_cfg
 import decompiler.memtypes as mem
 import decompiler.opcodes as opcodes
+import decompiler.optrace as optrace
 import decompiler.patterns as patterns
 import decompiler.settings as settings
 from decompiler.lattice import SubsetLatticeElement as ssle
@@ -55,13 +57,32 @@ trim_0x_to_int = (
 )
 
 
+def trace_chunks(trace: t.Dict) -> t.Iterable[optrace.OpTraceColumns]:
+    """
+    Return the parsed op trace of a transaction, as consecutive chunks of
+    optrace.OpTraceColumns, reading its binary "optracebin" field if it has
+    one and parsing its "optrace" text incrementally otherwise.
+    """
+    if trace.get("optracebin") is not None:
+        return [optrace.read_binary(trace["optracebin"])]
+    elif trace["optrace"] is None:
+        logging.error("No logs contained within the current trace")
+        sys.exit(1)
+    return optrace.iter_optrace(trace["optrace"])
+
+
 class TACGraph(cfg.ControlFlowGraph):
     """
     A control flow graph holding Three-Address Code blocks and
     the edges between them.
     """
 
-    def __init__(self, evm_blocks: t.Iterable[evm_cfg.EVMBasicBlock], to_addr: str):
+    def __init__(
+        self,
+        evm_blocks: t.Iterable[evm_cfg.EVMBasicBlock],
+        to_addr: str,
+        concrete: bool = True,
+    ):
         """
         Construct a TAC control flow graph from a given sequence of EVM blocks.
         Immediately after conversion, constants will be propagated and folded
@@ -70,13 +91,20 @@ class TACGraph(cfg.ControlFlowGraph):
 
         Args:
           evm_blocks: an iterable of EVMBasicBlocks to convert into TAC form.
+                      Each block is converted as soon as it is produced, so
+                      this may be a generator such as evm_cfg.iter_blocks.
+          concrete: if True, the default, variables are
+                    mem.ConcreteVariables holding a single int, as the values
+                    of a trace are, and are folded without value sets. Every
+                    value geth records is concrete, so this is only turned
+                    off to compare against the mem.Variable value sets.
         """
         super().__init__()
 
         stacks = []
 
         # Convert the input EVM blocks to TAC blocks.
-        destack = Destackifier()
+        destack = Destackifier(concrete)
 
         for b in evm_blocks:
             tac_block = destack.convert_block(b, stacks)
@@ -101,7 +129,14 @@ class TACGraph(cfg.ControlFlowGraph):
         """
 
         self.stack = defaultdict(dict)
-        self.memory = bytearray()
+
+        self.memory: t.DefaultDict[int, mem.PagedMemory] = defaultdict(
+            mem.PagedMemory
+        )
+        """
+        The memory of each call frame, keyed by the frame index of its blocks.
+        A frame's memory is left as it is once the frame ends.
+        """
 
         # Propagate constants and add CFG edges.
         self.apply_operations()
@@ -112,51 +147,21 @@ class TACGraph(cfg.ControlFlowGraph):
         self.connect_blocks()
 
     @classmethod
-    def from_trace(cls, trace: t.Iterable) -> "TACGraph":
+    def from_trace(cls, trace: t.Iterable, concrete: bool = True) -> "TACGraph":
         """
         Construct and return a TACGraph from the given Geth optrace.
 
         Args:
-          trace: a sequence of geth optraces that are newline-separated
+          trace: a sequence of geth optraces that are newline-separated, or
+                 an iterable of optrace lines such as an open file. If the
+                 trace also has a binary "optracebin" field, as logged by
+                 mgologger with --mongo.encoding binary, that is read instead.
+          concrete: as in TACGraph.__init__.
         """
-
-        ops = []
-
-        if trace["optrace"] is None:
-            logging.error("No logs contained within the current trace")
-            sys.exit(1)
-
-        optrace = trace["optrace"].split("\n")
-
-        to = trace["to"]
-
-        for index, l in enumerate(optrace):
-            if len(l.strip()) > 0:
-                args = l.strip().split(",")
-                pc = int(args[0])
-                call_index = int(args[1])
-                opcode = opcodes.opcode_by_name(args[3])
-                depth = int(args[2])
-
-                val_str = args[6]
-
-                value = None  # parsing as hex string
-                extra = None
-
-                if ":" in val_str:
-                    if val_str.split(":")[1] != "0x":
-                        extra = int(val_str.split(":")[1], 16)
-                    value = int(val_str.split(":")[0], 16)
-                elif val_str != "0x":
-                    value = int(val_str, 16)
-                elif val_str == "0x":
-                    value = 0
-
-                ops.append(
-                    evm_cfg.EVMOp(pc, opcode, value, depth, call_index, index, extra)
-                )
-
-        return cls(evm_cfg.blocks_from_ops(ops), to)
+        # Blocks are parsed and converted to TAC one chunk at a time, so
+        # the complete list of EVMOps is never held in memory at once.
+        chunks = trace_chunks(trace)
+        return cls(evm_cfg.iter_blocks(chunks), trace["to"], concrete)
 
     @property
     def tac_ops(self):
@@ -194,7 +199,7 @@ class TACGraph(cfg.ControlFlowGraph):
         combinations of values.
         """
         for block in self.blocks:
-            block.apply_operations(self.stack, self.memory, use_sets)
+            block.apply_operations(self.stack, self.memory[block.frame], use_sets)
 
     def resolve_addresses(self) -> None:
         """
@@ -220,7 +225,7 @@ class TACBasicBlock(evm_cfg.EVMBasicBlock):
         exit_pc: int,
         tac_ops: t.List["TACOp"],
         evm_ops: t.List[evm_cfg.EVMOp],
-        delta_stack: mem.VariableStack,
+        delta_stack: mem.TraceStack,
         cfg=None,
     ):
         """
@@ -273,6 +278,13 @@ class TACBasicBlock(evm_cfg.EVMBasicBlock):
         analysis of this block.
         """
 
+        self.frame = None
+        """
+        The index of the call frame this block belongs to, numbered in the
+        order frames were entered. The blocks of a frame after each call it
+        makes share its index.
+        """
+
         self.cfg = cfg
         """The TACGraph to which this block belongs."""
 
@@ -323,6 +335,7 @@ class TACBasicBlock(evm_cfg.EVMBasicBlock):
         new_block.fallthrough = self.fallthrough
         new_block.has_unresolved_jump = self.has_unresolved_jump
         new_block.symbolic_overflow = self.symbolic_overflow
+        new_block.frame = self.frame
         new_block.entry_stack = copy.deepcopy(self.entry_stack, memodict)
         new_block.exit_stack = copy.deepcopy(self.exit_stack, memodict)
         new_block.preds = copy.copy(self.preds)
@@ -364,7 +377,10 @@ class TACBasicBlock(evm_cfg.EVMBasicBlock):
                     site.block = self
 
     def apply_operations(
-        self, stack: defaultdict(dict) = None, memory: bytearray = None, use_sets=False
+        self,
+        stack: defaultdict(dict) = None,
+        memory: mem.PagedMemory = None,
+        use_sets=False,
     ) -> None:
         """
         Propagate and fold constants through the arithmetic TAC instructions
@@ -375,58 +391,101 @@ class TACBasicBlock(evm_cfg.EVMBasicBlock):
         combinations of values.
         """
         for op in self.tac_ops:
-            if op.opcode == opcodes.CONST:
-                op.lhs.values = op.args[0].value.values
-
-            # Special cases: they both belong to three_store_two.
-            elif (
-                op.opcode == opcodes.CALLDATACOPY
-                or op.opcode == opcodes.CODECOPY
-                or op.opcode == opcodes.RETURNDATACOPY
-            ):
-                destoffset = trim_0x_to_int(op.args[0])
-                length = trim_0x_to_int(op.args[2])
-                value = op.value
-                memory[destoffset : destoffset + length] = value.to_bytes(
-                    length, byteorder="big"
-                )
-            elif op.opcode == opcodes.EXTCODECOPY:
-                destoffset = trim_0x_to_int(op.args[1])
-                length = trim_0x_to_int(op.args[3])
-                value = op.value
-                memory[destoffset : destoffset + length] = value.to_bytes(
-                    length, byteorder="big"
-                )
-
-            # Special cases: cases for kind one and two, but those opcodes are not in three_store
-            # Those opcodes have already had their value assigned to the lhs in the __handal_evm_op
-            elif op.opcode.is_kind_one() or op.opcode.is_kind_two():
-                continue
+            fold = FOLDERS[op.opcode.code]
+            if fold is not None:
+                fold(op, stack, memory, use_sets)
 
-            # Special cases: SLOAD and MLOAD get their value from the geth, and these values have been assigned
-            elif op.opcode == opcodes.MLOAD or op.opcode == opcodes.SLOAD:
-                continue
 
-            # Special cases: SSTORE and MSTORE. Store variable values to the related storage and memory
-            elif op.opcode == opcodes.SSTORE:
-                var_name = "S[{}]".format(op.args[0])
-                var_value = op.args[1].value.values
-                stack[var_name] = var_value
-            elif op.opcode == opcodes.MSTORE:
-                offset = trim_0x_to_int(op.args[0])
-                value = trim_0x_to_int(op.args[1])
-                memory[offset : offset + 32] = value.to_bytes(32, byteorder="big")
-            elif op.opcode == opcodes.MSTORE8:
-                offset = trim_0x_to_int(op.args[0])
-                value = trim_0x_to_int(op.args[1])
-                memory[offset : offset + 1] = value.to_bytes(8, byteorder="big")
-
-            elif op.opcode.is_arithmetic():
-                if op.constant_args() or (op.constrained_args() and use_sets):
-                    rhs = [arg.value for arg in op.args]
-                    op.lhs.values = mem.Variable.arith_op(op.opcode.name, rhs).values
-                elif not op.lhs.is_unconstrained:
-                    op.lhs.widen_to_top()
+def _fold_const(
+    op: "TACAssignOp", stack, memory: mem.PagedMemory, use_sets
+) -> None:
+    op.lhs.values = op.args[0].value.values
+
+
+def _fold_copy(offset_arg: int, length_arg: int) -> t.Callable:
+    """
+    Return the folder of a copy of dynamic data into memory, whose
+    destination offset and length are the given arguments. The data copied
+    is the op's value.
+    """
+
+    def fold(op: "TACOp", stack, memory: mem.PagedMemory, use_sets) -> None:
+        destoffset = trim_0x_to_int(op.args[offset_arg])
+        length = trim_0x_to_int(op.args[length_arg])
+        memory.write_int(destoffset, op.value, length)
+
+    return fold
+
+
+def _fold_sstore(op: "TACOp", stack, memory: mem.PagedMemory, use_sets) -> None:
+    # Store variable values to the related storage
+    var_name = "S[{}]".format(op.args[0])
+    var_value = op.args[1].value.values
+    stack[var_name] = var_value
+
+
+def _fold_mstore(op: "TACOp", stack, memory: mem.PagedMemory, use_sets) -> None:
+    offset = trim_0x_to_int(op.args[0])
+    value = trim_0x_to_int(op.args[1])
+    memory.write_int(offset, value, 32)
+
+
+def _fold_mstore8(op: "TACOp", stack, memory: mem.PagedMemory, use_sets) -> None:
+    offset = trim_0x_to_int(op.args[0])
+    # only the lowest byte of the value is stored
+    value = trim_0x_to_int(op.args[1]) & 0xFF
+    memory.write_int(offset, value, 1)
+
+
+def _fold_arithmetic(func: t.Callable[..., int]) -> t.Callable:
+    """
+    Return the folder of an arithmetic operation computed by func, one of
+    the operations of mem.Variable.
+    """
+
+    def fold(op: "TACAssignOp", stack, memory: mem.PagedMemory, use_sets) -> None:
+        if isinstance(op.lhs, mem.ConcreteVariable):
+            # None, so Top, unless every argument is constant
+            op.lhs.concrete = mem.ConcreteVariable.fold_value(
+                func, [arg.value for arg in op.args]
+            )
+        elif op.constant_args() or (op.constrained_args() and use_sets):
+            rhs = [arg.value for arg in op.args]
+            op.lhs.values = mem.Variable.fold(func, rhs).values
+        elif not op.lhs.is_unconstrained:
+            op.lhs.widen_to_top()
+
+    return fold
+
+
+def _build_folders() -> t.List[t.Optional[t.Callable]]:
+    """Build the FOLDERS table from the opcodes and their properties."""
+    table = [None] * len(opcodes.PROPERTIES)
+
+    for code, op in opcodes.BYTECODES.items():
+        if opcodes.PROPERTIES[code] & opcodes.Property.ARITHMETIC:
+            table[code] = _fold_arithmetic(getattr(mem.Variable, op.name))
+
+    table[opcodes.CONST.code] = _fold_const
+    for op in (opcodes.CALLDATACOPY, opcodes.CODECOPY, opcodes.RETURNDATACOPY):
+        table[op.code] = _fold_copy(0, 2)
+    table[opcodes.EXTCODECOPY.code] = _fold_copy(1, 3)
+    table[opcodes.SSTORE.code] = _fold_sstore
+    table[opcodes.MSTORE.code] = _fold_mstore
+    table[opcodes.MSTORE8.code] = _fold_mstore8
+
+    # Ops with a value from geth, such as CALLVALUE, SLOAD and MLOAD, already
+    # hold it, and the rest have nothing to fold.
+    return table
+
+
+FOLDERS = _build_folders()
+"""
+The function folding each TAC operation into the values of its variables,
+its frame's memory and storage during TACBasicBlock.apply_operations,
+indexed by opcode as opcodes.PROPERTIES is, or None for operations with
+nothing to fold. Each is called as fold(op, stack, memory, use_sets).
+"""
 
 
 class TACOp(patterns.Visitable):
@@ -447,6 +506,7 @@ class TACOp(patterns.Visitable):
         op_index: int = None,
         depth: int = None,
         call_index: int = None,
+        value_source: evm_cfg.EVMOp = None,
     ):
         """
         Args:
@@ -455,17 +515,31 @@ class TACOp(patterns.Visitable):
           pc: the program counter at the corresponding instruction in the
               original bytecode.
           block: the block this operation belongs to. Defaults to None.
+          value_source: the EVMOp whose value this operation takes, which is
+                        then only decoded when value is first read.
         """
         self.opcode = opcode
         self.args = args
         self.pc = pc
         self.block = block
 
-        self.value = value
+        self.__value = value
+        self.__value_source = value_source
         self.op_index = op_index
         self.call_index = call_index
         self.depth = depth
 
+    @property
+    def value(self) -> t.Optional[int]:
+        if self.__value_source is not None:
+            return self.__value_source.value
+        return self.__value
+
+    @value.setter
+    def value(self, value: t.Optional[int]) -> None:
+        self.__value = value
+        self.__value_source = None
+
     def __str__(self):
         if self.opcode in [opcodes.MSTORE, opcodes.MSTORE8, opcodes.SSTORE]:
             if self.opcode == opcodes.MSTORE:
@@ -537,6 +611,7 @@ class TACAssignOp(TACOp):
         op_index: int = None,
         depth: int = None,
         call_index: int = None,
+        extra_source: evm_cfg.EVMOp = None,
     ):
         """
         Args:
@@ -547,16 +622,30 @@ class TACAssignOp(TACOp):
           block: The block this operation belongs to.
           print_name: Some operations (e.g. CONST) don't need to print their
                       name in order to be readable.
+          extra_source: the EVMOp whose extra value this operation takes as
+                        value_extra, which is then only decoded when read.
         """
         super().__init__(opcode, args, pc, block)
         self.lhs = lhs
         self.print_name = print_name
 
-        self.value_extra = value_extra
+        self.__value_extra = value_extra
+        self.__extra_source = extra_source
         self.op_index = op_index
         self.call_index = call_index
         self.depth = depth
 
+    @property
+    def value_extra(self) -> t.Optional[int]:
+        if self.__extra_source is not None:
+            return self.__extra_source.extra
+        return self.__value_extra
+
+    @value_extra.setter
+    def value_extra(self, value_extra: t.Optional[int]) -> None:
+        self.__value_extra = value_extra
+        self.__extra_source = None
+
     def __str__(self):
         if self.opcode in [opcodes.SLOAD, opcodes.MLOAD]:
             if self.opcode == opcodes.SLOAD:
@@ -673,12 +762,19 @@ class Destackifier:
     a block containing EVM instructions with no corresponding TAC code.
     """
 
-    def __init__(self):
+    def __init__(self, concrete: bool = True):
+        """
+        Args:
+          concrete: as in TACGraph.__init__.
+        """
         # A sequence of three-address operations
         self.ops = []
 
+        # The class of the variables created
+        self.variable = mem.ConcreteVariable if concrete else mem.Variable
+
         # The symbolic variable stack we'll be operating on.
-        self.stack = mem.VariableStack()
+        self.stack = mem.TraceStack()
 
         # Entry address of the current block being converted
         self.block_entry = None
@@ -692,43 +788,63 @@ class Destackifier:
         # mapping of call indices to address of execution
         self.addresss = {}
 
+        # The number of call frames entered, to number each block's frame
+        self.frames = 0
+
+        # The handler of each EVM op, indexed by opcode byte
+        self.handlers = self.__build_handlers()
+
     def __fresh_init(self, evm_block: evm_cfg.EVMBasicBlock) -> None:
         """Reinitialise all structures in preparation for converting a block."""
         self.ops = []
-        self.stack = mem.VariableStack()
+        self.stack = mem.TraceStack()
         self.block_entry = (
             evm_block.evm_ops[0].pc if len(evm_block.evm_ops) > 0 else None
         )
 
-    def __new_var(self) -> mem.Variable:
-        """Construct and return a new variable with the next free identifier."""
+    def __new_var(self, pc: int) -> mem.Variable:
+        """
+        Construct and return a new variable with the next free identifier,
+        defined at the given pc.
+        """
 
         # Generate the new variable, numbering it by the implicit stack location
         # it came from.
-        var = mem.Variable.top(
+        var = self.variable.top(
             name="V{}".format(self.stack_vars),
-            def_sites=ssle([TACLocRef(None, self.block_entry)]),
+            def_sites=ssle([TACLocRef(None, pc)]),
         )
         self.stack_vars += 1
         return var
 
+    def __const_var(self, value: int, name: str) -> mem.Variable:
+        """Construct and return a variable holding the single given value."""
+        if self.variable is mem.ConcreteVariable:
+            return mem.ConcreteVariable(value, name)
+        return mem.Variable(values=[value], name=name)
+
     def convert_block(self, evm_block: evm_cfg.EVMBasicBlock, stacks) -> TACBasicBlock:
         """
         Given a EVMBasicBlock, produce an equivalent three-address code sequence
         and return the resulting TACBasicBlock.
+
+        stacks holds the (stack, frame index) of each frame to be returned to
+        after a call, which a block starting with the call resumes.
         """
 
         if len(evm_block.evm_ops) > 0:
             first_opcode = evm_block.evm_ops[0]
             if first_opcode.pc == 0:
-                pre_stack = mem.VariableStack(depth=first_opcode.depth)
+                pre_stack = mem.TraceStack(depth=first_opcode.depth)
+                frame = self.frames
+                self.frames += 1
 
-            elif (
-                first_opcode.opcode.is_kind_four() or first_opcode.opcode.is_kind_five()
+            elif opcodes.PROPERTIES[first_opcode.opcode.code] & (
+                opcodes.Property.KIND_FOUR | opcodes.Property.KIND_FIVE
             ):
-                pre_stack = stacks.pop()
+                pre_stack, frame = stacks.pop()
                 if first_opcode.depth != pre_stack.depth:
-                    pre_stack = stacks.pop()
+                    pre_stack, frame = stacks.pop()
 
         self.__fresh_init(evm_block)
 
@@ -749,6 +865,7 @@ class Destackifier:
             self.ops.append(TACOp(opcodes.NOP, [], entry))
 
         new_block = TACBasicBlock(entry, exit, self.ops, evm_block.evm_ops, self.stack)
+        new_block.frame = frame
 
         # Link up new ops and def sites to the block that contains them.
         new_block.reset_block_refs()
@@ -758,13 +875,18 @@ class Destackifier:
             first_opcode = evm_block.evm_ops[0]
             last_opcode = evm_block.evm_ops[len(evm_block.evm_ops) - 1]
 
-            if first_opcode.pc == 0 and not last_opcode.opcode.possibly_halts():
-                stacks.append(self.stack)
+            first_flags = opcodes.PROPERTIES[first_opcode.opcode.code]
+            last_flags = opcodes.PROPERTIES[last_opcode.opcode.code]
+            returns = not last_flags & opcodes.Property.POSSIBLY_HALTS
+
+            if first_opcode.pc == 0 and returns:
+                stacks.append((self.stack, frame))
 
             if (
-                first_opcode.opcode.is_kind_four() or first_opcode.opcode.is_kind_five()
-            ) and not last_opcode.opcode.possibly_halts():
-                stacks.append(self.stack)
+                first_flags & (opcodes.Property.KIND_FOUR | opcodes.Property.KIND_FIVE)
+                and returns
+            ):
+                stacks.append((self.stack, frame))
 
         return new_block
 
@@ -774,107 +896,87 @@ class Destackifier:
         appending it to the current TAC sequence, and manipulate the stack in any
         needful way.
         """
+        self.handlers[op.opcode.code](op)
 
-        if op.opcode.is_swap():
-            self.stack.swap(op.opcode.pop)
-        elif op.opcode.is_dup():
-            self.stack.dup(op.opcode.pop)
-        elif op.opcode == opcodes.POP:
-            self.stack.pop()
-        else:
-            self.__gen_instruction(op)
+    def __build_handlers(self) -> t.List[t.Callable[[evm_cfg.EVMOp], None]]:
+        """
+        Return the handler of each EVM op, indexed by opcode byte as
+        opcodes.PROPERTIES is: a permutation of the stack for POP, DUP and
+        SWAP, and otherwise __gen_instruction with the builder of the op's
+        TAC operation. New opcodes are supported by adding them here.
+        """
+        handlers = []
+
+        for code, flags in enumerate(opcodes.PROPERTIES):
+            opcode = opcodes.BYTECODES.get(code)
+
+            if flags & opcodes.Property.SWAP:
+                handlers.append(self.__swap)
+                continue
+            elif flags & opcodes.Property.DUP:
+                handlers.append(self.__dup)
+                continue
+            elif code == opcodes.POP.code:
+                handlers.append(self.__pop)
+                continue
+
+            if flags & opcodes.Property.PUSH:
+                build = self.__build_const
+            elif code == opcodes.PUSH0.code:
+                build = self.__build_zero
+            elif flags & opcodes.Property.MISSING:
+                build = self.__build_missing
+            elif flags & opcodes.Property.LOG:
+                build = self.__build_log
+            # SLOAD is same as MLOAD, they both have value in the tempt file
+            elif code == opcodes.SLOAD.code or code == opcodes.MLOAD.code:
+                build = self.__build_load
+            elif flags & opcodes.Property.KIND_ONE:
+                build = self.__build_kind_one
+            elif flags & opcodes.Property.KIND_TWO:
+                build = self.__build_kind_two
+            elif flags & opcodes.Property.KIND_THREE_STORE_TWO:
+                build = self.__build_copy
+            elif flags & opcodes.Property.KIND_FOUR:
+                build = self.__build_call
+            elif flags & opcodes.Property.KIND_FIVE:
+                build = self.__build_create
+            elif opcode is not None and opcode.push == 1:
+                build = self.__build_assign
+            else:
+                # Including MSTORE, MSTORE8 and SSTORE
+                build = self.__build_op
+
+            handlers.append(functools.partial(self.__gen_instruction, build))
+
+        return handlers
 
-    def __gen_instruction(self, op: evm_cfg.EVMOp) -> None:
+    def __swap(self, op: evm_cfg.EVMOp) -> None:
+        self.stack.swap(op.opcode.pop)
+
+    def __dup(self, op: evm_cfg.EVMOp) -> None:
+        self.stack.dup(op.opcode.pop)
+
+    def __pop(self, op: evm_cfg.EVMOp) -> None:
+        self.stack.pop()
+
+    def __gen_instruction(
+        self,
+        build: t.Callable[[evm_cfg.EVMOp, mem.Variable], TACOp],
+        op: evm_cfg.EVMOp,
+    ) -> None:
         """
-        Given a line, generate its corresponding TAC operation,
+        Given a line, generate its corresponding TAC operation with build,
         append it to the op sequence, and push any generated
         variables to the stack.
         """
 
-        inst = None
         # All instructions that push anything push exactly
-        # one word to the stack. Assign that symbolic variable here.
-        new_var = self.__new_var() if op.opcode.push == 1 else None
-
-        # Set this variable's def site
-        if new_var is not None:
-            for site in new_var.def_sites:
-                site.pc = op.pc
-
-        # Generate the appropriate TAC operation.
-        # Special cases first, followed by the fallback to generic instructions.
-        if op.opcode.is_push():
-            args = [TACArg(var=mem.Variable(values=[op.value], name="C"))]
-            inst = TACAssignOp(new_var, opcodes.CONST, args, op.pc, print_name=False)
-        elif op.opcode.is_missing():
-            args = [TACArg(var=mem.Variable(values=[op.value], name="C"))]
-            inst = TACOp(op.opcode, args, op.pc)
-        elif op.opcode.is_log():
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACOp(opcodes.LOG, args, op.pc)
-        elif op.opcode == opcodes.MSTORE:
-            args = [
-                TACArg.from_var(var) for var in self.stack.pop_many(opcodes.MSTORE.pop)
-            ]
-            inst = TACOp(op.opcode, args, op.pc)
-        elif op.opcode == opcodes.MSTORE8:
-            args = [
-                TACArg.from_var(var) for var in self.stack.pop_many(opcodes.MSTORE8.pop)
-            ]
+        # one word to the stack. Assign that symbolic variable here,
+        # with its def site.
+        new_var = self.__new_var(op.pc) if op.opcode.push == 1 else None
 
-            inst = TACOp(op.opcode, args, op.pc)
-
-        # SLOAD is same as MLOAD, they both hasve value in the tempt file
-        # We will assign the real value to the storage variable
-        elif op.opcode == opcodes.SLOAD or op.opcode == opcodes.MLOAD:
-            new_var = mem.Variable(values=[op.value], name=new_var.name)
-            args = [TACArg.from_var(self.stack.pop())]
-            inst = TACAssignOp(new_var, op.opcode, args, op.pc)
-        elif op.opcode == opcodes.SSTORE:
-            args = [
-                TACArg.from_var(var) for var in self.stack.pop_many(opcodes.SSTORE.pop)
-            ]
-            inst = TACOp(op.opcode, args, op.pc)
-
-        # Special cases for kind one, such as CALLVALUE
-        # For kind one, there are no arguments for the previous vandal, so the inst will be incomplete
-        # For example, 0xa CALLVALUE 0x0 will be transalated into V4 =
-        # Now we assign the real value to this opcode and keep its opcode
-        elif op.opcode.is_kind_one():
-            new_var = mem.Variable(values=[op.value], name=new_var.name)
-            args = []
-            inst = TACAssignOp(new_var, op.opcode, args, op.pc, print_name=False)
-
-        # Special cases for kind two, such as CALLDATALOAD
-        # Args have all the stack arguments, those information (stack arguments) are useless
-        # Since we just get the values from geth, not using them.
-        elif op.opcode.is_kind_two():
-            new_var = mem.Variable(values=[op.value], name=new_var.name)
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACAssignOp(new_var, op.opcode, args, op.pc, print_name=False)
-
-        # Special cases for kind three store two, such as CALLDATACOPY
-        # There are multiple arguments in this kind of opcodes
-        elif op.opcode.is_kind_three_store_two():
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACOp(op.opcode, args, op.pc, None, op.value)
-        elif op.opcode.is_kind_four():
-            # op.value is success flag, value_extra is the memory content.
-            new_var = mem.Variable(values=[op.value], name=new_var.name)
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACAssignOp(new_var, op.opcode, args, op.pc, None, True, op.extra)
-
-        elif op.opcode.is_kind_five():
-            new_var = mem.Variable(values=[op.value], name=new_var.name)
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACAssignOp(new_var, op.opcode, args, op.pc, None, True, None)
-
-        elif new_var is not None:
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACAssignOp(new_var, op.opcode, args, op.pc)
-        else:
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACOp(op.opcode, args, op.pc)
+        inst = build(op, new_var)
 
         inst.depth = op.depth
         inst.call_index = op.call_index
@@ -882,5 +984,70 @@ class Destackifier:
 
         # This var must only be pushed after the operation is performed.
         if new_var is not None:
-            self.stack.push(new_var)
+            self.stack.push(inst.lhs)
         self.ops.append(inst)
+
+    def __pop_args(self, op: evm_cfg.EVMOp) -> t.List[TACArg]:
+        """Pop the arguments of op off the stack."""
+        return [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
+
+    def __build_const(self, op: evm_cfg.EVMOp, new_var: mem.Variable) -> TACOp:
+        args = [TACArg(var=self.__const_var(op.value, "C"))]
+        return TACAssignOp(new_var, opcodes.CONST, args, op.pc, print_name=False)
+
+    def __build_zero(self, op: evm_cfg.EVMOp, new_var: mem.Variable) -> TACOp:
+        # PUSH0 pushes a zero that is not in the bytecode
+        args = [TACArg(var=self.__const_var(0, "C"))]
+        return TACAssignOp(new_var, opcodes.CONST, args, op.pc, print_name=False)
+
+    def __build_missing(self, op: evm_cfg.EVMOp, new_var: mem.Variable) -> TACOp:
+        args = [TACArg(var=self.__const_var(op.value, "C"))]
+        return TACOp(op.opcode, args, op.pc)
+
+    def __build_log(self, op: evm_cfg.EVMOp, new_var: mem.Variable) -> TACOp:
+        return TACOp(opcodes.LOG, self.__pop_args(op), op.pc)
+
+    def __build_load(self, op: evm_cfg.EVMOp, new_var: mem.Variable) -> TACOp:
+        # We will assign the real value to the storage variable
+        new_var = self.__const_var(op.value, new_var.name)
+        args = [TACArg.from_var(self.stack.pop())]
+        return TACAssignOp(new_var, op.opcode, args, op.pc)
+
+    def __build_kind_one(self, op: evm_cfg.EVMOp, new_var: mem.Variable) -> TACOp:
+        # For kind one, such as CALLVALUE, there are no arguments for the
+        # previous vandal, so the inst would be incomplete. For example,
+        # 0xa CALLVALUE 0x0 would be translated into V4 =
+        # Now we assign the real value to this opcode and keep its opcode
+        new_var = self.__const_var(op.value, new_var.name)
+        return TACAssignOp(new_var, op.opcode, [], op.pc, print_name=False)
+
+    def __build_kind_two(self, op: evm_cfg.EVMOp, new_var: mem.Variable) -> TACOp:
+        # For kind two, such as CALLDATALOAD, the stack arguments are kept,
+        # but not used, since we just get the values from geth
+        new_var = self.__const_var(op.value, new_var.name)
+        args = self.__pop_args(op)
+        return TACAssignOp(new_var, op.opcode, args, op.pc, print_name=False)
+
+    def __build_copy(self, op: evm_cfg.EVMOp, new_var: mem.Variable) -> TACOp:
+        # For kind three store two, such as CALLDATACOPY, the op's value is
+        # the data copied
+        return TACOp(op.opcode, self.__pop_args(op), op.pc, value_source=op)
+
+    def __build_call(self, op: evm_cfg.EVMOp, new_var: mem.Variable) -> TACOp:
+        # op.value is success flag, value_extra is the memory content.
+        new_var = self.__const_var(op.value, new_var.name)
+        args = self.__pop_args(op)
+        return TACAssignOp(
+            new_var, op.opcode, args, op.pc, None, True, extra_source=op
+        )
+
+    def __build_create(self, op: evm_cfg.EVMOp, new_var: mem.Variable) -> TACOp:
+        new_var = self.__const_var(op.value, new_var.name)
+        args = self.__pop_args(op)
+        return TACAssignOp(new_var, op.opcode, args, op.pc, None, True, None)
+
+    def __build_assign(self, op: evm_cfg.EVMOp, new_var: mem.Variable) -> TACOp:
+        return TACAssignOp(new_var, op.opcode, self.__pop_args(op), op.pc)
+
+    def __build_op(self, op: evm_cfg.EVMOp, new_var: mem.Variable) -> TACOp:
+        return TACOp(op.opcode, self.__pop_args(op), op.pc)
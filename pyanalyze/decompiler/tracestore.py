@@ -0,0 +1,435 @@
+"""tracestore.py: An offline, file-backed store of logged transactions."""
+
+from bisect import bisect_left
+import hashlib
+from itertools import chain, islice
+import mmap
+import os
+import random
+import struct
+import typing as t
+import zlib
+
+import bson
+
+import decompiler.mgofetcher as mgofetcher
+
+INDEX_MAGIC = b"TST2"
+"""
+The first bytes of a trace store's index file. The rest of the index is
+laid out as follows, with all integers little-endian:
+
+  uint32 records, uint32 slots, uint32 blocks, uint32 shards
+  records x (uint64 key, uint64 offset, uint32 shard, uint32 length,
+             int64 block, uint32 tracesize, uint64 to key)
+  slots x (uint64 key, uint32 record + 1, uint32 padding)
+  blocks x (int64 block, uint32 first record, uint32 record count)
+
+Each record is one transaction, stored as zlib-compressed BSON at the given
+offset of the given shard file, and keyed by the first 8 bytes of its tx
+hash. Its block, trace size and the to_key of its to address are stored
+with it, so that samples can be drawn from strata without reading any
+transaction outside them; a trace size of NO_TRACE_SIZE stands for none.
+Records are in block order, and the block table lists the run of records
+of every block. The slots form an open-addressing hash table from key to
+record, with linear probing and 0 marking an empty slot.
+"""
+
+INDEX_MAGIC_V1 = b"TST1"
+"""
+The first bytes of the index of a store exported before records held their
+block, trace size and to address, which is read as before.
+"""
+
+INDEX_FILE = "index.bin"
+SHARD_FILE = "shard-{:05d}.bin"
+
+SHARD_SIZE = 1 << 28
+"""The size in bytes after which the exporter starts a new shard file."""
+
+_HEADER = struct.Struct("<4s4I")
+_RECORD = struct.Struct("<QQIIqIQ")
+# a record of INDEX_MAGIC_V1, and the first fields of one of INDEX_MAGIC
+_RECORD_V1 = struct.Struct("<QQII")
+_SLOT = struct.Struct("<QII")
+_BLOCK = struct.Struct("<qII")
+
+NO_TRACE_SIZE = (1 << 32) - 1
+"""The trace size of a record whose transaction has none."""
+
+
+def tx_key(tx: str) -> int:
+    """Returns the index key of the transaction with hash tx."""
+    return int(tx[2:18], 16) or 1
+
+
+def to_key(to: t.Optional[str]) -> int:
+    """
+    Returns the key a record stores of the address its transaction was sent
+    to: 8 bytes of its hash, or 0 for none. Different addresses may share a
+    key, so a transaction matching a stratum's to by key is checked again.
+    """
+    if to is None:
+        return 0
+    digest = hashlib.blake2b(to.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class TraceStore:
+    """
+    Reads transactions exported by export() from a directory, through the
+    same methods as mgofetcher.MongoFetcher.
+
+    The index is memory-mapped, so looking up a transaction by hash probes
+    its hash table in place before reading the one compressed record it
+    points to. Reading blocks in order reads each shard sequentially.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+        with open(os.path.join(path, INDEX_FILE), "rb") as f:
+            self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.records, self.slots, self.blocks, shards = _HEADER.unpack_from(
+            self.index
+        )
+        if magic not in (INDEX_MAGIC, INDEX_MAGIC_V1):
+            raise ValueError("Not a trace store index: {}".format(path))
+        self.record = _RECORD if magic == INDEX_MAGIC else _RECORD_V1
+
+        self.record_base = _HEADER.size
+        self.slot_base = self.record_base + self.records * self.record.size
+        self.block_base = self.slot_base + self.slots * _SLOT.size
+        self.block_numbers = [
+            block
+            for block, _, _ in _BLOCK.iter_unpack(
+                self.index[
+                    self.block_base : self.block_base + self.blocks * _BLOCK.size
+                ]
+            )
+        ]
+
+        self.shards = []
+        for i in range(shards):
+            with open(os.path.join(path, SHARD_FILE.format(i)), "rb") as f:
+                self.shards.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+        self.sample_order = None
+        self.block: int = 1
+
+    def __len__(self):
+        return self.records
+
+    def get_block(
+        self, n: int = None, fields: t.Iterable[str] = None, raw: bool = False
+    ) -> t.List[t.Any]:
+        """As MongoFetcher.get_block, returning the block's transactions."""
+        if n == None:
+            n = self.block
+
+        txs = []
+        i = bisect_left(self.block_numbers, int(n))
+        if i < self.blocks and self.block_numbers[i] == int(n):
+            _, first, count = _BLOCK.unpack_from(
+                self.index, self.block_base + i * _BLOCK.size
+            )
+            txs = [self.__read(r, fields, raw) for r in range(first, first + count)]
+
+        self.block = n + 1
+
+        return txs
+
+    def iter_blocks(
+        self,
+        start: int,
+        stop: int,
+        batch_size: int = mgofetcher.BATCH_SIZE,
+        fields: t.Iterable[str] = None,
+        raw: bool = False,
+    ) -> t.Iterator[t.Tuple[int, t.List[t.Any]]]:
+        """
+        As MongoFetcher.iter_blocks. Blocks are read in record order, so
+        each shard is read sequentially. batch_size is accepted for
+        compatibility, and ignored.
+        """
+        for i in range(
+            bisect_left(self.block_numbers, start),
+            bisect_left(self.block_numbers, stop),
+        ):
+            block, first, count = _BLOCK.unpack_from(
+                self.index, self.block_base + i * _BLOCK.size
+            )
+            yield block, [
+                self.__read(r, fields, raw) for r in range(first, first + count)
+            ]
+
+    def get_tx(
+        self, tx: str = "", fields: t.Iterable[str] = None, raw: bool = False
+    ) -> t.Optional[t.Any]:
+        """As MongoFetcher.get_tx."""
+        if tx == "":
+            return self.get_random_txs(1, fields, raw)[0]
+
+        for record in self.__candidates(tx_key(tx)):
+            doc = self.__read(record, fields, raw, tx)
+            if doc is not None:
+                return doc
+        return None
+
+    def get_txs(
+        self,
+        hashes: t.Iterable[str],
+        chunk_size: int = mgofetcher.LOOKUP_CHUNK_SIZE,
+        ordered: bool = True,
+        fields: t.Iterable[str] = None,
+        raw: bool = False,
+    ) -> t.Iterator[t.Tuple[str, t.Optional[t.Any]]]:
+        """
+        As MongoFetcher.get_txs. Every lookup is local, so transactions are
+        always yielded in input order, and chunk_size and ordered are
+        accepted for compatibility, and ignored.
+        """
+        for tx in hashes:
+            yield tx, self.get_tx(tx, fields, raw)
+
+    def get_random_txs(
+        self, n: int = 1, fields: t.Iterable[str] = None, raw: bool = False
+    ) -> t.List[t.Any]:
+        """As MongoFetcher.get_random_txs."""
+        records = random.sample(range(self.records), min(n, self.records))
+        return [self.__read(r, fields, raw) for r in records]
+
+    def sample_txs(
+        self,
+        n: int,
+        seed: int = 0,
+        strata: t.Iterable[mgofetcher.Stratum] = None,
+        fields: t.Iterable[str] = None,
+        raw: bool = False,
+    ) -> t.List[t.Any]:
+        """
+        As MongoFetcher.sample_txs, returning the same transactions as it
+        would for the collection the store was exported from.
+
+        The records of each stratum are picked by the block, trace size and
+        to key held in the index, and only they are read, in shard order.
+        Stores exported with INDEX_MAGIC_V1 hold none of these, so every
+        record is read until n are found in the stratum.
+        """
+        if self.sample_order is None:
+            records = [
+                self.record.unpack_from(
+                    self.index, self.record_base + r * self.record.size
+                )
+                for r in range(self.records)
+            ]
+            self.sample_order = sorted(
+                range(self.records), key=lambda r: records[r][0] >> 1
+            )
+            self.sample_keys = [records[r][0] >> 1 for r in self.sample_order]
+            if self.record is _RECORD:
+                # the stratum fields of each record, in sample key order
+                self.sample_fields = [records[r][4:] for r in self.sample_order]
+
+        start = bisect_left(self.sample_keys, mgofetcher.seed_key(seed))
+
+        txs = []
+        for stratum in [mgofetcher.Stratum()] if strata is None else strata:
+            if self.record is _RECORD:
+                positions = self.__stratum_positions(stratum, start)
+            else:
+                positions = (
+                    i % self.records for i in range(start, start + self.records)
+                )
+
+            sample: t.Dict[int, t.Any] = {}
+            while len(sample) < n:
+                batch = list(islice(positions, n - len(sample)))
+                if not batch:
+                    break
+                # read the records of the batch in shard order, each once
+                for i in sorted(batch, key=self.__location):
+                    tx = self.__read(self.sample_order[i], None, raw)
+                    if stratum.matches(tx):
+                        sample[i] = tx if raw else _project(tx, fields)
+            txs.extend(sample[i] for i in sorted(sample, key=lambda i: (i < start, i)))
+
+        return txs
+
+    def __stratum_positions(
+        self, stratum: mgofetcher.Stratum, start: int
+    ) -> t.Iterator[int]:
+        """
+        Yields the position in sample key order of every record whose index
+        fields lie in stratum, from start on, wrapping around.
+        """
+        key = None if stratum.to is None else to_key(stratum.to)
+        for i in chain(range(start, self.records), range(start)):
+            block, trace_size, record_to = self.sample_fields[i]
+            if stratum.blocks is not None and not (
+                stratum.blocks[0] <= block < stratum.blocks[1]
+            ):
+                continue
+            if stratum.trace_size is not None and (
+                trace_size == NO_TRACE_SIZE
+                or not stratum.trace_size[0] <= trace_size < stratum.trace_size[1]
+            ):
+                continue
+            if key is not None and record_to != key:
+                continue
+            yield i
+
+    def __location(self, i: int) -> t.Tuple[int, int]:
+        """Returns the shard and offset of the record at position i in sample
+        key order."""
+        _, offset, shard, _ = _RECORD_V1.unpack_from(
+            self.index, self.record_base + self.sample_order[i] * self.record.size
+        )
+        return shard, offset
+
+    def close(self) -> None:
+        for shard in self.shards:
+            shard.close()
+        self.index.close()
+
+    def __candidates(self, key: int) -> t.Iterator[int]:
+        """Yields the number of every record with the given key."""
+        mask = self.slots - 1
+        slot = key & mask
+        while True:
+            slot_key, record, _ = _SLOT.unpack_from(
+                self.index, self.slot_base + slot * _SLOT.size
+            )
+            if record == 0:
+                return
+            if slot_key == key:
+                yield record - 1
+            slot = (slot + 1) & mask
+
+    def __read(
+        self,
+        record: int,
+        fields: t.Optional[t.Iterable[str]],
+        raw: bool,
+        tx: str = None,
+    ) -> t.Optional[t.Any]:
+        """
+        Decompress and decode the given record. If tx is given, returns
+        None unless the record is the transaction with that hash.
+        """
+        _, offset, shard, length = _RECORD_V1.unpack_from(
+            self.index, self.record_base + record * self.record.size
+        )
+        data = zlib.decompress(self.shards[shard][offset : offset + length])
+
+        doc = mgofetcher.RawTraceDocument(data) if raw else bson.decode(data)
+        if tx is not None and doc["tx"] != tx:
+            return None
+        # A raw document is returned whole, as it is never decoded anyway
+        return doc if raw or fields is None else _project(doc, fields)
+
+
+def _project(doc: t.Dict[str, t.Any], fields: t.Optional[t.Iterable[str]]):
+    """Restrict doc to the given fields, or return it whole if None."""
+    if fields is None:
+        return doc
+    return {field: doc[field] for field in fields if field in doc}
+
+
+def export(
+    fetcher: mgofetcher.MongoFetcher,
+    path: str,
+    start: int = 0,
+    stop: int = None,
+    fields: t.Iterable[str] = None,
+    level: int = 6,
+) -> int:
+    """
+    Export the transactions of blocks start up to but not including stop
+    from fetcher into a new trace store at path, and return the number of
+    transactions exported. If stop is None, every block from start on is
+    exported.
+
+    Args:
+      fetcher: the MongoFetcher to read transactions from.
+      path: the directory to write the store to, which is created if needed.
+      fields: the fields of each transaction to keep. All are kept if None,
+              and the block, tx and sample fields always are.
+      level: the zlib compression level of each record.
+    """
+    if stop is None:
+        stop = 1 << 62
+    if fields is not None:
+        fields = {"block", "tx", "samplekey", "tracesize", *fields}
+    os.makedirs(path, exist_ok=True)
+
+    records = []
+    blocks = []
+    shard = None
+    shard_number = -1
+    try:
+        for block, txs in fetcher.iter_blocks(start, stop, fields=fields):
+            # Blocks never span shards, so each block is one sequential read
+            if shard is None or shard.tell() >= SHARD_SIZE:
+                if shard is not None:
+                    shard.close()
+                shard_number += 1
+                shard = open(os.path.join(path, SHARD_FILE.format(shard_number)), "wb")
+
+            blocks.append((block, len(records), len(txs)))
+            for tx in txs:
+                tx.pop("_id", None)
+                _add_sample_fields(tx)
+                data = zlib.compress(bson.encode(tx), level)
+                records.append(
+                    (
+                        tx_key(tx["tx"]),
+                        shard.tell(),
+                        shard_number,
+                        len(data),
+                        tx["block"],
+                        tx.get("tracesize", NO_TRACE_SIZE),
+                        to_key(tx.get("to")),
+                    )
+                )
+                shard.write(data)
+    finally:
+        if shard is not None:
+            shard.close()
+
+    # Keep the hash table at most half full
+    slots = 1
+    while slots < 2 * len(records):
+        slots <<= 1
+    table = [(0, 0)] * slots
+    for record, (key, *_) in enumerate(records):
+        slot = key & (slots - 1)
+        while table[slot][1] != 0:
+            slot = (slot + 1) & (slots - 1)
+        table[slot] = (key, record + 1)
+
+    with open(os.path.join(path, INDEX_FILE), "wb") as f:
+        f.write(
+            _HEADER.pack(
+                INDEX_MAGIC, len(records), slots, len(blocks), shard_number + 1
+            )
+        )
+        f.writelines(_RECORD.pack(*record) for record in records)
+        f.writelines(_SLOT.pack(key, record, 0) for key, record in table)
+        f.writelines(_BLOCK.pack(*block) for block in blocks)
+
+    return len(records)
+
+
+def _add_sample_fields(tx: t.Dict[str, t.Any]) -> None:
+    """
+    Add the samplekey and tracesize fields to a transaction logged without
+    them, as MongoFetcher.ensure_sample_keys does.
+    """
+    if "samplekey" not in tx:
+        tx["samplekey"] = mgofetcher.sample_key(tx["tx"])
+    if "tracesize" not in tx:
+        if isinstance(tx.get("optrace"), str):
+            tx["tracesize"] = tx["optrace"].count("\n") + 1
+        elif tx.get("optracebin") is not None:
+            tx["tracesize"] = int.from_bytes(tx["optracebin"][4:8], "little")
@@ -3,6 +3,7 @@ from os.path import abspath, dirname, join
 sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
 
 import decompiler.mgofetcher as mgofetcher
+import decompiler.tracestore as tracestore
 import decompiler.analyzer.api as api
 import decompiler.tac_cfg as tac_cfg
 import operator
@@ -12,20 +13,24 @@ COLLECTION = "ethereum"
 DATABASE = "ethlogger2"
 TX_HASH = "0x37085f336b5d3e588e37674544678f8cb0fc092a6de5d83bd647e20e5232897b"
 
-fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+# Read from a trace store exported by tracestore.export instead, if given
+if len(sys.argv) > 1:
+    fetcher = tracestore.TraceStore(sys.argv[1])
+else:
+    fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
 
-tx = fetcher.get_tx(TX_HASH)
+tx = fetcher.get_tx(TX_HASH, mgofetcher.ANALYSIS_FIELDS, raw=True)
 
 cfg = tac_cfg.TACGraph.from_trace(tx)
 api = api.OpAnalyzer(cfg)
 
-sload = api.get_ops("SLOAD", depth=(operator.gt, 2))
-jumpi = api.get_ops("JUMPI")
+sload = api.query("SLOAD", depth=(operator.gt, 2))
+jumpi = api.query("JUMPI")
 
 sload.link_ops(jumpi, call_index=operator.eq, depth=operator.eq)
 sload.reduce_descendant(self_def_var=True, link_def_var=False, link_use_vi=1)
 
-sstore = api.get_ops("SSTORE")
+sstore = api.query("SSTORE")
 sload.link_ops(sstore, depth=lambda x, y: x - 2 > y, op_index=operator.lt, save_links=True)
 sload.reduce_value(operator.ne, self_def_var=False, self_use_vi = 0, link_def_var=False, link_use_vi=0)
 
@@ -4,6 +4,7 @@ from os.path import abspath, dirname, join
 sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
 
 import decompiler.mgofetcher as mgofetcher
+import decompiler.tracestore as tracestore
 import decompiler.analyzer.api as api
 import operator
 
@@ -12,9 +13,13 @@ COLLECTION = "ethereum"
 DATABASE = "ethlogger2"
 TX_HASH = "0x37085f336b5d3e588e37674544678f8cb0fc092a6de5d83bd647e20e5232897b"
 
-fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+# Read from a trace store exported by tracestore.export instead, if given
+if len(sys.argv) > 1:
+    fetcher = tracestore.TraceStore(sys.argv[1])
+else:
+    fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
 
-tx = fetcher.get_tx(TX_HASH)
+tx = fetcher.get_tx(TX_HASH, mgofetcher.ANALYSIS_FIELDS, raw=True)
 
 api = api.OpAnalyzer.load_from_mongo(tx)
 
@@ -0,0 +1,40 @@
+import sys
+from os.path import abspath, dirname, join
+import timeit
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.mgofetcher as mgofetcher
+
+URI = "mongodb://127.0.0.1"
+COLLECTION = "ethereum"
+DATABASE = "ethlogger2"
+
+fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+
+
+def scan_per_block(start, stop):
+    """Fetch every block in the range with one query each"""
+    count = 0
+    for n in range(start, stop):
+        count += len(list(fetcher.get_block(n, ["tx"])))
+    return count
+
+
+def scan_range(start, stop):
+    """Stream the range through a single cursor"""
+    count = 0
+    for block, txs in fetcher.iter_blocks(start, stop, fields=["tx"]):
+        count += len(txs)
+    return count
+
+
+start = int(sys.argv[1])
+blocks = int(sys.argv[2])
+
+print("Indexes:", ", ".join(fetcher.ensure_indexes()))
+for name, scan in (("per block", scan_per_block), ("range", scan_range)):
+    start_time = timeit.default_timer()
+    count = scan(start, start + blocks)
+    elapsed = timeit.default_timer() - start_time
+    print(f"{name}: {count} transactions from {blocks} blocks in {elapsed:.3f}s")
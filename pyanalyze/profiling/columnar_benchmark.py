@@ -0,0 +1,84 @@
+import sys
+from os.path import abspath, dirname, join
+import operator
+import timeit
+import tracemalloc
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.mgofetcher as mgofetcher
+import decompiler.tracestore as tracestore
+import decompiler.analyzer.api as api
+import decompiler.tac_cfg as tac_cfg
+
+URI = "mongodb://127.0.0.1"
+COLLECTION = "ethereum"
+DATABASE = "ethlogger2"
+SEED = 0
+
+# Read from a trace store exported by tracestore.export instead, if given
+if len(sys.argv) > 2:
+    fetcher = tracestore.TraceStore(sys.argv[2])
+else:
+    fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+
+BACKENDS = {"objects": False, "columnar": True}
+
+
+def measure(cfg, columnar):
+    """Returns the memory retained by an OpAnalyzer of cfg, the time to
+    filter every one of its OpViews, and the memory retained once every
+    filtered view has been read, as link_ops and reduce_* read them"""
+    tracemalloc.stop()
+    tracemalloc.start()
+    _api = api.OpAnalyzer(cfg, columnar=columnar)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start_time = timeit.default_timer()
+    for view in _api.ops.values():
+        view.filter(depth=(operator.eq, 1), op_index=(operator.gt, 100))
+    elapsed = timeit.default_timer() - start_time
+
+    tracemalloc.start()
+    for view in _api.ops.values():
+        view.items()
+    read_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return size, elapsed, size + read_size
+
+
+def run_columnar(txs):
+    sizes = {name: 0 for name in BACKENDS}
+    times = {name: 0 for name in BACKENDS}
+    read_sizes = {name: 0 for name in BACKENDS}
+    ops = 0
+
+    for i, tx in enumerate(txs):
+        print("On iteration ", i)
+        cfg = tac_cfg.TACGraph.from_trace(tx)
+        ops += sum(len(block.tac_ops) for block in cfg.blocks)
+
+        for name, columnar in BACKENDS.items():
+            size, elapsed, read_size = measure(cfg, columnar)
+            sizes[name] += size
+            times[name] += elapsed
+            read_sizes[name] += read_size
+
+    return sizes, times, read_sizes, ops
+
+
+tests = int(sys.argv[1])
+
+sizes, times, read_sizes, ops = run_columnar(
+    fetcher.sample_txs(tests, SEED, fields=mgofetcher.ANALYSIS_FIELDS, raw=True)
+)
+
+print(f"Loaded {tests} transactions ({ops} ops)")
+for name in BACKENDS:
+    print(
+        f"{name}: {sizes[name] / ops:.0f} bytes/op, "
+        f"filtering every view {times[name] / tests * 1000:.2f} ms/tx, "
+        f"{read_sizes[name] / ops:.0f} bytes/op once the filtered views are read"
+    )
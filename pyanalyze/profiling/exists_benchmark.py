@@ -0,0 +1,88 @@
+import sys
+from os.path import abspath, dirname, join
+import operator
+import timeit
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.mgofetcher as mgofetcher
+import decompiler.tracestore as tracestore
+import decompiler.analyzer.api as api
+import decompiler.tac_cfg as tac_cfg
+
+URI = "mongodb://127.0.0.1"
+COLLECTION = "ethereum"
+DATABASE = "ethlogger2"
+SEED = 0
+
+# Read from a trace store exported by tracestore.export instead, if given
+if len(sys.argv) > 2:
+    fetcher = tracestore.TraceStore(sys.argv[2])
+else:
+    fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+
+
+def reentrancy(_api):
+    """The reentrancy heuristic of examples/example_reentrancy.py as a Query"""
+    sload = _api.query("SLOAD", depth=(operator.gt, 2))
+    sload.link_ops(_api.query("JUMPI"), call_index=operator.eq, depth=operator.eq)
+    sload.reduce_descendant(self_def_var=True, link_def_var=False, link_use_vi=1)
+    sload.link_ops(
+        _api.query("SSTORE"),
+        depth=lambda x, y: x - 2 > y,
+        op_index=operator.lt,
+        save_links=True,
+    )
+    sload.reduce_value(
+        operator.ne,
+        self_def_var=False,
+        self_use_vi=0,
+        link_def_var=False,
+        link_use_vi=0,
+    )
+    sload.reduce_address()
+    return sload
+
+
+def measure(cfg, mode):
+    query = reentrancy(api.OpAnalyzer(cfg))
+
+    start_time = timeit.default_timer()
+    try:
+        found = len(query.run()) != 0 if mode == "run" else query.exists()
+    except LookupError as e:
+        # a call depth without a known address
+        return timeit.default_timer() - start_time, repr(e)
+    return timeit.default_timer() - start_time, found
+
+
+def run_benchmark(txs):
+    times = {"run": 0, "exists": 0}
+    found = 0
+
+    for i, tx in enumerate(txs):
+        print("On iteration ", i)
+        cfg = tac_cfg.TACGraph.from_trace(tx)
+
+        run_time, run_found = measure(cfg, "run")
+        exists_time, exists_found = measure(cfg, "exists")
+        times["run"] += run_time
+        times["exists"] += exists_time
+
+        # exists may find a match before the op run fails on
+        if not isinstance(run_found, str) and run_found != exists_found:
+            raise ValueError(f"Results differ for {tx['tx']}")
+        found += exists_found is True
+
+    return times, found
+
+
+tests = int(sys.argv[1])
+
+times, found = run_benchmark(
+    fetcher.sample_txs(tests, SEED, fields=mgofetcher.ANALYSIS_FIELDS, raw=True)
+)
+
+print(f"Checked {tests} transactions for reentrancy, {found} matched")
+for name, elapsed in times.items():
+    print(f"{name}: {elapsed:.3f}s ({elapsed / tests * 1000:.2f} ms/tx)")
@@ -0,0 +1,21 @@
+import sys
+from os.path import abspath, dirname, join
+import timeit
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.mgofetcher as mgofetcher
+import decompiler.tracestore as tracestore
+
+URI = "mongodb://127.0.0.1"
+COLLECTION = "ethereum"
+DATABASE = "ethlogger2"
+
+fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+
+path = sys.argv[1]
+blocks = [int(n) for n in sys.argv[2:4]]
+
+start_time = timeit.default_timer()
+count = tracestore.export(fetcher, path, *blocks, fields=mgofetcher.ANALYSIS_FIELDS)
+print(f"Exported {count} transactions in {timeit.default_timer() - start_time:.3f}s")
@@ -0,0 +1,59 @@
+import sys
+from os.path import abspath, dirname, join
+import timeit
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.mgofetcher as mgofetcher
+import decompiler.optrace as optrace
+
+URI = "mongodb://127.0.0.1"
+COLLECTION = "ethereum"
+DATABASE = "ethlogger2"
+SEED = 0
+
+fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+
+MODES = {
+    "full documents": {},
+    "projected": {"fields": mgofetcher.ANALYSIS_FIELDS},
+    "projected raw": {"fields": mgofetcher.ANALYSIS_FIELDS, "raw": True},
+}
+
+
+def fetch_and_parse(tx_hash, options):
+    """Fetch a transaction and parse its trace, as TACGraph.from_trace does"""
+    tx = fetcher.get_tx(tx_hash, **options)
+    for columns in optrace.iter_optrace(tx["optrace"]):
+        pass
+    return tx
+
+
+def run_fetch(hashes):
+    times = {name: 0 for name in MODES}
+    sizes = {name: 0 for name in MODES}
+
+    for i, tx_hash in enumerate(hashes):
+        print("On iteration ", i)
+        # Fetch once first so every mode reads the document from cache
+        fetch_and_parse(tx_hash, {})
+
+        for name, options in MODES.items():
+            start_time = timeit.default_timer()
+            tx = fetch_and_parse(tx_hash, options)
+            times[name] += timeit.default_timer() - start_time
+            if options.get("raw"):
+                sizes[name] += len(tx.raw)
+
+    return times, sizes
+
+
+tests = int(sys.argv[1])
+
+hashes = [tx["tx"] for tx in fetcher.sample_txs(tests, SEED, fields=["tx"])]
+times, sizes = run_fetch(hashes)
+
+print(f"Fetched {tests} transactions")
+for name, elapsed in times.items():
+    print(f"{name}: {elapsed:.3f}s ({elapsed / tests * 1000:.2f} ms/tx)")
+print(f"Projected raw documents: {sizes['projected raw'] / tests:.0f} bytes/tx")
@@ -0,0 +1,138 @@
+import sys
+from os.path import abspath, dirname, join
+import copy
+import operator
+import timeit
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.mgofetcher as mgofetcher
+import decompiler.tracestore as tracestore
+import decompiler.analyzer.api as api
+import decompiler.tac_cfg as tac_cfg
+
+URI = "mongodb://127.0.0.1"
+COLLECTION = "ethereum"
+DATABASE = "ethlogger2"
+SEED = 0
+
+# Read from a trace store exported by tracestore.export instead, if given
+if len(sys.argv) > 2:
+    fetcher = tracestore.TraceStore(sys.argv[2])
+else:
+    fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+
+
+def reentrancy(_api):
+    sload = _api.get_ops("SLOAD", depth=(operator.gt, 2))
+    sload.link_ops(_api.get_ops("JUMPI"), call_index=operator.eq, depth=operator.eq)
+    sload.reduce_descendant(self_def_var=True, link_def_var=False, link_use_vi=1)
+    sload.link_ops(
+        _api.get_ops("SSTORE"),
+        depth=lambda x, y: x - 2 > y,
+        op_index=operator.lt,
+        save_links=True,
+    )
+    sload.reduce_value(
+        operator.ne,
+        self_def_var=False,
+        self_use_vi=0,
+        link_def_var=False,
+        link_use_vi=0,
+    )
+    sload.reduce_address()
+    return sload
+
+
+def timestamp(_api):
+    timestamp = _api.get_ops("TIMESTAMP", depth=(operator.eq, 1))
+    timestamp.link_ops(
+        _api.get_ops("JUMPI", depth=(operator.eq, 1)), op_index=operator.lt
+    )
+    timestamp.reduce_descendant(self_def_var=True, link_def_var=False, link_use_vi=1)
+    return timestamp
+
+
+def uncheckedcall(_api):
+    calls = _api.get_ops("CALL", depth=(operator.eq, 1))
+    calls.link_ops(
+        _api.get_ops("JUMPI", depth=(operator.eq, 1)),
+        depth=operator.eq,
+        call_index=operator.eq,
+    )
+    calls.reduce_descendant(self_def_var=True, link_def_var=False, link_use_vi=1)
+    return _api.get_ops("CALL", depth=(operator.eq, 1)) - calls
+
+
+def failedsend(_api):
+    revert = _api.get_ops("REVERT", depth=(operator.eq, 1))
+    call = _api.get_ops("CALL", depth=(operator.eq, 1))
+    jumpi = _api.get_ops("JUMPI", depth=(operator.eq, 1))
+    call.filter_value(0, operator.ne, def_var=False, use_vi=2)
+    call.filter_value(0, operator.eq, def_var=True)
+    jumpi.link_ops(revert, op_index=operator.lt)
+    jumpi.link_ops(call, op_index=operator.gt)
+    jumpi.reduce_ancestor(self_def_var=False, self_use_vi=1, link_def_var=True)
+    return jumpi
+
+
+HEURISTICS = [reentrancy, timestamp, uncheckedcall, failedsend]
+
+
+def run_heuristic(heuristic, _api):
+    try:
+        view = heuristic(_api)
+    except LookupError as e:
+        # a call depth without a known address
+        return repr(e)
+    return {op: (list(links), links.cached_chain) for op, links in view.items()}
+
+
+def run_benchmark(txs):
+    times = {"one analyzer per heuristic": 0, "one shared analyzer": 0}
+    copy_times = {"OpView.copy": 0, "copy.deepcopy": 0}
+
+    for i, tx in enumerate(txs):
+        print("On iteration ", i)
+        cfg = tac_cfg.TACGraph.from_trace(tx)
+
+        start_time = timeit.default_timer()
+        separate = [run_heuristic(h, api.OpAnalyzer(cfg)) for h in HEURISTICS]
+        times["one analyzer per heuristic"] += timeit.default_timer() - start_time
+
+        start_time = timeit.default_timer()
+        _api = api.OpAnalyzer(cfg)
+        shared = [run_heuristic(h, _api) for h in HEURISTICS]
+        times["one shared analyzer"] += timeit.default_timer() - start_time
+
+        if separate != shared:
+            raise ValueError(f"Results differ for {tx['tx']}")
+
+        # isolating heuristics by copying the analyzer's OpViews
+        for name, copy_view in (
+            ("OpView.copy", lambda view: view.copy()),
+            ("copy.deepcopy", copy.deepcopy),
+        ):
+            start_time = timeit.default_timer()
+            try:
+                for view in _api.ops.values():
+                    copy_view(view)
+            except RecursionError:
+                # deepcopy recurses down the def-use graph of the variables
+                print(f"{name} exceeded the recursion limit")
+            copy_times[name] += timeit.default_timer() - start_time
+
+    return times, copy_times
+
+
+tests = int(sys.argv[1])
+
+times, copy_times = run_benchmark(
+    fetcher.sample_txs(tests, SEED, fields=mgofetcher.ANALYSIS_FIELDS, raw=True)
+)
+
+print(f"Ran {len(HEURISTICS)} heuristics on {tests} transactions")
+for name, elapsed in times.items():
+    print(f"{name}: {elapsed:.3f}s ({elapsed / tests * 1000:.2f} ms/tx)")
+for name, elapsed in copy_times.items():
+    print(f"copying every OpView with {name}: {elapsed / tests * 1000:.2f} ms/tx")
@@ -0,0 +1,94 @@
+import sys
+from os.path import abspath, dirname, join
+import operator
+import random
+import timeit
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+from decompiler.analyzer.op import Op, OpView
+from decompiler.analyzer.predicate import Eq, Gt
+
+SEED = 0
+OPS = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+LEGACY_OPS = 5000
+OPS_PER_CALL = 100
+
+CASES = {
+    "hash join (call_index, depth ==)": {
+        "call_index": operator.eq,
+        "depth": operator.eq,
+    },
+    "range join (call_index ==, op_index <)": {
+        "call_index": operator.eq,
+        "op_index": operator.lt,
+    },
+    "lambda fallback (call_index ==, depth - 2 >)": {
+        "call_index": operator.eq,
+        "depth": lambda x, y: x - 2 > y,
+    },
+    "predicate range join (call_index ==, depth - 2 >)": {
+        "call_index": Eq(),
+        "depth": Gt(offset=-2),
+    },
+}
+
+
+def make_view(n, name, rng):
+    """A view of n ops spread over calls, as a long transaction would have"""
+    view = OpView()
+    for i in range(n):
+        call_index = i // OPS_PER_CALL
+        view.add_op(Op(2 * i + len(name) % 2, call_index, 0, name, rng.randint(1, 5)))
+    return view
+
+
+def legacy_link_ops(self, other, **kwargs):
+    """OpView.link_ops as it was before joins, calling every predicate for
+    each pair of property tuples, with its cache reusing links as intended,
+    and each op's links a list"""
+    other_keys = other.get_keys(kwargs.keys())
+    cached_links = {}
+
+    for op1 in list(self.keys()):
+        self[op1] = []
+        cached_val = tuple(getattr(op1, key) for key in kwargs.keys())
+        if cached_val not in cached_links:
+            cached_links[cached_val] = []
+            for attrs in other_keys.keys():
+                if all(
+                    func(getattr(op1, key), attrs[idx])
+                    for idx, (key, func) in enumerate(kwargs.items())
+                ):
+                    cached_links[cached_val].extend(other_keys[attrs])
+        self[op1].extend(cached_links[cached_val])
+        if len(self[op1]) == 0:
+            del self[op1]
+
+
+def run_case(n, kwargs, legacy):
+    rng = random.Random(SEED)
+    sload, jumpi = make_view(n, "SLOAD", rng), make_view(n, "JUMPI", rng)
+
+    start_time = timeit.default_timer()
+    if legacy:
+        legacy_link_ops(sload, jumpi, **kwargs)
+    else:
+        sload.link_ops(jumpi, **kwargs)
+    elapsed = timeit.default_timer() - start_time
+
+    return elapsed, sum(len(links) for links in sload.values())
+
+
+print(f"Linking {OPS} ops to {OPS} ops, legacy on {LEGACY_OPS} to {LEGACY_OPS}")
+for name, kwargs in CASES.items():
+    legacy_time, legacy_links = run_case(LEGACY_OPS, kwargs, True)
+    small_time, small_links = run_case(LEGACY_OPS, kwargs, False)
+    if legacy_links != small_links:
+        raise ValueError(f"{name}: {legacy_links} != {small_links} links")
+
+    elapsed, links = run_case(OPS, kwargs, False)
+    print(
+        f"{name}: legacy {legacy_time:.3f}s, join {small_time:.3f}s "
+        f"on {LEGACY_OPS}; join {elapsed:.3f}s on {OPS} ({links} links)"
+    )
@@ -0,0 +1,72 @@
+import sys
+from os.path import abspath, dirname, join
+import operator
+import random
+import tracemalloc
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+from decompiler.analyzer.op import Op, OpView
+
+SEED = 0
+OPS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+OPS_PER_CALL = 100
+
+
+def make_view(n, name, rng):
+    """A view of n ops spread over calls, as a long transaction would have"""
+    view = OpView()
+    for i in range(n):
+        call_index = i // OPS_PER_CALL
+        view.add_op(Op(2 * i + len(name) % 2, call_index, 0, name, rng.randint(1, 5)))
+    return view
+
+
+def traced(func):
+    """Returns the result of func and the memory it retains"""
+    tracemalloc.stop()
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def as_lists(view):
+    """The links of view as OpChain kept them before link layers: a list of
+    ops per op, and with save_links a copy of the previous list"""
+    return {
+        op: (
+            list(links),
+            None if links.cached_chain is None else list(links.cached_chain),
+        )
+        for op, links in view.items()
+    }
+
+
+rng = random.Random(SEED)
+sload, jumpi, sstore = (
+    make_view(OPS, name, rng) for name in ("SLOAD", "JUMPI", "SSTORE")
+)
+
+# every SLOAD linked to every JUMPI of its call, then to the later SSTOREs
+_, first = traced(lambda: sload.link_ops(jumpi, call_index=operator.eq))
+links = sum(len(links) for links in sload.values())
+_, first_lists = traced(lambda: as_lists(sload))
+
+_, second = traced(
+    lambda: sload.link_ops(
+        sstore, call_index=operator.eq, op_index=operator.lt, save_links=True
+    )
+)
+saved = sum(len(links) for links in sload.values())
+_, second_lists = traced(lambda: as_lists(sload))
+
+print(f"Linking {OPS} SLOADs to the JUMPIs of their call ({links} links)")
+print(
+    f"lists: {first_lists / links:.1f} bytes/link, layers: {first / links:.1f} bytes/link"
+)
+print(f"Then to the later SSTOREs of their call, saving the JUMPIs ({saved} links)")
+print(
+    f"lists: {second_lists / saved:.1f} bytes/link, layers: {second / saved:.1f} bytes/link"
+)
@@ -0,0 +1,151 @@
+import sys
+from os.path import abspath, dirname, join
+import random
+import timeit
+import tracemalloc
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.opcodes as opcodes
+import decompiler.tac_cfg as tac_cfg
+from decompiler.analyzer import api
+
+SEED = 0
+REPEATS = 5
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+MAX_DEPTH = 4
+
+BINARY = ["ADD", "MUL", "SUB", "DIV", "LT", "GT", "EQ", "AND", "OR", "XOR", "SHL"]
+
+
+class TraceWriter:
+    """Writes an op trace of nested call frames, numbering the pc of each op
+    of a frame by the size of the op before it"""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.lines = []
+
+    def frame(self, rounds, depth):
+        """A call frame of arithmetic, stack, memory, storage and environment
+        ops, calling a precompile, then a contract of its own, until
+        MAX_DEPTH is reached"""
+        pc = 0
+
+        def log(name, output="0x0"):
+            nonlocal pc
+            self.lines.append(f"{pc},0,{depth},{name},100000,3,{output}")
+            pc += opcodes.opcode_by_name(name).op_pc_gap()
+
+        def push_call_args(address):
+            for arg in (0x20, 0x80, 0x20, 0x0, 0x0, address, 0x10000):
+                log("PUSH32", hex(arg))
+
+        rng = self.rng
+        for _ in range(rounds):
+            log("PUSH1", hex(rng.randrange(1, 32)))
+            log("PUSH32", hex(rng.randrange(2**256)))
+            log("SWAP1")
+            log(rng.choice(BINARY))
+            log("DUP1")
+            log("PUSH1", "0x40")
+            log("MSTORE")
+            log("PUSH1", "0x5")
+            log("SLOAD", hex(rng.randrange(100)))
+            log("ADD")
+            log("ISZERO")
+            log("PUSH1", "0x1")
+            log("SSTORE")
+            log("CALLER", hex(rng.randrange(2**160)))
+            log("PUSH1", "0x0")
+            log("CALLDATALOAD", hex(rng.randrange(2**64)))
+            log("ADD")
+            log("TIMESTAMP", hex(rng.randrange(2**32)))
+            log("GT")
+            log("PUSH1", "0x0")
+            log("DUP2")
+            log("LOG1")
+            log("POP")
+
+        # a precompile opens no frame of its own
+        push_call_args(0x2)
+        log("STATICCALL", "0x1")
+        log("POP")
+
+        if depth < MAX_DEPTH:
+            push_call_args(rng.randrange(2**160))
+            self.frame(rounds // 2, depth + 1)
+            log("CALL", "0x1")
+            log("ISZERO")
+            log("POP")
+        log("STOP")
+
+
+def make_trace(rounds, rng):
+    writer = TraceWriter(rng)
+    writer.frame(rounds, 1)
+    return "\n".join(writer.lines), len(writer.lines)
+
+
+def two_phase(trace):
+    return api.OpAnalyzer(tac_cfg.TACGraph.from_trace(trace))
+
+
+def direct(trace):
+    return api.OpAnalyzer(trace=trace)
+
+
+def summary(_api):
+    """The ops, variables and addresses of an OpAnalyzer, by symbol"""
+    symbol = lambda var: None if var is None else var.symbol
+    ops = {
+        name: [
+            (
+                op.op_index,
+                op.call_index,
+                op.pc,
+                op.depth,
+                symbol(op.def_var),
+                [symbol(var) for var in op.use_vars],
+            )
+            for op in view
+        ]
+        for name, view in _api.ops.items()
+    }
+    variables = {
+        name: (
+            var.value,
+            [symbol(pred) for pred in var.preds],
+            [symbol(succ) for succ in var.succs],
+        )
+        for name, var in _api.variables.items()
+    }
+    addresses = {name: view.addresses for name, view in _api.ops.items()}
+    return ops, variables, addresses
+
+
+def measure(load, trace):
+    """Returns the retained and peak memory in MB of loading trace"""
+    tracemalloc.stop()
+    tracemalloc.start()
+    _api = load(trace)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del _api
+    return size / (1024 * 1024), peak / (1024 * 1024)
+
+
+optrace, ops = make_trace(ROUNDS, random.Random(SEED))
+trace = {"optrace": optrace, "to": "0xabc"}
+
+if summary(two_phase(trace)) != summary(direct(trace)):
+    raise AssertionError("OpAnalyzer(trace=...) differs from OpAnalyzer(cfg)")
+
+print(f"Loaded {ops} ops (best of {REPEATS})")
+for name, load in (("TACGraph, then OpAnalyzer", two_phase), ("TraceLoader", direct)):
+    elapsed = min(timeit.repeat(lambda: load(trace), number=1, repeat=REPEATS))
+    size, peak = measure(load, trace)
+    print(
+        f"{name}: {elapsed:.4f}s ({ops / elapsed:.0f} ops/s), "
+        f"retained {size:.2f} MB, peak {peak:.2f} MB"
+    )
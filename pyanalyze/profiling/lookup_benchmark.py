@@ -0,0 +1,43 @@
+import sys
+from os.path import abspath, dirname, join
+import timeit
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.mgofetcher as mgofetcher
+
+URI = "mongodb://127.0.0.1"
+COLLECTION = "ethereum"
+DATABASE = "ethlogger2"
+SEED = 0
+
+fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+
+
+def lookup_each(hashes):
+    """Look up every hash with its own get_tx round-trip"""
+    return sum(fetcher.get_tx(h, ["tx"]) is not None for h in hashes)
+
+
+def lookup_bulk(hashes, ordered):
+    return sum(tx is not None for h, tx in fetcher.get_txs(hashes, ordered=ordered))
+
+
+tests = int(sys.argv[1])
+
+hashes = [tx["tx"] for tx in fetcher.sample_txs(tests, SEED, fields=["tx"])]
+# A few hashes that were never logged, to be reported as missing
+hashes += ["0x" + format(i, "064x") for i in range(10)]
+
+lookups = {
+    "get_tx per hash": lambda: lookup_each(hashes),
+    "get_txs ordered": lambda: lookup_bulk(hashes, True),
+    "get_txs unordered": lambda: lookup_bulk(hashes, False),
+}
+
+print(f"Looking up {len(hashes)} hashes")
+for name, lookup in lookups.items():
+    start_time = timeit.default_timer()
+    found = lookup()
+    elapsed = timeit.default_timer() - start_time
+    print(f"{name}: found {found} in {elapsed:.3f}s")
@@ -0,0 +1,116 @@
+import sys
+from os.path import abspath, dirname, join
+import timeit
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.opcodes as opcodes
+
+REPEATS = 5
+OPS = [op for op in opcodes.BYTECODES.values() if op.code >= 0] * 1000
+
+
+def legacy_is_kind_one(op):
+    """OpCode.is_kind_one as it was before the property table"""
+    special = {
+        opcodes.ADDRESS.name,
+        opcodes.ORIGIN.name,
+        opcodes.CALLER.name,
+        opcodes.CALLVALUE.name,
+        opcodes.CALLDATASIZE.name,
+        opcodes.CODESIZE.name,
+        opcodes.GASPRICE.name,
+        opcodes.RETURNDATASIZE.name,
+        opcodes.COINBASE.name,
+        opcodes.TIMESTAMP.name,
+        opcodes.NUMBER.name,
+        opcodes.DIFFICULTY.name,
+        opcodes.GASLIMIT.name,
+        opcodes.PC.name,
+        opcodes.MSIZE.name,
+        opcodes.GAS.name,
+    }
+    return op.name in special
+
+
+def legacy_is_kind_four(op):
+    special = {
+        opcodes.CALL.name,
+        opcodes.CALLCODE.name,
+        opcodes.DELEGATECALL.name,
+        opcodes.STATICCALL.name,
+    }
+    return op.name in special
+
+
+def legacy_is_kind_five(op):
+    special = {opcodes.CREATE.name, opcodes.CREATE2.name}
+    return op.name in special
+
+
+def legacy_possibly_halts(op):
+    halt_codes = (
+        opcodes.STOP.code,
+        opcodes.RETURN.code,
+        opcodes.SELFDESTRUCT.code,
+        opcodes.THROW.code,
+        opcodes.REVERT.code,
+    )
+    invalid = (op.code == opcodes.INVALID.code) or op.code not in opcodes.BYTECODES
+    return (op.code in halt_codes) or invalid or op.code == opcodes.THROWI.code
+
+
+def classify_legacy(ops):
+    """The checks made for every op when building blocks and TAC"""
+    for op in ops:
+        legacy_is_kind_four(op) or legacy_is_kind_five(op)
+        legacy_possibly_halts(op)
+        legacy_is_kind_one(op)
+
+
+def classify_methods(ops):
+    for op in ops:
+        op.is_kind_four() or op.is_kind_five()
+        op.possibly_halts()
+        op.is_kind_one()
+
+
+def classify_table(ops):
+    properties = opcodes.PROPERTIES
+    for op in ops:
+        flags = properties[op.code]
+        flags & (opcodes.Property.KIND_FOUR | opcodes.Property.KIND_FIVE)
+        flags & opcodes.Property.POSSIBLY_HALTS
+        flags & opcodes.Property.KIND_ONE
+
+
+def lookup_upper(names):
+    for name in names:
+        opcodes.OPCODES[name.upper()]
+
+
+def lookup_direct(names):
+    for name in names:
+        opcodes.NAMES[name]
+
+
+def best_time(func, *args):
+    return min(timeit.repeat(lambda: func(*args), number=1, repeat=REPEATS))
+
+
+times = {
+    "legacy predicates": best_time(classify_legacy, OPS),
+    "table predicates": best_time(classify_methods, OPS),
+    "table lookups": best_time(classify_table, OPS),
+}
+names = [op.name for op in OPS]
+name_times = {
+    "upper-cased lookup": best_time(lookup_upper, names),
+    "direct lookup": best_time(lookup_direct, names),
+}
+
+print(f"Classified {len(OPS)} ops (best of {REPEATS})")
+for name, elapsed in times.items():
+    print(f"{name}: {elapsed:.4f}s ({len(OPS) / elapsed:.0f} ops/s)")
+for name, elapsed in name_times.items():
+    print(f"{name}: {elapsed:.4f}s ({len(OPS) / elapsed:.0f} names/s)")
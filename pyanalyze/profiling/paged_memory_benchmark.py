@@ -0,0 +1,82 @@
+import sys
+from os.path import abspath, dirname, join
+from collections import defaultdict
+import random
+import timeit
+import tracemalloc
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.memtypes as mem
+
+SEED = 0
+REPEATS = 5
+FRAMES = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+FRAME_STORES = 1000
+FAR_OFFSET = 1 << 24
+
+
+def make_frame(rng, far):
+    """The MSTOREs, MSTORE8s and CALLDATACOPYs of a frame, as (offset, value,
+    length), mostly below 4 KiB, and with far set, one at FAR_OFFSET"""
+    stores = []
+    for _ in range(FRAME_STORES):
+        r = rng.random()
+        if r < 0.7:
+            stores.append((rng.randrange(0, 4096, 32), rng.randrange(2**256), 32))
+        elif r < 0.8:
+            stores.append((rng.randrange(4096), rng.randrange(256), 1))
+        else:
+            length = rng.randrange(4, 512)
+            stores.append((rng.randrange(4096), rng.randrange(2**32), length))
+    if far:
+        stores.append((FAR_OFFSET, rng.randrange(2**256), 32))
+    return stores
+
+
+def flat(frames):
+    """One bytearray shared by every frame, grown and zero-filled to the end
+    of each store"""
+    memory = bytearray()
+    for stores in frames:
+        for offset, value, length in stores:
+            if offset + length > len(memory):
+                memory.extend(bytes(offset + length - len(memory)))
+            memory[offset : offset + length] = value.to_bytes(length, "big")
+    return memory
+
+
+def paged(frames):
+    """A PagedMemory per frame, as TACGraph.memory holds them"""
+    memory = defaultdict(mem.PagedMemory)
+    for frame, stores in enumerate(frames):
+        frame_memory = memory[frame]
+        for offset, value, length in stores:
+            frame_memory.write_int(offset, value, length)
+    return memory
+
+
+def peak_memory(fold, frames):
+    """Returns the peak memory in MB of folding the stores of frames"""
+    tracemalloc.stop()
+    tracemalloc.start()
+    fold(frames)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+rng = random.Random(SEED)
+for far in (False, True):
+    frames = [make_frame(rng, far) for _ in range(FRAMES)]
+    stores = sum(len(stores) for stores in frames)
+
+    kind = f"with a store at {FAR_OFFSET:#x} in each frame" if far else "below 4 KiB"
+    print(f"Folded {stores} stores of {FRAMES} frames {kind} (best of {REPEATS})")
+    for name, fold in (("flat bytearray", flat), ("PagedMemory", paged)):
+        elapsed = min(timeit.repeat(lambda: fold(frames), number=1, repeat=REPEATS))
+        peak = peak_memory(fold, frames)
+        print(
+            f"{name}: {elapsed:.4f}s ({stores / elapsed:.0f} stores/s), "
+            f"peak {peak:.2f} MB"
+        )
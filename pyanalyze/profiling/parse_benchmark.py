@@ -0,0 +1,146 @@
+import sys
+from os.path import abspath, dirname, join
+import timeit
+import tracemalloc
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.mgofetcher as mgofetcher
+import decompiler.tracestore as tracestore
+import decompiler.evm_cfg as evm_cfg
+import decompiler.opcodes as opcodes
+import decompiler.optrace as optrace
+
+URI = "mongodb://127.0.0.1"
+COLLECTION = "ethereum"
+DATABASE = "ethlogger2"
+SEED = 0
+REPEATS = 5
+
+# Read from a trace store exported by tracestore.export instead, if given
+if len(sys.argv) > 2:
+    fetcher = tracestore.TraceStore(sys.argv[2])
+else:
+    fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+
+
+def parse_lines(text):
+    """The line-by-line parse previously done by TACGraph.from_trace"""
+    ops = []
+
+    for index, l in enumerate(text.split("\n")):
+        if len(l.strip()) > 0:
+            args = l.strip().split(",")
+            pc = int(args[0])
+            call_index = int(args[1])
+            opcode = opcodes.opcode_by_name(args[3])
+            depth = int(args[2])
+
+            val_str = args[6]
+
+            value = None
+            extra = None
+
+            if ":" in val_str:
+                if val_str.split(":")[1] != "0x":
+                    extra = int(val_str.split(":")[1], 16)
+                value = int(val_str.split(":")[0], 16)
+            elif val_str != "0x":
+                value = int(val_str, 16)
+            elif val_str == "0x":
+                value = 0
+
+            ops.append(
+                evm_cfg.EVMOp(pc, opcode, value, depth, call_index, index, extra)
+            )
+
+    return ops
+
+
+def best_time(func, *args):
+    return min(timeit.repeat(lambda: func(*args), number=1, repeat=REPEATS))
+
+
+def peak_mem(func, *args):
+    tracemalloc.stop()
+    tracemalloc.start()
+    func(*args)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def stream_blocks(text):
+    """Consume the streamed blocks one at a time, as TACGraph.__init__ does"""
+    for block in evm_cfg.iter_blocks(optrace.iter_optrace(text)):
+        pass
+
+
+def run_parse(txs):
+    total_ops = 0
+    times = {
+        "lines": 0,
+        "columns": 0,
+        "binary": 0,
+        "lines + blocks": 0,
+        "columns + blocks": 0,
+        "binary + blocks": 0,
+    }
+    sizes = {"text": 0, "binary": 0}
+    peaks = {"lines + blocks": 0, "streamed blocks": 0}
+
+    for i, tx in enumerate(txs):
+        print("On iteration ", i)
+        text = tx["optrace"]
+
+        # Traces logged with --mongo.encoding text have no binary encoding
+        binary = tx.get("optracebin")
+        if binary is None:
+            binary = optrace.write_binary(optrace.parse_optrace(text))
+
+        sizes["text"] += len(text)
+        sizes["binary"] += len(binary)
+
+        total_ops += len(optrace.parse_optrace(text))
+        times["lines"] += best_time(parse_lines, text)
+        times["columns"] += best_time(optrace.parse_optrace, text)
+        times["binary"] += best_time(optrace.read_binary, binary)
+        times["lines + blocks"] += best_time(
+            lambda: evm_cfg.blocks_from_ops(parse_lines(text))
+        )
+        times["columns + blocks"] += best_time(
+            lambda: evm_cfg.blocks_from_columns(optrace.parse_optrace(text))
+        )
+        times["binary + blocks"] += best_time(
+            lambda: evm_cfg.blocks_from_columns(optrace.read_binary(binary))
+        )
+
+        peaks["lines + blocks"] = max(
+            peaks["lines + blocks"],
+            peak_mem(lambda: evm_cfg.blocks_from_ops(parse_lines(text))),
+        )
+        peaks["streamed blocks"] = max(
+            peaks["streamed blocks"], peak_mem(stream_blocks, text)
+        )
+
+    return total_ops, times, peaks, sizes
+
+
+tests = int(sys.argv[1])
+
+total_ops, times, peaks, sizes = run_parse(fetcher.sample_txs(tests, SEED))
+
+print(f"Parsed {tests} transactions, {total_ops} ops (best of {REPEATS})")
+for name, elapsed in times.items():
+    print(f"{name}: {elapsed:.3f}s ({total_ops / elapsed:.0f} ops/s)")
+print(f"Parse speedup: {times['lines'] / times['columns']:.2f}x")
+print(f"Binary read speedup: {times['lines'] / times['binary']:.2f}x")
+print(
+    f"Parse + blocks speedup: {times['lines + blocks'] / times['columns + blocks']:.2f}x"
+)
+print(
+    f"Binary + blocks speedup: {times['lines + blocks'] / times['binary + blocks']:.2f}x"
+)
+print(f"Trace size: text {sizes['text']} bytes, binary {sizes['binary']} bytes")
+for name, peak in peaks.items():
+    print(f"{name}: largest peak memory {peak:.2f} MB")
@@ -6,6 +6,7 @@ import timeit
 sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
 
 import decompiler.mgofetcher as mgofetcher
+import decompiler.tracestore as tracestore
 import decompiler.analyzer.api as api
 import decompiler.tac_cfg as tac_cfg
 import operator
@@ -15,8 +16,13 @@ URI = "mongodb://127.0.0.1"
 COLLECTION = "ethereum"
 DATABASE = "ethlogger2"
 TX_HASH = "0x37085f336b5d3e588e37674544678f8cb0fc092a6de5d83bd647e20e5232897b"
+SEED = 0
 
-fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+# Read from a trace store exported by tracestore.export instead, if given
+if len(sys.argv) > 2:
+    fetcher = tracestore.TraceStore(sys.argv[2])
+else:
+    fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
 
 tx = fetcher.get_tx(TX_HASH)
 
@@ -32,7 +38,7 @@ def run_reentrancy(tests):
     mem_avgs = []
     time_avgs = []
 
-    for i, tx in enumerate(fetcher.get_random_txs(tests)):
+    for i, tx in enumerate(fetcher.sample_txs(tests, SEED, fields=mgofetcher.ANALYSIS_FIELDS, raw=True)):
         print("On iteration ", i)
 
         cfg = tac_cfg.TACGraph.from_trace(tx)
@@ -0,0 +1,92 @@
+import sys
+from os.path import abspath, dirname, join
+import operator
+import timeit
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.mgofetcher as mgofetcher
+import decompiler.tracestore as tracestore
+import decompiler.analyzer.api as api
+import decompiler.tac_cfg as tac_cfg
+
+URI = "mongodb://127.0.0.1"
+COLLECTION = "ethereum"
+DATABASE = "ethlogger2"
+SEED = 0
+
+# Read from a trace store exported by tracestore.export instead, if given
+if len(sys.argv) > 2:
+    fetcher = tracestore.TraceStore(sys.argv[2])
+else:
+    fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+
+
+def reentrancy(_api, lazy):
+    """The reentrancy heuristic of examples/example_reentrancy.py, on OpViews
+    from get_ops or on Querys"""
+    get_ops = _api.query if lazy else _api.get_ops
+
+    sload = get_ops("SLOAD", depth=(operator.gt, 2))
+    jumpi = get_ops("JUMPI")
+
+    sload.link_ops(jumpi, call_index=operator.eq, depth=operator.eq)
+    sload.reduce_descendant(self_def_var=True, link_def_var=False, link_use_vi=1)
+
+    sstore = get_ops("SSTORE")
+    sload.link_ops(
+        sstore, depth=lambda x, y: x - 2 > y, op_index=operator.lt, save_links=True
+    )
+    sload.reduce_value(
+        operator.ne,
+        self_def_var=False,
+        self_use_vi=0,
+        link_def_var=False,
+        link_use_vi=0,
+    )
+    sload.reduce_address()
+
+    return sload.run() if lazy else sload
+
+
+def measure(cfg, lazy):
+    _api = api.OpAnalyzer(cfg)
+
+    start_time = timeit.default_timer()
+    try:
+        view = reentrancy(_api, lazy)
+    except LookupError as e:
+        # a call depth without a known address
+        return timeit.default_timer() - start_time, repr(e)
+    elapsed = timeit.default_timer() - start_time
+
+    return elapsed, {op: (list(links), links.cached_chain) for op, links in view.items()}
+
+
+def run_benchmark(txs):
+    times = {"eager": 0, "query": 0}
+
+    for i, tx in enumerate(txs):
+        print("On iteration ", i)
+        cfg = tac_cfg.TACGraph.from_trace(tx)
+
+        eager_time, eager_links = measure(cfg, False)
+        query_time, query_links = measure(cfg, True)
+        times["eager"] += eager_time
+        times["query"] += query_time
+
+        if eager_links != query_links:
+            raise ValueError(f"Links differ for {tx['tx']}")
+
+    return times
+
+
+tests = int(sys.argv[1])
+
+times = run_benchmark(
+    fetcher.sample_txs(tests, SEED, fields=mgofetcher.ANALYSIS_FIELDS, raw=True)
+)
+
+print(f"Ran the reentrancy heuristic on {tests} transactions")
+for name, elapsed in times.items():
+    print(f"{name}: {elapsed:.3f}s ({elapsed / tests * 1000:.2f} ms/tx)")
@@ -0,0 +1,84 @@
+import sys
+from os.path import abspath, dirname, join
+import operator
+import timeit
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.mgofetcher as mgofetcher
+import decompiler.tracestore as tracestore
+import decompiler.analyzer.api as api
+import decompiler.tac_cfg as tac_cfg
+
+URI = "mongodb://127.0.0.1"
+COLLECTION = "ethereum"
+DATABASE = "ethlogger2"
+SEED = 0
+
+# Read from a trace store exported by tracestore.export instead, if given
+if len(sys.argv) > 2:
+    fetcher = tracestore.TraceStore(sys.argv[2])
+else:
+    fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+
+
+def linked_sload(cfg):
+    """SLOADs linked to the JUMPIs of their call, as in the reentrancy heuristic"""
+    _api = api.OpAnalyzer(cfg)
+    sload = _api.get_ops("SLOAD")
+    sload.link_ops(_api.get_ops("JUMPI"), call_index=operator.eq, depth=operator.eq)
+    return sload
+
+
+def walk_descendants(view):
+    """reduce_descendant as it was done before the reachability index, by
+    listing every descendant of each op and searching the list"""
+    links = 0
+    for op in list(view.keys()):
+        linked_vars = op.def_var.get_descendants()
+        links += sum(1 for link in view[op] if link.use_vars[1] in linked_vars)
+    return links
+
+
+def index_descendants(view):
+    view.reduce_descendant(self_def_var=True, link_def_var=False, link_use_vi=1)
+    return sum(len(links) for links in view.values())
+
+
+def run_reachability(txs):
+    times = {"walk": 0, "index": 0, "dominator": 0}
+
+    for i, tx in enumerate(txs):
+        print("On iteration ", i)
+        cfg = tac_cfg.TACGraph.from_trace(tx)
+
+        sload = linked_sload(cfg)
+        start_time = timeit.default_timer()
+        walked = walk_descendants(sload)
+        times["walk"] += timeit.default_timer() - start_time
+
+        sload = linked_sload(cfg)
+        start_time = timeit.default_timer()
+        indexed = index_descendants(sload)
+        times["index"] += timeit.default_timer() - start_time
+
+        if walked != indexed:
+            raise ValueError(f"Links differ for {tx['tx']}: {walked} != {indexed}")
+
+        sload = linked_sload(cfg)
+        start_time = timeit.default_timer()
+        sload.reduce_dominator(link_def_var=False, link_use_vi=1)
+        times["dominator"] += timeit.default_timer() - start_time
+
+    return times
+
+
+tests = int(sys.argv[1])
+
+times = run_reachability(
+    fetcher.sample_txs(tests, SEED, fields=mgofetcher.ANALYSIS_FIELDS, raw=True)
+)
+
+print(f"Reduced {tests} transactions")
+for name, elapsed in times.items():
+    print(f"{name}: {elapsed:.3f}s ({elapsed / tests * 1000:.2f} ms/tx)")
@@ -0,0 +1,60 @@
+import sys
+from os.path import abspath, dirname, join
+import random
+import timeit
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.memtypes as mem
+
+SEED = 0
+REPEATS = 5
+FRAMES = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+FRAME_OPS = 1000
+
+
+def make_frame(rng):
+    """The stack effects of a frame of PUSH, DUP, SWAP and binary ops, as the
+    Destackifier applies them, kept between 16 and 64 items deep"""
+    frame = []
+    depth = 0
+    for i in range(FRAME_OPS):
+        r = rng.random()
+        if depth < 16 or r < 0.3:
+            frame.append(("push", mem.Variable(values=[i], name=f"V{i}")))
+            depth += 1
+        elif r < 0.55:
+            frame.append(("dup", rng.randrange(1, 17)))
+            depth += 1
+        elif r < 0.8:
+            frame.append(("swap", rng.randrange(2, 18)))
+        elif depth > 64 or r < 0.95:
+            frame.append(("pop_many", 2))
+            frame.append(("push", mem.Variable(values=[i], name=f"V{i}")))
+            depth -= 1
+        else:
+            frame.append(("pop", None))
+            depth -= 1
+    return frame
+
+
+def replay(stack_type, frames):
+    for frame in frames:
+        stack = stack_type()
+        for method, arg in frame:
+            if arg is None:
+                getattr(stack, method)()
+            else:
+                getattr(stack, method)(arg)
+
+
+rng = random.Random(SEED)
+frames = [make_frame(rng) for _ in range(FRAMES)]
+ops = FRAMES * FRAME_OPS
+
+print(f"Replayed {FRAMES} frames of {FRAME_OPS} stack ops (best of {REPEATS})")
+for stack_type in (mem.VariableStack, mem.TraceStack):
+    elapsed = min(
+        timeit.repeat(lambda: replay(stack_type, frames), number=1, repeat=REPEATS)
+    )
+    print(f"{stack_type.__name__}: {elapsed:.4f}s ({ops / elapsed:.0f} ops/s)")
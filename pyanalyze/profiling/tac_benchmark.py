@@ -0,0 +1,67 @@
+import sys
+from os.path import abspath, dirname, join
+import random
+import timeit
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.tac_cfg as tac_cfg
+
+SEED = 0
+REPEATS = 5
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+BINARY = ["ADD", "MUL", "SUB", "DIV", "LT", "GT", "EQ", "AND", "OR", "XOR", "SHL"]
+
+
+def make_trace(rounds, rng):
+    """An op trace of one call, mixing arithmetic, stack, memory, storage
+    and environment ops, as the body of a contract would"""
+    lines = []
+
+    def log(name, output="0x0"):
+        lines.append(f"{len(lines)},0,1,{name},100000,3,{output}")
+
+    for _ in range(rounds):
+        log("PUSH1", hex(rng.randrange(1, 32)))
+        log("PUSH32", hex(rng.randrange(2**256)))
+        log("SWAP1")
+        log(rng.choice(BINARY))
+        log("DUP1")
+        log("PUSH1", "0x40")
+        log("MSTORE")
+        log("PUSH1", "0x5")
+        log("SLOAD", hex(rng.randrange(100)))
+        log("ADD")
+        log("ISZERO")
+        log("PUSH1", "0x1")
+        log("SSTORE")
+        log("CALLVALUE", hex(rng.randrange(1000)))
+        log("PUSH1", "0x0")
+        log("CALLDATALOAD", hex(rng.randrange(2**64)))
+        log("ADD")
+        log("POP")
+    return "\n".join(lines), len(lines)
+
+
+optrace, ops = make_trace(ROUNDS, random.Random(SEED))
+trace = {"optrace": optrace, "to": "0x0"}
+
+times = {
+    "value sets": min(
+        timeit.repeat(
+            lambda: tac_cfg.TACGraph.from_trace(trace, concrete=False),
+            number=1,
+            repeat=REPEATS,
+        )
+    ),
+    "concrete": min(
+        timeit.repeat(
+            lambda: tac_cfg.TACGraph.from_trace(trace), number=1, repeat=REPEATS
+        )
+    ),
+}
+
+print(f"Built TAC from {ops} ops (best of {REPEATS})")
+for name, elapsed in times.items():
+    print(f"{name}: {elapsed:.4f}s ({ops / elapsed:.0f} ops/s)")
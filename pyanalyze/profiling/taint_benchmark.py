@@ -0,0 +1,93 @@
+import sys
+from os.path import abspath, dirname, join
+import operator
+import timeit
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.mgofetcher as mgofetcher
+import decompiler.tracestore as tracestore
+import decompiler.analyzer.api as api
+import decompiler.tac_cfg as tac_cfg
+
+URI = "mongodb://127.0.0.1"
+COLLECTION = "ethereum"
+DATABASE = "ethlogger2"
+SEED = 0
+
+# Read from a trace store exported by tracestore.export instead, if given
+if len(sys.argv) > 2:
+    fetcher = tracestore.TraceStore(sys.argv[2])
+else:
+    fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+
+
+def linked_views(_api):
+    """The source ops of the timestamp and reentrancy heuristics, linked to
+    the JUMPIs they may flow into"""
+    timestamp = _api.get_ops("TIMESTAMP", depth=(operator.eq, 1))
+    timestamp.link_ops(
+        _api.get_ops("JUMPI", depth=(operator.eq, 1)), op_index=operator.lt
+    )
+    sload = _api.get_ops("SLOAD", depth=(operator.gt, 2))
+    sload.link_ops(_api.get_ops("JUMPI"), call_index=operator.eq, depth=operator.eq)
+    return timestamp, sload
+
+
+def run_descendant(cfg):
+    timestamp, sload = linked_views(api.OpAnalyzer(cfg))
+
+    start_time = timeit.default_timer()
+    for view in (timestamp, sload):
+        view.reduce_descendant(self_def_var=True, link_def_var=False, link_use_vi=1)
+    elapsed = timeit.default_timer() - start_time
+
+    return elapsed, [
+        sum(len(links) for links in view.values()) for view in (timestamp, sload)
+    ]
+
+
+def run_taint(cfg):
+    _api = api.OpAnalyzer(cfg)
+    timestamp, sload = linked_views(_api)
+
+    start_time = timeit.default_timer()
+    taint = _api.taint(timestamp=timestamp, sload=sload)
+    for view in (timestamp, sload):
+        view.reduce_taint(taint, link_def_var=False, link_use_vi=1, strict=True)
+    elapsed = timeit.default_timer() - start_time
+
+    return elapsed, [
+        sum(len(links) for links in view.values()) for view in (timestamp, sload)
+    ]
+
+
+def run_benchmark(txs):
+    times = {"reduce_descendant": 0, "taint": 0}
+
+    for i, tx in enumerate(txs):
+        print("On iteration ", i)
+        cfg = tac_cfg.TACGraph.from_trace(tx)
+
+        elapsed, descendant_links = run_descendant(cfg)
+        times["reduce_descendant"] += elapsed
+        elapsed, taint_links = run_taint(cfg)
+        times["taint"] += elapsed
+
+        if descendant_links != taint_links:
+            raise ValueError(
+                f"Links differ for {tx['tx']}: {descendant_links} != {taint_links}"
+            )
+
+    return times
+
+
+tests = int(sys.argv[1])
+
+times = run_benchmark(
+    fetcher.sample_txs(tests, SEED, fields=mgofetcher.ANALYSIS_FIELDS, raw=True)
+)
+
+print(f"Reduced {tests} transactions")
+for name, elapsed in times.items():
+    print(f"{name}: {elapsed:.3f}s ({elapsed / tests * 1000:.2f} ms/tx)")
@@ -0,0 +1,62 @@
+import sys
+from os.path import abspath, dirname, join
+import tracemalloc
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.mgofetcher as mgofetcher
+import decompiler.tracestore as tracestore
+import decompiler.tac_cfg as tac_cfg
+
+URI = "mongodb://127.0.0.1"
+COLLECTION = "ethereum"
+DATABASE = "ethlogger2"
+SEED = 0
+
+# Read from a trace store exported by tracestore.export instead, if given
+if len(sys.argv) > 2:
+    fetcher = tracestore.TraceStore(sys.argv[2])
+else:
+    fetcher = mgofetcher.MongoFetcher(URI, DATABASE, COLLECTION)
+
+
+def decode_all(graph):
+    """Read every op's value and extra, as eager decoding would have"""
+    for block in graph.blocks:
+        for op in block.evm_ops:
+            op.value
+            op.extra
+
+
+def measure(tx, eager):
+    """Returns the retained and peak memory in MB of building tx's TACGraph"""
+    tracemalloc.stop()
+    tracemalloc.start()
+    graph = tac_cfg.TACGraph.from_trace(tx)
+    if eager:
+        decode_all(graph)
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / (1024 * 1024), peak / (1024 * 1024)
+
+
+def run_memory(txs):
+    results = {"lazy": [0, 0], "eager": [0, 0]}
+
+    for i, tx in enumerate(txs):
+        print("On iteration ", i)
+        for name, eager in (("lazy", False), ("eager", True)):
+            size, peak = measure(tx, eager)
+            results[name][0] += size
+            results[name][1] = max(results[name][1], peak)
+
+    return results
+
+
+tests = int(sys.argv[1])
+
+results = run_memory(fetcher.sample_txs(tests, SEED))
+
+print(f"Built {tests} transactions")
+for name, (size, peak) in results.items():
+    print(f"{name}: retained {size:.2f} MB, largest peak {peak:.2f} MB")
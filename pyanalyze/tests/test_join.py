@@ -0,0 +1,141 @@
+import sys
+from os.path import abspath, dirname, join
+import operator
+import random
+
+import pytest
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+from decompiler.analyzer.op import Op, OpView
+from decompiler.analyzer.predicate import Between, Eq, Ge, Gt, Le, Lt
+
+CASES = [
+    {"call_index": operator.eq},
+    {"call_index": operator.eq, "depth": operator.eq},
+    {"op_index": operator.lt},
+    {"op_index": operator.le},
+    {"op_index": operator.gt},
+    {"op_index": operator.ge},
+    {"call_index": operator.eq, "op_index": operator.lt},
+    {"depth": operator.eq, "pc": operator.ge, "op_index": operator.gt},
+    {"depth": Eq()},
+    {"depth": Gt(offset=-1), "call_index": Eq()},
+    {"op_index": Lt(offset=20), "pc": Le(offset=-3)},
+    {"depth": Ge(offset=1)},
+    {"depth": Between(2, 3), "call_index": operator.eq},
+    {"pc": Ge(offset=2) & Le(offset=-2), "call_index": Eq(offset=1)},
+    {"depth": lambda x, y: x - 1 > y, "op_index": operator.lt},
+]
+
+
+def make_view(rng, name, size, start):
+    """An OpView of size ops with few distinct properties, so that many
+    share the tuple of properties a join compares"""
+    view = OpView()
+    for i in range(size):
+        view.add_op(
+            Op(
+                start + rng.randrange(0, 40) * 1000 + i,
+                rng.randrange(4),
+                rng.randrange(10),
+                name,
+                rng.randrange(1, 5),
+            )
+        )
+    return view
+
+
+def called(kwargs):
+    """The kwargs as lambdas, which LinkJoin calls per group"""
+    return {
+        key: (lambda func: lambda x, y: func(x, y))(func)
+        for key, func in kwargs.items()
+    }
+
+
+def links(view):
+    return {
+        op.op_index: [link.op_index for link in chain] for op, chain in view.items()
+    }
+
+
+def satisfies(kwargs, op, linked):
+    return all(
+        func(getattr(op, key), getattr(linked, key)) for key, func in kwargs.items()
+    )
+
+
+def saved(view):
+    return {
+        op.op_index: [link.op_index for link in chain.cached_chain]
+        for op, chain in view.items()
+    }
+
+
+@pytest.mark.parametrize("kwargs", CASES, ids=repr)
+@pytest.mark.parametrize("seed", range(3))
+def test_join_matches_callable_fallback(seed, kwargs):
+    rng = random.Random(seed)
+    view = make_view(rng, "A", 60, 0)
+    other = make_view(rng, "B", 60, 500)
+
+    joined = view.copy()
+    joined.link_ops(other, **kwargs)
+    fallback = view.copy()
+    fallback.link_ops(other, **called(kwargs))
+
+    assert links(joined) == links(fallback)
+    for op, chain in joined.items():
+        assert {link.op_index for link in chain} == {
+            linked.op_index for linked in other if satisfies(kwargs, op, linked)
+        }
+    for op in view:
+        if op not in joined:
+            assert not any(satisfies(kwargs, op, linked) for linked in other)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_second_join_saving_links_matches_callable_fallback(seed):
+    rng = random.Random(seed)
+    view = make_view(rng, "A", 60, 0)
+    other = make_view(rng, "B", 60, 500)
+    first = {"call_index": operator.eq, "op_index": operator.lt}
+    second = {"depth": Gt(offset=-1), "pc": operator.ne}
+
+    joined = view.copy()
+    joined.link_ops(other, **first)
+    joined.link_ops(other, save_links=True, **second)
+    fallback = view.copy()
+    fallback.link_ops(other, **called(first))
+    fallback.link_ops(other, save_links=True, **called(second))
+
+    assert links(joined) == links(fallback)
+    assert saved(joined) == saved(fallback)
+
+
+def test_ops_sharing_properties_share_links():
+    view = OpView()
+    for i in range(3):
+        view.add_op(Op(i, 1, 0, "A", 1))
+    other = OpView()
+    other.add_op(Op(10, 1, 0, "B", 1))
+    other.add_op(Op(11, 2, 0, "B", 1))
+
+    view.link_ops(other, call_index=operator.eq)
+
+    assert links(view) == {0: [10], 1: [10], 2: [10]}
+
+
+def test_op_without_links_is_dropped_by_later_link():
+    view = OpView()
+    view.add_op(Op(0, 1, 0, "A", 1))
+    other = OpView()
+    other.add_op(Op(10, 1, 0, "B", 1))
+    view.link_ops(other, call_index=operator.eq)
+
+    # added after the first link_ops, so without links
+    view.add_op(Op(1, 1, 0, "A", 1))
+    view.link_ops(other, call_index=operator.eq)
+
+    assert links(view) == {0: [10]}
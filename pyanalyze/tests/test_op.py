@@ -0,0 +1,153 @@
+import sys
+from os.path import abspath, dirname, join
+import operator
+import random
+
+import pytest
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+from decompiler.analyzer.op import Op, OpView
+from decompiler.analyzer.variable import Variable
+
+
+def make_view(rng, name, size, start):
+    """An OpView of size ops, each defining a variable and using two, all of
+    values from 0 to 3"""
+    view = OpView()
+    for i in range(size):
+        use_vars = [Variable(f"{name}U{i}_{j}", rng.randrange(4)) for j in range(2)]
+        def_var = Variable(f"{name}D{i}", rng.randrange(4), use_vars)
+        view.add_op(Op(start + i, 0, i, name, 1, use_vars, def_var))
+    return view
+
+
+def links(view):
+    return {
+        op.op_index: [link.op_index for link in chain] for op, chain in view.items()
+    }
+
+
+@pytest.mark.parametrize("self_use_vi", [None, 0, 1])
+@pytest.mark.parametrize("seed", range(5))
+def test_reduce_value_of_used_variable_and_linked_def_var(seed, self_use_vi):
+    rng = random.Random(seed)
+    view = make_view(rng, "A", 20, 0)
+    other = make_view(rng, "B", 20, 100)
+    view.link_ops(other, op_index=operator.lt)
+
+    # the links the loop over each link kept before reduce_value was a
+    # reduce_where
+    expected = {}
+    for op, chain in view.items():
+        kept = []
+        for link in chain:
+            if self_use_vi is not None and operator.eq(
+                op.use_vars[self_use_vi].value, link.def_var.value
+            ):
+                continue
+            elif self_use_vi and not any(
+                op.def_var.value == usevar.value for usevar in link.use_vars
+            ):
+                continue
+            kept.append(link.op_index)
+        if kept:
+            expected[op.op_index] = kept
+
+    view.reduce_value(
+        operator.eq, self_def_var=False, self_use_vi=self_use_vi, link_def_var=True
+    )
+    assert links(view) == expected
+
+
+class ListView:
+    """The links of each op of an OpView as plain lists, linked and reduced
+    one link at a time, as OpView did before its links were LinkLayers"""
+
+    def __init__(self, view):
+        self.links = {op: [] for op in view}
+        self.cached = {op: None for op in view}
+        self.first_link = True
+
+    def link_ops(self, other, keep, save_links=False):
+        for op in list(self.links):
+            links = [link for link in other if keep(op, link)]
+            if (not self.first_link and not self.links[op]) or not links:
+                del self.links[op]
+                continue
+            self.cached[op] = self.links[op] if save_links else None
+            self.links[op] = links
+        self.first_link = False
+
+    def reduce_where(self, keep):
+        for op in list(self.links):
+            self.links[op] = [link for link in self.links[op] if keep(op, link)]
+            if not self.links[op]:
+                del self.links[op]
+
+    def reduce_value_of_use(self, oper, link_use_vi):
+        """reduce_value(oper, self_def_var=False, link_def_var=False,
+        link_use_vi=link_use_vi), which stops at the first link of each op
+        matching any variable it uses"""
+        for op in list(self.links):
+            for link in list(self.links[op]):
+                if any(
+                    oper(usevar.value, link.use_vars[link_use_vi].value)
+                    for usevar in op.use_vars
+                ):
+                    break
+                self.links[op].remove(link)
+                if not self.links[op]:
+                    del self.links[op]
+                    break
+
+    def rows(self, addresses, cached_links):
+        for op, links in self.links.items():
+            clinks = [None]
+            if cached_links:
+                clinks = sorted(self.cached[op], key=lambda clink: clink.op_index)
+            for clink in clinks:
+                for link in links:
+                    row = [op.op_index]
+                    if clink is not None:
+                        row.append(clink.op_index)
+                    row += [op.depth, op.call_index, link.op_index, link.depth]
+                    row += [link.call_index, addresses[op.depth], addresses[link.depth]]
+                    yield ", ".join(map(str, row)) + "\n"
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_layers_export_as_lists(tmp_path, seed):
+    rng = random.Random(seed)
+    view = make_view(rng, "A", 30, 0)
+    first = make_view(rng, "B", 30, 100)
+    second = make_view(rng, "C", 30, 200)
+    view.addresses = {1: "0xabc"}
+    model = ListView(view)
+
+    near = lambda x, y: (x + y) % 3 != 0
+    view.link_ops(first, pc=near)
+    model.link_ops(first, lambda op, link: near(op.pc, link.pc))
+    view.reduce_links(op_index=lambda x, y: (x * y) % 4 != 1)
+    model.reduce_where(lambda op, link: (op.op_index * link.op_index) % 4 != 1)
+
+    view.link_ops(second, save_links=True, pc=operator.le)
+    model.link_ops(second, lambda op, link: op.pc <= link.pc, save_links=True)
+    view.reduce_value(
+        operator.eq, self_def_var=False, link_def_var=False, link_use_vi=0
+    )
+    model.reduce_value_of_use(operator.eq, 0)
+    view.reduce_value(operator.eq, self_def_var=True, link_def_var=True)
+    model.reduce_where(lambda op, link: op.def_var.value != link.def_var.value)
+
+    assert len(view) != 0
+    assert links(view) == {
+        op.op_index: [link.op_index for link in chain]
+        for op, chain in model.links.items()
+    }
+    for cached_links in (False, True):
+        path = tmp_path / f"export-{cached_links}.csv"
+        view.export(str(path), cached_links)
+        assert path.read_text().splitlines(keepends=True) == list(
+            model.rows(view.addresses, cached_links)
+        )
@@ -0,0 +1,68 @@
+import sys
+from os.path import abspath, dirname, join
+import operator
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.opcodes as opcodes
+from decompiler.analyzer import api
+
+
+def storage_trace():
+    """A frame loading and storing slots 1 to 4, each twice"""
+    lines = []
+    pc = 0
+
+    def log(name, output="0x0"):
+        nonlocal pc
+        lines.append(f"{pc},0,1,{name},100000,3,{output}")
+        pc += opcodes.opcode_by_name(name).op_pc_gap()
+
+    for _ in range(2):
+        for slot in range(1, 5):
+            log("PUSH1", hex(slot))
+            log("SLOAD", hex(slot * 7))
+            log("PUSH1", hex(slot))
+            log("SSTORE")
+    log("STOP")
+    return {"optrace": "\n".join(lines), "to": "0xabc"}
+
+
+def links(view):
+    return {
+        op.op_index: [link.op_index for link in chain] for op, chain in view.items()
+    }
+
+
+def test_link_ops_uses_other_as_recorded():
+    trace = storage_trace()
+
+    eager = api.OpAnalyzer(trace=trace)
+    sload = eager.get_ops("SLOAD")
+    sstore = eager.get_ops("SSTORE")
+    sload.link_ops(sstore, op_index=operator.lt)
+    sstore.filter(op_index=(operator.lt, 10))
+
+    lazy = api.OpAnalyzer(trace=trace)
+    sload_query = lazy.query("SLOAD")
+    sstore_query = lazy.query("SSTORE")
+    sload_query.link_ops(sstore_query, op_index=operator.lt)
+    sstore_query.filter(op_index=(operator.lt, 10))
+
+    assert links(sload_query.run()) == links(sload)
+    assert links(sload_query.first()) == dict(list(links(sload).items())[:1])
+    assert links(sstore_query.run()) == links(sstore)
+
+
+def test_link_ops_to_itself_uses_view_as_recorded():
+    trace = storage_trace()
+
+    eager = api.OpAnalyzer(trace=trace).get_ops("SLOAD")
+    eager.link_ops(eager, op_index=operator.lt)
+    eager.filter(op_index=(operator.lt, 20))
+
+    query = api.OpAnalyzer(trace=trace).query("SLOAD")
+    query.link_ops(query, op_index=operator.lt)
+    query.filter(op_index=(operator.lt, 20))
+
+    assert links(query.run()) == links(eager)
@@ -0,0 +1,95 @@
+import sys
+from os.path import abspath, dirname, join
+import random
+import tracemalloc
+
+import pytest
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.analyzer.reachability as reachability
+from decompiler.analyzer.variable import Variable
+
+
+def make_variable(symbol, preds):
+    var = Variable(symbol, 0, preds)
+    for pred in preds:
+        if pred is not None:
+            pred.succs.append(var)
+    return var
+
+
+def random_graph(rng, size):
+    """A def-use graph of size variables, each using up to four earlier
+    ones, and sometimes a value never defined"""
+    variables = []
+    for i in range(size):
+        preds = rng.sample(variables, min(len(variables), rng.randint(0, 4)))
+        if rng.random() < 0.1:
+            preds.append(None)
+        variables.append(make_variable(f"V{i}", preds))
+    return variables
+
+
+def walked_ancestors(var):
+    ancestors = set()
+    stack = [var]
+    while stack:
+        for pred in stack.pop().preds:
+            if pred is not None and pred.symbol not in ancestors:
+                ancestors.add(pred.symbol)
+                stack.append(pred)
+    return ancestors
+
+
+def loop_counter(iterations):
+    """The variables of i = i + 1 run for iterations, each adding a
+    constant of its own"""
+    counter = make_variable("I0", [])
+    variables = [counter]
+    for k in range(iterations):
+        const = make_variable(f"C{k}", [])
+        counter = make_variable(f"I{k + 1}", [counter, const])
+        variables += [const, counter]
+    return variables
+
+
+@pytest.mark.parametrize("max_intervals", [reachability.MAX_INTERVALS, 2, 0])
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_walk(monkeypatch, max_intervals, seed):
+    monkeypatch.setattr(reachability, "MAX_INTERVALS", max_intervals)
+    rng = random.Random(seed)
+    variables = random_graph(rng, rng.randint(4, 120))
+    ancestors = {var.symbol: walked_ancestors(var) for var in variables}
+    index = reachability.ReachabilityIndex()
+
+    for var in variables:
+        assert index.ancestors(var) == ancestors[var.symbol]
+        assert index.descendants(var) == {
+            other.symbol for other in variables if var.symbol in ancestors[other.symbol]
+        }
+    for _ in range(300):
+        var, other = rng.choice(variables), rng.choice(variables)
+        assert index.is_ancestor(var, [other]) == (
+            var.symbol in ancestors[other.symbol]
+        )
+        assert index.is_descendant(var, [other]) == (
+            other.symbol in ancestors[var.symbol]
+        )
+
+
+def test_long_chain_labels_in_linear_memory():
+    variables = loop_counter(40000)
+    first, last = variables[0], variables[-1]
+
+    tracemalloc.start()
+    index = reachability.ReachabilityIndex()
+    assert index.is_descendant(last, [first])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # a bitset of every ancestor of each variable would take over 100 MB
+    assert peak < 40 * 1024 * 1024
+    assert index.is_ancestor(variables[1], [last])
+    assert not index.is_ancestor(last, [variables[1]])
+    assert len(index.ancestors(last)) == len(variables) - 1
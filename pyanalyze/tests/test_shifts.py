@@ -0,0 +1,58 @@
+import sys
+from os.path import abspath, dirname, join
+
+import pytest
+
+sys.path.insert(0, join(dirname(abspath(__file__)), ".."))
+
+import decompiler.memtypes as mem
+import decompiler.tac_cfg as tac_cfg
+from decompiler.analyzer.trace_loader import TraceLoader
+
+WORD = mem.Variable.CARDINALITY - 1
+NEGATIVE = 1 << 255
+
+
+@pytest.mark.parametrize(
+    "op, shift, value, result",
+    [
+        ("SHL", 0, 1, 1),
+        ("SHL", 255, 1, NEGATIVE),
+        ("SHL", 256, 1, 0),
+        ("SHL", 1, WORD, WORD - 1),
+        ("SHL", WORD, WORD, 0),
+        ("SHR", 255, NEGATIVE, 1),
+        ("SHR", 256, WORD, 0),
+        ("SHR", WORD, WORD, 0),
+        ("SAR", 255, NEGATIVE, WORD),
+        ("SAR", 256, NEGATIVE, WORD),
+        ("SAR", WORD, WORD, WORD),
+        ("SAR", 256, NEGATIVE - 1, 0),
+        ("SAR", WORD, 1, 0),
+    ],
+)
+def test_fold_shift(op, shift, value, result):
+    func = getattr(mem.Variable, op)
+    args = [mem.ConcreteVariable(shift), mem.ConcreteVariable(value)]
+    assert mem.ConcreteVariable.fold_value(func, args) == result
+    assert mem.Variable.fold(func, [mem.Variable([shift]), mem.Variable([value])]) == (
+        mem.Variable([result])
+    )
+
+
+@pytest.mark.parametrize("op", ["SHL", "SHR", "SAR"])
+def test_trace_with_huge_shift(op):
+    lines = [
+        "0,0,1,PUSH1,100,3,0x1",
+        f"2,0,1,PUSH32,100,3,{hex(WORD)}",
+        f"35,0,1,{op},100,3,0x0",
+        "36,0,1,POP,100,3,0x0",
+        "37,0,1,STOP,100,3,0x0",
+    ]
+    trace = {"optrace": "\n".join(lines), "to": "0xabc"}
+    graph = tac_cfg.TACGraph.from_trace(trace)
+    shift = next(o for o in graph.tac_ops if o.opcode.name == op)
+    assert shift.lhs.const_value == 0
+
+    ops, _, _ = TraceLoader.from_trace(trace)
+    assert next(iter(ops[op])).def_var.value == 0